@@ -20,12 +20,31 @@ if os.getenv("IO_STREAM") == "web":
     @app.route('/perform', methods=['POST'])
     def perform_action(): return my_app.perform_action()
 
-    @app.route('/perform', methods=['POST'])
+    @app.route('/end', methods=['POST'])
     def end_game(): return my_app.end_game()
 
+    @app.route('/field', methods=['POST'])
+    def field(): return my_app.field()
+
+    @app.route('/stats', methods=['GET'])
+    def stats(): return my_app.stats()
+
+    @app.route('/memory', methods=['GET'])
+    def memory(): return my_app.memory()
+
     if __name__ == "__main__":
         app.run(port=int(os.getenv("PORT", 5000)), host='0.0.0.0')
 
+elif os.getenv("IO_STREAM") == "asgi":
+    from server.asgi_server import AsgiApp
+
+    app = AsgiApp(App(io_stream="web"))
+
+    if __name__ == "__main__":
+        import uvicorn
+
+        uvicorn.run(app, port=int(os.getenv("PORT", 5000)), host='0.0.0.0')
+
 else:
     game = Game()
     game.start()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+
+class _InvalidBody(Exception):
+    """Тело запроса не удалось разобрать"""
+
+
+class AsgiApp:
+    """
+    ASGI приложение для запуска сервера на цикле событий asyncio.
+    Использует те же обработчики и тот же формат ответов, что и Flask режим.
+    Обработчики выполняются в пуле потоков: команды игр и обращения к хранилищу не блокируют цикл событий.
+    Поток пула занят только на время выполнения обработчика, а не на время сессии игрока:
+    id игр выдаются из заранее арендованных диапазонов, а события журнала отправляются пачками
+    фоновым потоком, поэтому обработчики почти не обращаются к сети. Размер пула ограничивает
+    количество одновременно выполняемых команд, подключения зрителей к /events потоков пула не занимают
+    """
+
+    _headers = [
+        (b"content-type", b"application/json"),
+        (b"access-control-allow-origin", b"*"),
+        (b"access-control-allow-headers", b"*"),
+        (b"access-control-allow-methods", b"*"),
+    ]
+
+    def __init__(self, app, threads=None):
+        """
+        :param app: App, обработчики запросов сервера
+        :param threads: int, размер пула потоков обработчиков.
+        По умолчанию - переменная окружения ASGI_THREADS или 32
+        """
+        self.app = app
+        self.executor = ThreadPoolExecutor(threads or int(os.getenv("ASGI_THREADS", 32)),
+                                           thread_name_prefix="asgi-handler")
+
+        self._routes = {
+            ("GET", "/"): self.welcome,
+            ("GET", "/init"): self.init_game,
+            ("POST", "/perform"): self.perform_action,
+            ("POST", "/end"): self.end_game,
+            ("POST", "/field"): self.field,
+            ("GET", "/stats"): self.stats,
+            ("GET", "/memory"): self.memory,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] == "GET" and scope["path"] == "/events":
+            await self.events_stream(scope, receive, send)
+            return
+
+        handler = self._routes.get((scope["method"], scope["path"]))
+
+        if handler is None:
+            await self._respond(send, {"response_content": "Not found"}, 404)
+            return
+
+        body = await self._read_body(receive)
+
+        try:
+            payload, status = await handler(scope, body)
+        except _InvalidBody as err:
+            payload, status = {
+                "response_content": "Was provided invalid arguments!",
+                "error": str(err)
+            }, 400
+        except Exception as err:
+            payload, status = {
+                "response_content": f"Some error occurred! Request could not be completed",
+                "error": str(err)
+            }, 500
+
+        await self._respond(send, payload, status)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b""
+        more_body = True
+
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        return body
+
+    async def _respond(self, send, payload, status):
+        if isinstance(payload, str):
+            content = payload.encode("utf-8")
+            headers = [(b"content-type", b"text/html; charset=utf-8")] + self._headers[1:]
+        else:
+            content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers = self._headers
+
+        await send({"type": "http.response.start", "status": status,
+                    "headers": headers + [(b"content-length", str(len(content)).encode())]})
+        await send({"type": "http.response.body", "body": content})
+
+    @staticmethod
+    def _parse_body(scope, body):
+        """Разбирает тело запроса в формате JSON или application/x-www-form-urlencoded"""
+        headers = dict(scope.get("headers", []))
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+
+        try:
+            if "application/x-www-form-urlencoded" in content_type:
+                return {key: values[0] for key, values in parse_qs(body.decode("utf-8")).items()}
+
+            return json.loads(body or b"{}")
+        except ValueError as err:
+            raise _InvalidBody(f"Тело запроса не удалось разобрать: {err}")
+
+    async def events_stream(self, scope, receive, send):
+        """Поток Server-Sent Events с событиями игры"""
+
+        query = parse_qs(scope.get("query_string", b"").decode("utf-8"))
+        game_id = query.get("game_id", [None])[0]
+
+        subscription, error = await self._call(self.app.subscribe_to_events, game_id, asyncio.get_running_loop())
+        if subscription is None:
+            await self._respond(send, *error)
+            return
+
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")]
+                    + self._headers[1:]})
+
+        # Отключение клиента отслеживается отдельной задачей
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+
+        try:
+            while not disconnected.is_set():
+                frame, is_last = await subscription.next_frame()
+                await send({"type": "http.response.body", "body": frame.encode("utf-8"), "more_body": not is_last})
+                if is_last:
+                    break
+        finally:
+            watcher.cancel()
+            subscription.close()
+
+    async def _call(self, handler, *args):
+        """Выполняет обработчик в пуле потоков"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, handler, *args)
+
+    async def welcome(self, scope, body):
+        return "Welcome to CDG api", 200
+
+    async def init_game(self, scope, body):
+        return await self._call(self.app.handle_init)
+
+    async def perform_action(self, scope, body):
+        return await self._call(self.app.handle_perform, self._parse_body(scope, body))
+
+    async def end_game(self, scope, body):
+        data = self._parse_body(scope, body)
+        return await self._call(self.app.handle_end, data.get("game_id") if isinstance(data, dict) else None)
+
+    async def field(self, scope, body):
+        return await self._call(self.app.handle_field, self._parse_body(scope, body))
+
+    async def stats(self, scope, body):
+        return await self._call(self.app.handle_stats)
+
+    async def memory(self, scope, body):
+        return await self._call(self.app.handle_memory)
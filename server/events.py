@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+
+# События, после которых поток событий игры закрывается
+_last_event_types = ("game_end", "game_removed")
+
+
+class Subscription:
+    """
+    Подписка одного зрителя на события игры.
+    События передаются в виде готовых кадров Server-Sent Events вместе со временем публикации
+    """
+
+    def __init__(self, broker, game_id):
+        self.broker = broker
+        self.game_id = game_id
+        self.closed = False
+
+    def deliver(self, item):
+        """Передает кадр подписчику. Возвращает False, если очередь подписчика переполнена"""
+        raise NotImplementedError
+
+    def close(self):
+        """Отменяет подписку"""
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+
+
+class ThreadSubscription(Subscription):
+    """Подписка с блокирующим генератором кадров для потребителей внутри процесса, например тестов и ботов"""
+
+    def __init__(self, broker, game_id, max_queue_size):
+        Subscription.__init__(self, broker, game_id)
+        self._queue = queue.Queue(maxsize=max_queue_size)
+
+    def deliver(self, item):
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def frames(self, heartbeat_interval=15):
+        """Генератор кадров. При отсутствии событий отправляет комментарий для поддержания соединения"""
+        try:
+            while not self.closed:
+                try:
+                    published_at, frame, is_last = self._queue.get(timeout=heartbeat_interval)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                self.broker.record_delivery(published_at)
+                yield frame
+
+                if is_last:
+                    break
+        finally:
+            self.close()
+
+
+class AsyncSubscription(Subscription):
+    """Подписка для режима asyncio: кадры передаются в очередь цикла событий"""
+
+    def __init__(self, broker, game_id, max_queue_size, loop):
+        Subscription.__init__(self, broker, game_id)
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.broker.dropped += 1
+
+    def deliver(self, item):
+        self._loop.call_soon_threadsafe(self._put, item)
+        return True
+
+    async def next_frame(self, heartbeat_interval=15):
+        """Возвращает следующий кадр и признак последнего кадра"""
+        try:
+            published_at, frame, is_last = await asyncio.wait_for(self._queue.get(), heartbeat_interval)
+        except asyncio.TimeoutError:
+            return ": keep-alive\n\n", False
+
+        self.broker.record_delivery(published_at)
+        return frame, is_last
+
+
+class EventBroker:
+    """
+    Рассылка игровых событий подписчикам.
+    Каждое событие сериализуется один раз и передается всем зрителям игры.
+    Если хранилище игр общее для нескольких воркеров, события записываются в журнал событий хранилища,
+    а каждый воркер, к которому подключены зрители, читает журнал в фоновом потоке и рассылает события своим
+    зрителям. Поэтому зрители получают события игры независимо от того, какой воркер выполнил команду
+    """
+
+    # Время хранения событий в журнале общего хранилища, в секундах
+    _log_retention = 60
+
+    def __init__(self, max_queue_size=1000, store=None, poll_interval=0.1):
+        """
+        :param max_queue_size: int, максимальное количество недоставленных кадров у одного подписчика
+        :param store: SessionStore, хранилище игр. Журнал событий используется, если хранилище его поддерживает
+        :param poll_interval: float, интервал чтения журнала событий в секундах
+        """
+
+        self.max_queue_size = max_queue_size
+        self.store = store if store is not None and store.shares_events else None
+        self.poll_interval = poll_interval
+
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+        # Последнее прочитанное событие журнала и процесс, в котором запущен поток чтения журнала
+        self._last_event_id = None
+        self._pid = None
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+
+    def subscribe(self, game_id):
+        """Создает подписку на события игры для потокового воркера"""
+        return self._add(ThreadSubscription(self, str(game_id), self.max_queue_size))
+
+    def subscribe_async(self, game_id, loop):
+        """Создает подписку на события игры для цикла событий asyncio"""
+        return self._add(AsyncSubscription(self, str(game_id), self.max_queue_size, loop))
+
+    def _add(self, subscription):
+        if self.store is not None:
+            self._ensure_polling()
+
+        with self._lock:
+            self._subscribers.setdefault(subscription.game_id, []).append(subscription)
+
+        return subscription
+
+    def _ensure_polling(self):
+        """Запускает чтение журнала событий в текущем процессе при первой подписке"""
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._last_event_id = self.store.last_event_id()
+                threading.Thread(target=self._poll, name="event-log", daemon=True).start()
+
+    def _poll(self):
+        trimmed_at = time.time()
+
+        while True:
+            time.sleep(self.poll_interval)
+
+            try:
+                self.poll_once()
+
+                if time.time() - trimmed_at > self._log_retention:
+                    trimmed_at = time.time()
+                    self.store.delete_events_before(trimmed_at - self._log_retention)
+            except Exception as err:
+                print(f"Ошибка при чтении журнала событий: {err}")
+
+    def poll_once(self):
+        """Рассылает зрителям события журнала, записанные после последнего прочитанного"""
+
+        with self._lock:
+            game_ids = list(self._subscribers.keys())
+
+        # События игр без зрителей этого воркера пропускаются
+        last_event_id = self.store.last_event_id()
+        events = self.store.read_events(self._last_event_id, game_ids) if game_ids else []
+        self._last_event_id = last_event_id
+
+        for event_id, game_id, created, event in events:
+            if event_id > last_event_id:
+                break
+            # Время публикации переводится в часы процесса для подсчета задержки доставки
+            self._deliver(game_id, event, time.monotonic() - max(0.0, time.time() - created))
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.game_id)
+            if subscribers is None:
+                return
+
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.game_id]
+
+    def publish(self, game_id, event):
+        """
+        Публикует событие игры. Используется как обработчик событий игрового движка\n
+        :param game_id: int, id игры
+        :param event: dict, событие, содержит тип события в поле "type"
+        """
+        self.publish_many(game_id, [event])
+
+    def publish_many(self, game_id, events):
+        """
+        Публикует события игры в порядке их возникновения\n
+        :param game_id: int, id игры
+        :param events: [dict], события
+        """
+
+        if not events:
+            return
+
+        self.published += len(events)
+
+        if self.store is not None:
+            self.store.append_events(game_id, events)
+            return
+
+        for event in events:
+            self._deliver(str(game_id), event, time.monotonic())
+
+    def close_game(self, game_id):
+        """Закрывает потоки событий удаленной игры, в том числе у зрителей других воркеров"""
+        self.publish(game_id, {"type": "game_removed"})
+
+    def _deliver(self, game_id, event, published_at):
+        subscribers = self._subscribers.get(game_id)
+        if not subscribers:
+            return
+
+        frame = f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        item = (published_at, frame, event["type"] in _last_event_types)
+
+        for subscription in list(subscribers):
+            if not subscription.deliver(item):
+                self.dropped += 1
+
+    def record_delivery(self, published_at):
+        """Учитывает задержку доставки кадра подписчику"""
+        lag = time.monotonic() - published_at
+
+        self.delivered += 1
+        self._lag_total += lag
+        self._lag_max = max(self._lag_max, lag)
+
+    def connections_count(self):
+        """Возвращает количество подключенных зрителей"""
+        return sum(len(subscribers) for subscribers in list(self._subscribers.values()))
+
+    def stats(self):
+        """Возвращает метрики рассылки событий"""
+        return {
+            "connections": self.connections_count(),
+            "games_watched": len(self._subscribers),
+            "shared_log": self.store is not None,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "delivery_lag_avg_ms": round(self._lag_total / self.delivered * 1000, 3) if self.delivered else 0.0,
+            "delivery_lag_max_ms": round(self._lag_max * 1000, 3)
+        }
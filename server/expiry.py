@@ -0,0 +1,190 @@
+import heapq
+import os
+import threading
+from contextlib import nullcontext
+import time
+from datetime import datetime
+
+
+class GameReaper:
+    """
+    Удаление завершенных и неактивных игр из хранилища.
+    Сроки истечения игр хранятся в куче, упорядоченной по времени последней активности.
+    Проход по куче выполняется в фоновом потоке, поэтому обработка запросов не зависит от количества игр.
+    Поток запускается в каждом процессе отдельно, см. start
+    """
+
+    def __init__(self, store, expiration, interval=60, locks=None, on_evict=None):
+        """
+        :param store: SessionStore, хранилище игр
+        :param expiration: int, время бездействия в секундах, после которого игра удаляется
+        :param interval: int, интервал между проходами в секундах
+        :param locks: GameLockTable, блокировки игр. Игра удаляется под блокировкой,
+        чтобы не удалить игру, в которой выполняется команда
+        :param on_evict: function, вызывается с id каждой удаленной игры, например для закрытия потоков событий
+        """
+
+        self.store = store
+        self.expiration = expiration
+        self.interval = interval
+        self.locks = locks
+        self.on_evict = on_evict
+
+        # В куче для каждой игры есть одна запись (срок истечения, id игры).
+        # Актуальный срок хранится в словаре, при продлении игры запись в куче не перестраивается,
+        # а проверяется и переносится при извлечении
+        self._heap = []
+        self._deadlines = {}
+        self._lock = threading.Lock()
+
+        self._stop = threading.Event()
+        self._thread = None
+        # Процесс, в котором запущен фоновый поток
+        self._pid = None
+
+        self.stats = {
+            "passes": 0,
+            "evicted_total": 0,
+            "last_pass_evicted": 0,
+            "last_pass_duration_ms": 0.0
+        }
+
+    @staticmethod
+    def _now():
+        return int(datetime.now().timestamp())
+
+    def _schedule(self, game_id, deadline):
+        game_id = str(game_id)
+
+        with self._lock:
+            if game_id not in self._deadlines:
+                heapq.heappush(self._heap, (deadline, game_id))
+            elif deadline < self._deadlines[game_id]:
+                # Срок сократился, например игра завершена, запись в куче должна появиться раньше
+                heapq.heappush(self._heap, (deadline, game_id))
+
+            self._deadlines[game_id] = deadline
+
+    def _reschedule(self, game_id, deadline):
+        """
+        Возвращает в кучу игру, запись которой извлечена из кучи при проходе.
+        Пока записи нет в куче, продление игры в этом воркере меняет только словарь сроков,
+        поэтому запись добавляется всегда, с наиболее поздним из сроков
+        """
+
+        with self._lock:
+            if game_id not in self._deadlines:
+                return
+
+            deadline = max(deadline, self._deadlines[game_id])
+            heapq.heappush(self._heap, (deadline, game_id))
+            self._deadlines[game_id] = deadline
+
+    def touch(self, game_id):
+        """Отмечает активность в игре, продлевая срок ее хранения"""
+        self._schedule(game_id, self._now() + self.expiration)
+
+    def expire_now(self, game_id):
+        """Отмечает игру как завершенную, она будет удалена при следующем проходе"""
+        self._schedule(game_id, 0)
+
+    def forget(self, game_id):
+        """Прекращает отслеживание игры"""
+        with self._lock:
+            self._deadlines.pop(str(game_id), None)
+
+    def tracked_count(self):
+        """Возвращает количество отслеживаемых игр"""
+        return len(self._deadlines)
+
+    def run_once(self):
+        """
+        Выполняет один проход удаления игр\n
+        :return: int, количество удаленных игр
+        """
+
+        started = time.perf_counter()
+        now = self._now()
+        evicted = 0
+
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+
+                deadline, game_id = heapq.heappop(self._heap)
+                actual_deadline = self._deadlines.get(game_id)
+
+                if actual_deadline is None:
+                    continue
+
+                if actual_deadline > deadline:
+                    # Игра была продлена после постановки в кучу
+                    heapq.heappush(self._heap, (actual_deadline, game_id))
+                    continue
+
+            with self.locks.hold(game_id) if self.locks is not None else nullcontext():
+                # Хранилище может быть общим для нескольких воркеров, поэтому решение принимается
+                # по метаданным хранилища: игра могла быть продолжена другим воркером
+                meta = self.store.get_meta(game_id)
+
+                if meta is None:
+                    self.forget(game_id)
+
+                elif not meta["is_on"] or now - meta["last_activity"] > self.expiration:
+                    # Игра удаляется, только если другой воркер не продолжил ее после чтения метаданных
+                    if self.store.delete_if_inactive(game_id, meta["last_activity"]):
+                        self.forget(game_id)
+                        evicted += 1
+                        if self.on_evict is not None:
+                            self.on_evict(game_id)
+                    else:
+                        self._reschedule(game_id, now + self.expiration)
+
+                else:
+                    self._reschedule(game_id, meta["last_activity"] + self.expiration)
+
+        duration = (time.perf_counter() - started) * 1000
+
+        self.stats["passes"] += 1
+        self.stats["evicted_total"] += evicted
+        self.stats["last_pass_evicted"] = evicted
+        self.stats["last_pass_duration_ms"] = round(duration, 3)
+
+        return evicted
+
+    def _seed(self):
+        """Ставит в очередь игры, уже находящиеся в хранилище, например созданные другими воркерами"""
+        for game_id, meta in self.store.items_meta():
+            if not meta["is_on"]:
+                self.expire_now(game_id)
+            else:
+                self._schedule(game_id, meta["last_activity"] + self.expiration)
+
+    def _run(self):
+        self._seed()
+
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as err:
+                print(f"Ошибка при удалении неактивных игр: {err}")
+
+    def start(self):
+        """
+        Запускает фоновый поток удаления игр, если он не запущен в текущем процессе.
+        Вызывается при обработке запросов, поэтому при запуске gunicorn с --preload
+        поток работает в каждом воркере, а не в главном процессе
+        """
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="game-reaper", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Останавливает фоновый поток"""
+        self._stop.set()
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from collections import deque
+
+from src.game import Game
+
+
+class GamePool:
+    """
+    Пул заранее созданных и запущенных игр.
+    При запросе новой игры из пула берется готовая игра, которой остается только присвоить id.
+    Пул пополняется в фоновом потоке, который запускается при первом запросе игры из пула в текущем процессе.
+    Поэтому при запуске gunicorn с --preload поток пополнения работает в каждом воркере, а не в главном процессе
+    """
+
+    # Интервал между попытками подготовить игру после ошибки, в секундах
+    _min_retry_delay = 1
+    _max_retry_delay = 60
+
+    def __init__(self, size, io_stream="web"):
+        """
+        :param size: int, количество готовых игр в пуле
+        :param io_stream: str, поток ввода данных, с которым создаются игры
+        """
+
+        self.size = size
+        self.io_stream = io_stream
+
+        # Готовые игры в виде пар (игра, результат запуска игры)
+        self._games = deque()
+        self._condition = threading.Condition()
+
+        self.hits = 0
+        self.misses = 0
+
+        # Процесс, в котором запущен поток пополнения
+        self._pid = None
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+
+        with self._condition:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="game-pool", daemon=True).start()
+
+    def _prepare(self):
+        game = Game(io_stream=self.io_stream, game_id=0)
+        return game, game.start()
+
+    def _run(self):
+        delay = 0
+
+        while True:
+            with self._condition:
+                while len(self._games) >= self.size:
+                    self._condition.wait()
+
+            try:
+                prepared = self._prepare()
+            except Exception as err:
+                # При постоянной ошибке, например недоступности API базы данных,
+                # попытки повторяются с увеличивающимся интервалом
+                delay = min(max(delay * 2, self._min_retry_delay), self._max_retry_delay)
+                print(f"Не удалось подготовить игру для пула, повтор через {delay} с: {err}")
+                time.sleep(delay)
+                continue
+
+            delay = 0
+            with self._condition:
+                self._games.append(prepared)
+
+    def take(self):
+        """
+        Возвращает готовую игру и результат ее запуска или None, если пул пуст
+        """
+
+        self._ensure_started()
+
+        with self._condition:
+            if self._games:
+                self.hits += 1
+                prepared = self._games.popleft()
+            else:
+                self.misses += 1
+                prepared = None
+
+            self._condition.notify()
+
+        return prepared
+
+    def stats(self):
+        """Возвращает метрики пула"""
+        return {
+            "size": self.size,
+            "ready": len(self._games),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,41 @@
+import threading
+from contextlib import contextmanager
+
+
+class GameLockTable:
+    """
+    Таблица блокировок игр.
+    Команды одной игры выполняются строго последовательно, команды разных игр - параллельно.
+    Блокировка создается при первом обращении к игре и удаляется, когда ее больше никто не ожидает
+    """
+
+    def __init__(self):
+        # id игры -> [блокировка, количество потоков, которые ее держат или ожидают]
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, game_id):
+        """Контекстный менеджер, на время работы которого захватывается блокировка игры"""
+        game_id = str(game_id)
+
+        with self._lock:
+            entry = self._locks.get(game_id)
+            if entry is None:
+                entry = [threading.Lock(), 0]
+                self._locks[game_id] = entry
+            entry[1] += 1
+
+        entry[0].acquire()
+        try:
+            yield
+        finally:
+            entry[0].release()
+
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(game_id, None)
+
+    def __len__(self):
+        return len(self._locks)
@@ -1,19 +1,49 @@
+import os
 from flask import Flask, request, jsonify
-from datetime import datetime
 
 from src.game import Game
+from utils.helpers import generate_game_id
+from utils.logger import get_log_shipper_stats
+from .events import EventBroker
+from .expiry import GameReaper
+from .game_pool import GamePool
+from .locks import GameLockTable
+from .session_store import SessionConflict, create_session_store
 
 
 class App:
-    active_games = {}
     _expiration = 5 * 60 * 60
 
-    def __init__(self):
-        pass
+    # Количество попыток выполнить команду, если игру одновременно изменяют другие воркеры
+    _edit_attempts = 5
 
-    def after_request(self, response):
-        self._delete_invalid_games()
+    def __init__(self, io_stream="web"):
+        # Поток ввода, с которым создаются игры
+        self.io_stream = io_stream
+
+        # Хранилище активных игр, может быть общим для нескольких воркеров
+        self.active_games = create_session_store()
+
+        # Пул заранее запущенных игр, размер задается переменной окружения GAME_POOL_SIZE
+        pool_size = int(os.getenv("GAME_POOL_SIZE", 0))
+        self.game_pool = GamePool(pool_size, io_stream) if pool_size > 0 else None
+
+        # Рассылка игровых событий зрителям, подключенным к /events в ASGI режиме.
+        # С общим хранилищем события передаются между воркерами через журнал событий хранилища
+        self.events = EventBroker(store=self.active_games)
+
+        # Команды одной игры выполняются последовательно, даже если запросы обрабатываются разными потоками
+        self.game_locks = GameLockTable()
 
+        # Подсказка выполняется под блокировкой игры, поэтому поиск для сервера ограничен сильнее, чем в консоли
+        self.hint_time_budget = float(os.getenv("SERVER_HINT_TIME_BUDGET", 0.1))
+        self.hint_node_budget = int(os.getenv("SERVER_HINT_NODE_BUDGET", 500))
+
+        # Завершенные и неактивные игры удаляются фоновым потоком
+        self.reaper = GameReaper(self.active_games, App._expiration, int(os.getenv("REAPER_INTERVAL", 60)),
+                                 locks=self.game_locks, on_evict=self.events.close_game)
+
+    def after_request(self, response):
         response.headers.add("Access-Control-Allow-Origin", "*")
         response.headers.add("Access-Control-Allow-Headers", "*")
         response.headers.add("Access-Control-Allow-Methods", "*")
@@ -21,104 +51,330 @@ class App:
         return response
 
     def init_game(self):
+        payload, status = self.handle_init()
+        return jsonify(payload), status
+
+    def perform_action(self):
+        payload, status = self.handle_perform(request.json)
+        return jsonify(payload), status
+
+    def end_game(self):
+        payload, status = self.handle_end(request.form.get("game_id"))
+        return jsonify(payload), status
+
+    def field(self):
+        payload, status = self.handle_field(request.json)
+        return jsonify(payload), status
+
+    def subscribe_to_events(self, game_id, loop=None):
+        """
+        Подписывает зрителя на события игры. Поток событий /events обслуживается только в ASGI режиме:
+        в синхронных воркерах каждый зритель занимал бы воркер на все время подключения\n
+        :param game_id: str, id игры
+        :param loop: asyncio цикл событий для подписки в ASGI режиме.
+        Без него возвращается подписка с блокирующим генератором кадров для потребителей внутри процесса
+        :return: пара (подписка, None) или (None, (содержимое ответа с ошибкой, статус))
+        """
+
+        if not game_id:
+            return None, ({"response_content": "Was provided invalid arguments!"}, 403)
+
         try:
-            game = Game()
-            self._add_new_game(game)
+            self._get_game_by_id(game_id)
+        except Exception as err:
+            return None, ({
+                "response_content": f"Some error occurred! Request could not be completed",
+                "error": str(err)
+            }, 404)
+
+        if loop is not None:
+            return self.events.subscribe_async(game_id, loop), None
+
+        return self.events.subscribe(game_id), None
+
+    def memory(self):
+        payload, status = self.handle_memory()
+        return jsonify(payload), status
+
+    def stats(self):
+        """Возвращает метрики сервера"""
+        payload, status = self.handle_stats()
+        return jsonify(payload), status
+
+    # Обработчики запросов не зависят от фреймворка и возвращают пару (содержимое ответа, статус).
+    # Они используются как Flask, так и ASGI режимом сервера
+
+    def handle_init(self, game_id=None):
+        """
+        Создает и запускает новую игру\n
+        :param game_id: int, заранее полученный id игры. Если не передан, id будет получен при создании игры
+        """
+
+        try:
+            prepared = self.game_pool.take() if self.game_pool is not None else None
+
+            if prepared is not None:
+                game, response_content = prepared
+                game.assign_id(game_id if game_id is not None else generate_game_id(self.io_stream))
+            else:
+                game = Game(io_stream=self.io_stream, game_id=game_id)
+                response_content = game.start()
+
             game_id = game.game_id
-            response_content = game.start()
+            self._add_new_game(game)
 
-            return jsonify({
+            return {
                 "game_id": game_id,
                 "response_content": response_content,
-            }), 200
+            }, 200
 
         except Exception as err:
-            return jsonify({
+            return {
                 "response_content": f"Some error occurred! Request could not be completed",
                 "error": str(err)
-            }), 500
+            }, 500
 
-    def perform_action(self):
-        data = request.json
+    def handle_perform(self, data):
+        """
+        Выполняет команду игрока в игре.
+        Вместо одной команды "command" может быть передан список "commands",
+        который выполняется за одно обращение к игре. Параметр "stop_on_error" (по умолчанию true)
+        прекращает выполнение списка после первой команды с ошибкой
+        """
 
-        command = data["command"]
-        game_id = data["game_id"]
+        error = self._validate_perform(data)
+        if error is not None:
+            return {
+                "response_content": "Was provided invalid arguments!",
+                "error": error
+            }, 400
 
-        if command and game_id:
+        command = data.get("command")
+        commands = data.get("commands")
+        game_id = data.get("game_id")
+
+        if (command or commands) and game_id:
             try:
-                game = self._get_game_by_id(game_id)
-                result = game.game_controller.listen_command(command)
-                is_on = game.is_on
+                def perform(game):
+                    game.game_controller.hint_time_budget = self.hint_time_budget
+                    game.game_controller.hint_node_budget = self.hint_node_budget
+
+                    if commands is not None:
+                        return game.game_controller.listen_commands(
+                            commands, stop_on_error=data.get("stop_on_error", True)), game.is_on
 
-                return jsonify({
+                    return game.game_controller.listen_command(command), game.is_on
+
+                if commands is not None:
+                    results, is_on = self._edit_game(game_id, perform)
+                else:
+                    result, is_on = self._edit_game(game_id, perform)
+
+                if commands is not None:
+                    return {
+                        "game_id": game_id,
+                        "results": results,
+                        "is_on": is_on
+                    }, 200
+
+                return {
                     "game_id": game_id,
                     "response_content": result,
                     "is_on": is_on
-                }), 200
+                }, 200
 
             except Exception as err:
-                return jsonify({
+                return {
                     "response_content": f"Some error occurred! Request could not be completed",
                     "error": str(err)
-                }), 500
+                }, 500
         else:
-            return jsonify({
+            return {
                 "response_content": "Was provided invalid arguments!",
-            }), 403
+            }, 403
 
-    def end_game(self):
-        game_id = int(request.form.get("game_id"))
+    @staticmethod
+    def _validate_perform(data):
+        """Проверяет типы параметров запроса /perform. Возвращает описание ошибки или None"""
+
+        if not isinstance(data, dict):
+            return "Тело запроса должно быть объектом JSON."
+
+        command = data.get("command")
+        if command is not None and not isinstance(command, str):
+            return "Команда \"command\" должна быть строкой."
+
+        commands = data.get("commands")
+        if commands is not None and not (isinstance(commands, list)
+                                         and all(isinstance(item, str) and item for item in commands)):
+            return "Список команд \"commands\" должен состоять из непустых строк."
+
+        if not isinstance(data.get("stop_on_error", True), bool):
+            return "Параметр \"stop_on_error\" должен быть true или false."
+
+        return None
+
+    def handle_end(self, game_id):
+        """Завершает игру с переданным id"""
+
+        try:
+            game_id = int(game_id) if game_id else None
+        except (TypeError, ValueError):
+            game_id = None
 
         if game_id:
             try:
-                game = self._get_game_by_id(game_id)
-                result = game.game_engine.end_game()
+                result = self._edit_game(game_id, lambda game: game.game_engine.end_game())
 
-                return jsonify({
+                return {
                     "game_id": game_id,
                     "response_content": result,
                     "is_on": False
-                }), 200
+                }, 200
 
             except Exception as err:
-                return jsonify({
+                return {
                     "response_content": f"Some error occurred! Request could not be completed",
                     "error": str(err)
-                }), 500
+                }, 500
         else:
-            return jsonify({
+            return {
+                "response_content": "Was provided invalid arguments!",
+            }, 403
+
+    def handle_field(self, data):
+        """
+        Возвращает ячейки игрового поля, изменившиеся после версии состояния "since".
+        Если версия не передана, возвращается все поле
+        """
+
+        error = self._validate_field(data)
+        if error is not None:
+            return {
                 "response_content": "Was provided invalid arguments!",
-            }), 403
+                "error": error
+            }, 400
+
+        game_id = data.get("game_id")
+        since = data.get("since")
+
+        if game_id:
+            try:
+                with self.game_locks.hold(game_id):
+                    game = self._get_game_by_id(game_id)
+                    delta = game.game_engine.get_field_delta(since)
+
+                return {"game_id": game_id, **delta, "is_on": game.is_on}, 200
+
+            except Exception as err:
+                return {
+                    "response_content": f"Some error occurred! Request could not be completed",
+                    "error": str(err)
+                }, 500
+        else:
+            return {
+                "response_content": "Was provided invalid arguments!",
+            }, 403
+
+    @staticmethod
+    def _validate_field(data):
+        """Проверяет типы параметров запроса /field. Возвращает описание ошибки или None"""
+
+        if not isinstance(data, dict):
+            return "Тело запроса должно быть объектом JSON."
+
+        since = data.get("since")
+        if since is not None and (not isinstance(since, int) or isinstance(since, bool)):
+            return "Версия \"since\" должна быть целым числом."
+
+        return None
+
+    def handle_memory(self):
+        """Возвращает размер в байтах каждой игры, загруженной в память воркера"""
+        games = {str(game.game_id): game.game_engine.get_memory_footprint()
+                 for game in self.active_games.loaded_games()}
+
+        return {
+            "games_count": len(games),
+            "total_bytes": sum(games.values()),
+            "games": games
+        }, 200
+
+    def handle_stats(self):
+        """Возвращает метрики сервера"""
+        return {
+            "reaper": {**self.reaper.stats, "tracked_games": self.reaper.tracked_count()},
+            "locked_games": len(self.game_locks),
+            "log_shipper": get_log_shipper_stats(),
+            "game_pool": self.game_pool.stats() if self.game_pool is not None else None,
+            "events": self.events.stats()
+        }, 200
 
     def _add_new_game(self, game):
-        self.active_games[str(game.game_id)] = {
-            "game": game,
-            "game_id": game.game_id,
-            "start_time": int(datetime.now().timestamp())
-        }
+        game.game_engine.set_event_handler(self.events.publish)
+        self.active_games.add(game)
+        self.reaper.start()
+        self.reaper.touch(game.game_id)
 
     def _get_game_by_id(self, game_id):
-        if str(game_id) in self.active_games:
-            return self.active_games[str(game_id)]["game"]
-        else:
+        try:
+            game = self.active_games.get(game_id)
+        except KeyError:
             raise Exception(f"Игра с ID {game_id} не была найдена!")
 
-    def _end_game_with_id(self, game_id):
-        for key in list(self.active_games.keys()):
-            game = self.active_games[key]["game"]
-            if game.game_id == str(game_id):
-                game.is_on = False
+        # Игра могла быть загружена из общего хранилища без обработчика событий
+        game.game_engine.set_event_handler(self.events.publish)
+
+        return game
+
+    def _edit_game(self, game_id, action):
+        """
+        Выполняет action(game) в игре под блокировкой игры и сохраняет изменения игры в хранилище.
+        Если игру одновременно изменил другой воркер, действие выполняется заново над новой версией игры.
+        События игры публикуются только после сохранения изменений\n
+        :param game_id: int, id игры
+        :param action: function, действие, принимающее игру
+        :return: результат action
+        """
+
+        for _ in range(self._edit_attempts):
+            events = []
 
-    def _delete_invalid_games(self):
-        def _is_expired(game_obj):
-            return (int(datetime.now().timestamp())
-                    - self.active_games[str(game_obj.game_id)]["start_time"]) > App._expiration
+            with self.game_locks.hold(game_id):
+                found = False
+                try:
+                    with self.active_games.edit(game_id) as game:
+                        found = True
+                        # События собираются и публикуются после сохранения изменений,
+                        # при конфликте они отбрасываются вместе с изменениями
+                        game.game_engine.set_event_handler(lambda event_game_id, event: events.append(event))
+                        try:
+                            result = action(game)
+                        finally:
+                            game.game_engine.set_event_handler(self.events.publish)
+                except KeyError:
+                    if found:
+                        raise
+                    raise Exception(f"Игра с ID {game_id} не была найдена!")
+                except SessionConflict:
+                    continue
 
-        for key in list(self.active_games.keys()):
-            game = self.active_games[key]["game"]
+                self.events.publish_many(game.game_id, events)
 
-            if not game.is_on:
-                self.active_games.pop(key, None)
+            self.reaper.start()
+            if game.is_on:
+                self.reaper.touch(game.game_id)
+            else:
+                self.reaper.expire_now(game.game_id)
+
+            return result
+
+        raise Exception(f"Игра с ID {game_id} изменяется другими запросами, попробуйте повторить команду.")
+
+    def _end_game_with_id(self, game_id):
+        def end(game):
+            game.is_on = False
 
-            elif _is_expired(game):
-                self.active_games.pop(key, None)
+        # Отсутствующие в хранилище игры пропускаются
+        if self.active_games.get_meta(game_id) is not None:
+            self._edit_game(game_id, end)
@@ -0,0 +1,427 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+
+# Хранилища активных игр.
+# Хранилище памяти процесса подходит для одного воркера,
+# хранилище на SQLite позволяет нескольким воркерам gunicorn обслуживать общий пул игр
+
+
+def _now():
+    return int(datetime.now().timestamp())
+
+
+class SessionConflict(Exception):
+    """Игра была изменена другим воркером во время выполнения команды, изменения команды не сохранены"""
+
+
+class SessionStore:
+    """
+    Базовый класс хранилища игровых сессий.
+    Для каждой игры хранятся сама игра и метаданные: время начала, время последней активности и статус игры
+    """
+
+    # True, если хранилище общее для нескольких воркеров и ведет журнал событий игр, см. EventBroker
+    shares_events = False
+
+    def add(self, game):
+        """Добавляет новую игру в хранилище"""
+        raise NotImplementedError
+
+    def get(self, game_id):
+        """Возвращает игру с переданным id. Выбрасывает KeyError, если игра не найдена"""
+        raise NotImplementedError
+
+    def edit(self, game_id):
+        """
+        Контекстный менеджер для выполнения команды в игре. Возвращает игру с переданным id,
+        после выхода из блока сохраняет ее изменения и обновляет время последней активности.
+        Выбрасывает KeyError, если игра не найдена, и SessionConflict, если игра была изменена
+        другим воркером во время выполнения блока - в этом случае команду нужно выполнить заново.
+        Одновременные изменения одной игры в одном процессе не допускаются, см. GameLockTable
+        """
+        raise NotImplementedError
+
+    def delete(self, game_id):
+        """Удаляет игру из хранилища"""
+        raise NotImplementedError
+
+    def delete_if_inactive(self, game_id, last_activity):
+        """
+        Удаляет игру, если время ее последней активности не изменилось с момента чтения метаданных.
+        Возвращает True, если игра удалена
+        """
+        raise NotImplementedError
+
+    def get_meta(self, game_id):
+        """Возвращает метаданные игры или None, если игра не найдена"""
+        raise NotImplementedError
+
+    def items_meta(self):
+        """Возвращает список пар (game_id, метаданные) для всех игр хранилища"""
+        raise NotImplementedError
+
+    def loaded_games(self):
+        """Возвращает игры, загруженные в память текущего процесса"""
+        raise NotImplementedError
+
+    def append_events(self, game_id, events):
+        """Добавляет события игры в журнал событий"""
+        raise NotImplementedError
+
+    def read_events(self, after_event_id, game_ids):
+        """
+        Возвращает события переданных игр, записанные после события after_event_id,
+        в виде списка (id события, id игры, время записи, событие)
+        """
+        raise NotImplementedError
+
+    def last_event_id(self):
+        """Возвращает id последнего события журнала или 0"""
+        raise NotImplementedError
+
+    def delete_events_before(self, created):
+        """Удаляет из журнала события, записанные раньше переданного времени"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Хранилище игр в памяти процесса. Игры не сериализуются"""
+
+    def __init__(self):
+        self._games = {}
+        self._lock = threading.Lock()
+
+    def add(self, game):
+        now = _now()
+        with self._lock:
+            self._games[str(game.game_id)] = {
+                "game": game,
+                "game_id": game.game_id,
+                "start_time": now,
+                "last_activity": now,
+                "is_on": game.is_on
+            }
+
+    def get(self, game_id):
+        return self._games[str(game_id)]["game"]
+
+    @contextmanager
+    def edit(self, game_id):
+        entry = self._games[str(game_id)]
+        game = entry["game"]
+
+        yield game
+
+        entry["last_activity"] = _now()
+        entry["is_on"] = game.is_on
+
+    def delete(self, game_id):
+        with self._lock:
+            self._games.pop(str(game_id), None)
+
+    def delete_if_inactive(self, game_id, last_activity):
+        with self._lock:
+            entry = self._games.get(str(game_id))
+            if entry is None or entry["last_activity"] != last_activity:
+                return False
+
+            del self._games[str(game_id)]
+            return True
+
+    def get_meta(self, game_id):
+        entry = self._games.get(str(game_id))
+        if entry is None:
+            return None
+
+        return {key: entry[key] for key in ("start_time", "last_activity", "is_on")}
+
+    def items_meta(self):
+        with self._lock:
+            keys = list(self._games.keys())
+
+        result = []
+        for key in keys:
+            meta = self.get_meta(key)
+            if meta is not None:
+                result.append((key, meta))
+
+        return result
+
+    def loaded_games(self):
+        with self._lock:
+            return [entry["game"] for entry in self._games.values()]
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Хранилище игр в файле SQLite в режиме WAL, общее для всех воркеров на одной машине.
+    Игры хранятся в сериализованном виде. Каждый воркер держит кэш десериализованных игр,
+    актуальность кэша проверяется по номеру версии записи.
+    Команды выполняются вне транзакций, изменения сохраняются с проверкой версии записи, см. edit.
+    События игр записываются в журнал событий, который читают воркеры с подключенными зрителями
+    """
+
+    shares_events = True
+
+    _schema = """
+        CREATE TABLE IF NOT EXISTS games (
+            game_id TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            version INTEGER NOT NULL,
+            start_time INTEGER NOT NULL,
+            last_activity INTEGER NOT NULL,
+            is_on INTEGER NOT NULL
+        )
+    """
+
+    _events_schema = """
+        CREATE TABLE IF NOT EXISTS events (
+            event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            game_id TEXT NOT NULL,
+            created REAL NOT NULL,
+            data TEXT NOT NULL
+        )
+    """
+
+    def __init__(self, path, cache_size=1024):
+        """
+        :param path: str, путь к файлу базы данных
+        :param cache_size: int, максимальное количество игр в кэше воркера
+        """
+
+        self.path = path
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        connection = self._connection()
+        connection.execute(self._schema)
+        connection.execute(self._events_schema)
+        connection.commit()
+
+    def _connection(self):
+        """Возвращает соединение с базой данных для текущего потока"""
+        connection = getattr(self._local, "connection", None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+
+        return connection
+
+    @staticmethod
+    def _dump(game):
+        return pickle.dumps(game, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(data):
+        return pickle.loads(data)
+
+    def _cache_put(self, game_id, version, game):
+        with self._cache_lock:
+            self._cache[game_id] = (version, game)
+            self._cache.move_to_end(game_id)
+
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_get(self, game_id):
+        with self._cache_lock:
+            return self._cache.get(game_id)
+
+    def _cache_drop(self, game_id):
+        with self._cache_lock:
+            self._cache.pop(game_id, None)
+
+    def add(self, game):
+        game_id = str(game.game_id)
+        now = _now()
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO games (game_id, data, version, start_time, last_activity, is_on) "
+                "VALUES (?, ?, 1, ?, ?, ?)",
+                (game_id, self._dump(game), now, now, int(game.is_on)))
+
+        self._cache_put(game_id, 1, game)
+
+    def get(self, game_id):
+        game_id = str(game_id)
+        connection = self._connection()
+
+        row = connection.execute("SELECT version FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        if row is None:
+            self._cache_drop(game_id)
+            raise KeyError(game_id)
+
+        # Если в кэше воркера актуальная версия игры, то десериализация не нужна
+        cached = self._cache_get(game_id)
+        if cached is not None and cached[0] == row[0]:
+            return cached[1]
+
+        row = connection.execute("SELECT version, data FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        if row is None:
+            raise KeyError(game_id)
+
+        game = self._load(row[1])
+        self._cache_put(game_id, row[0], game)
+
+        return game
+
+    @contextmanager
+    def edit(self, game_id):
+        game_id = str(game_id)
+        connection = self._connection()
+
+        # Команда выполняется без блокировки базы данных, поэтому команды разных игр выполняются параллельно.
+        # Изменения сохраняются, только если версия записи не изменилась с момента чтения игры,
+        # иначе игру изменил другой воркер и команда должна быть выполнена заново над новой версией
+        row = connection.execute("SELECT version FROM games WHERE game_id = ?", (game_id,)).fetchone()
+        if row is None:
+            self._cache_drop(game_id)
+            raise KeyError(game_id)
+
+        version = row[0]
+        cached = self._cache_get(game_id)
+        if cached is not None and cached[0] == version:
+            game = cached[1]
+        else:
+            row = connection.execute("SELECT version, data FROM games WHERE game_id = ?", (game_id,)).fetchone()
+            if row is None:
+                self._cache_drop(game_id)
+                raise KeyError(game_id)
+
+            version = row[0]
+            game = self._load(row[1])
+            self._cache_put(game_id, version, game)
+
+        state_version = game.game_engine.state_version
+        is_on = game.is_on
+
+        try:
+            yield game
+        except BaseException:
+            # Игра в кэше могла быть частично изменена, при следующем обращении она загружается заново
+            self._cache_drop(game_id)
+            raise
+
+        # Команды, не изменившие игру, не перезаписывают ее сериализованное состояние
+        changed = game.game_engine.state_version != state_version or game.is_on != is_on
+        data = self._dump(game) if changed else None
+
+        with connection:
+            if changed:
+                cursor = connection.execute(
+                    "UPDATE games SET data = ?, version = ?, last_activity = ?, is_on = ? "
+                    "WHERE game_id = ? AND version = ?",
+                    (data, version + 1, _now(), int(game.is_on), game_id, version))
+            else:
+                cursor = connection.execute(
+                    "UPDATE games SET last_activity = ? WHERE game_id = ? AND version = ?",
+                    (_now(), game_id, version))
+
+        if cursor.rowcount == 0:
+            self._cache_drop(game_id)
+            raise SessionConflict(f"Игра с ID {game_id} была изменена или удалена другим воркером")
+
+        if changed:
+            self._cache_put(game_id, version + 1, game)
+
+    def delete(self, game_id):
+        game_id = str(game_id)
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM games WHERE game_id = ?", (game_id,))
+
+        self._cache_drop(game_id)
+
+    def delete_if_inactive(self, game_id, last_activity):
+        game_id = str(game_id)
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute("DELETE FROM games WHERE game_id = ? AND last_activity = ?",
+                                        (game_id, last_activity))
+
+        if cursor.rowcount == 0:
+            return False
+
+        self._cache_drop(game_id)
+        return True
+
+    def loaded_games(self):
+        with self._cache_lock:
+            return [game for _, game in self._cache.values()]
+
+    def get_meta(self, game_id):
+        row = self._connection().execute(
+            "SELECT start_time, last_activity, is_on FROM games WHERE game_id = ?", (str(game_id),)).fetchone()
+        if row is None:
+            return None
+
+        return {"start_time": row[0], "last_activity": row[1], "is_on": bool(row[2])}
+
+    def items_meta(self):
+        rows = self._connection().execute("SELECT game_id, start_time, last_activity, is_on FROM games").fetchall()
+
+        return [(row[0], {"start_time": row[1], "last_activity": row[2], "is_on": bool(row[3])}) for row in rows]
+
+    def append_events(self, game_id, events):
+        created = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO events (game_id, created, data) VALUES (?, ?, ?)",
+                [(str(game_id), created, json.dumps(event, ensure_ascii=False)) for event in events])
+
+    def read_events(self, after_event_id, game_ids):
+        game_ids = [str(game_id) for game_id in game_ids]
+        rows = self._connection().execute(
+            f"SELECT event_id, game_id, created, data FROM events "
+            f"WHERE event_id > ? AND game_id IN ({', '.join('?' * len(game_ids))}) ORDER BY event_id",
+            (after_event_id, *game_ids)).fetchall()
+
+        return [(row[0], row[1], row[2], json.loads(row[3])) for row in rows]
+
+    def last_event_id(self):
+        row = self._connection().execute("SELECT MAX(event_id) FROM events").fetchone()
+        return row[0] or 0
+
+    def delete_events_before(self, created):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM events WHERE created < ?", (created,))
+
+
+def create_session_store():
+    """
+    Создает хранилище игр в соответствии с переменными окружения:
+    SESSION_STORE - "memory" (по умолчанию) или "sqlite",
+    SESSION_STORE_PATH - путь к файлу базы данных SQLite,
+    SESSION_CACHE_SIZE - размер кэша игр воркера
+    """
+
+    store_type = os.getenv("SESSION_STORE", "memory")
+
+    if store_type == "memory":
+        return MemorySessionStore()
+    elif store_type == "sqlite":
+        path = os.getenv("SESSION_STORE_PATH", os.getcwd() + "/files/sessions.sqlite3")
+        return SqliteSessionStore(path, cache_size=int(os.getenv("SESSION_CACHE_SIZE", 1024)))
+    else:
+        raise ValueError(f"Неизвестный тип хранилища игр: {store_type}")
@@ -0,0 +1,86 @@
+class ActionMaps:
+    """
+    Карты досягаемости персонажей и угроз врагов для перечисления допустимых действий.
+    Ячейки поля задаются индексами (y - 1) * ширина + (x - 1), множества ячеек - битовыми масками.\n
+    Для персонажа хранятся ячейки, по которым он может стрелять, для врага - ячейки, из которых
+    его можно атаковать в ближнем бою и по которым он наносит ответный удар.
+    Карты персонажа пересчитываются при его перемещении, карты погибших удаляются.
+    Маска ячеек, в которые можно войти, сбрасывается при изменении занятости или защиты ячеек поля
+    """
+
+    __slots__ = ("width", "length", "reach", "threats", "_load_enterable", "_enterable")
+
+    def __init__(self, width, length, load_enterable):
+        """
+        :param width: int, ширина игрового поля
+        :param length: int, длина игрового поля
+        :param load_enterable: function, функция, возвращающая маску ячеек, в которые можно войти
+        """
+
+        self.width = width
+        self.length = length
+
+        # Тэг персонажа - (индекс ячейки, дальность атаки, маска стрельбы)
+        self.reach = {}
+        # Тэг врага - (индекс ячейки, маска соседних ячеек)
+        self.threats = {}
+
+        self._load_enterable = load_enterable
+        self._enterable = None
+
+    def invalidate(self):
+        """Сбрасывает маску ячеек, в которые можно войти"""
+        self._enterable = None
+
+    def get_enterable(self):
+        """Возвращает маску ячеек, в которые можно войти: свободные ячейки и ячейки с незащищенными сундуками"""
+        if self._enterable is None:
+            self._enterable = self._load_enterable()
+        return self._enterable
+
+    def get_square(self, index, radius):
+        """Возвращает маску ячеек на расстоянии не больше radius по Чебышеву от ячейки, включая ее саму"""
+
+        x = index % self.width
+        y = index // self.width
+        left = max(0, x - radius)
+        row = ((1 << (min(self.width - 1, x + radius) - left + 1)) - 1) << left
+
+        mask = 0
+        for line in range(max(0, y - radius), min(self.length - 1, y + radius) + 1):
+            mask |= row << (line * self.width)
+
+        return mask
+
+    def update_character(self, tag, index, attack_range):
+        """Пересчитывает карту досягаемости персонажа в ячейке index"""
+        entry = (index, attack_range, self.get_square(index, attack_range))
+        self.reach[tag] = entry
+        return entry
+
+    def get_reach(self, tag, index, attack_range):
+        """
+        Возвращает маску ячеек, по которым может стрелять персонаж. Карта пересчитывается, только если персонаж
+        переместился или его дальность атаки изменилась с последнего пересчета
+        """
+
+        entry = self.reach.get(tag)
+        if entry is None or entry[0] != index or entry[1] != attack_range:
+            entry = self.update_character(tag, index, attack_range)
+
+        return entry[2]
+
+    def get_threat(self, tag, index):
+        """Возвращает маску ячеек, соседних с врагом. Враги не перемещаются, поэтому карта строится один раз"""
+
+        entry = self.threats.get(tag)
+        if entry is None or entry[0] != index:
+            entry = (index, self.get_square(index, 1) & ~(1 << index))
+            self.threats[tag] = entry
+
+        return entry[1]
+
+    def remove(self, tag):
+        """Удаляет карты погибшего персонажа или врага"""
+        self.reach.pop(tag, None)
+        self.threats.pop(tag, None)
@@ -0,0 +1,531 @@
+import sys
+import json
+import random
+import argparse
+import importlib
+import multiprocessing
+from collections import Counter
+
+from .headless import HeadlessGame
+from .enemy_characters import Enemy
+
+
+# Оценка баланса игры методом Монте-Карло
+#
+# Оценщик играет большое число игр с заданными зернами генератора случайных чисел по сценарию - политике,
+# которая по состоянию игры выбирает следующую команду. Игры распределяются по процессам пачками зерен,
+# каждый процесс возвращает уже агрегированные распределения, поэтому объем данных между процессами
+# не зависит от числа игр. Результат не зависит от числа процессов: игра определяется своим зерном.
+#
+# Запуск: python -m src.balance --games 10000 --difficulty 1 2 3 --processes 8
+
+
+def _alive_enemies(engine):
+    return [item for item in engine.items_dict.values() if isinstance(item, Enemy)]
+
+
+def _free_cells_near(engine, target, radius=1):
+    """Возвращает свободные незащищенные ячейки на расстоянии не больше radius по Чебышеву от цели"""
+
+    cells = []
+    for y in range(max(1, target.y - radius), min(engine.get_length(), target.y + radius) + 1):
+        for x in range(max(1, target.x - radius), min(engine.get_width(), target.x + radius) + 1):
+            if engine.game_field[y - 1][x - 1].get_is_spot_free():
+                cells.append((x, y))
+
+    return cells
+
+
+def random_policy(game, rng):
+    """Политика, выполняющая случайные действия случайными персонажами"""
+
+    engine = game.game_engine
+    tag = rng.choice(engine.friendly_tags)
+    action = rng.choice(("attack", "shoot", "move", "fly", "use"))
+
+    if action == "use":
+        return f"{tag}.use({rng.choice(('health', 'energy'))})"
+
+    if action in ("attack", "shoot") and rng.random() < 0.5:
+        return f"{tag}.{action}({rng.choice(engine.field_tags)})"
+
+    return f"{tag}.{action}({rng.randint(1, engine.get_width())}, {rng.randint(1, engine.get_length())})"
+
+
+def _attack_options(character, enemy, x, y):
+    """
+    Возвращает варианты боя персонажа из ячейки (x, y) с врагом: (действие, урон врагу, ответный урон персонажу).
+    Воин не стреляет: его атака в дальнем бою равна нулю
+    """
+
+    distance = max(abs(enemy.x - x), abs(enemy.y - y))
+    options = []
+
+    if distance <= 1 and character.cca > 0:
+        options.append(("attack", character.cca, enemy.cca))
+    if distance <= character.range and character.rca > 0:
+        options.append(("shoot", character.rca, enemy.rca))
+
+    return options
+
+
+def greedy_policy(game, rng):
+    """
+    Политика, нацеленная на босса: игра выигрывается, когда босс повержен.
+    Персонажи атакуют босса вблизи и издалека, если переживут ответный удар, забирают доступные сундуки
+    и подходят на расстояние атаки к боссу. Остальных врагов, защищающих ячейки поля, персонажи атакуют,
+    когда до босса не добраться. Удар, убивающий босса, и удары по боссу, когда безопасных ходов не остается,
+    наносятся даже ценой жизни персонажа, если в игре есть другие персонажи.
+    Эликсиры используются, когда здоровье персонажа опускается ниже половины или когда персонажам
+    не хватает энергии
+    """
+
+    engine = game.game_engine
+    characters = [engine.items_dict[tag] for tag in engine.friendly_tags]
+    enemies = _alive_enemies(engine)
+    boss = engine.items_dict.get("b")
+    potions = engine.inventory.get_counts()
+
+    # Атаки, после которых персонаж остается в живых, и атаки босса ценой жизни персонажа.
+    # Сначала атаки, убивающие врага, затем по наибольшей доле снятого здоровья и наименьшему ответному удару
+    boss_attacks = []
+    attacks = []
+    sacrifices = []
+    for character in characters:
+        if character.aec > character.energy:
+            continue
+
+        for enemy in enemies:
+            for action, damage, counter in _attack_options(character, enemy, character.x, character.y):
+                attack = (damage < enemy.health, -damage / enemy.health, counter,
+                          f"{character.get_tag()}.{action}({enemy.get_tag()})")
+                if counter < character.health:
+                    (boss_attacks if enemy is boss else attacks).append(attack)
+                elif enemy is boss and len(characters) > 1:
+                    sacrifices.append(attack)
+
+    # Удар, убивающий босса, завершает игру победой
+    finishing = [attack for attack in boss_attacks + sacrifices if not attack[0]]
+    if finishing:
+        return min(finishing)[-1]
+
+    if boss_attacks:
+        return min(boss_attacks)[-1]
+
+    wounded = [character for character in characters if character.health * 2 < character.default_health *
+               character.default_health_multiplier]
+    if wounded and potions.get("HealthPotion", 0) > 0:
+        return f"{wounded[0].get_tag()}.use(health)"
+
+    # Перемещения к незащищенным сундукам и в ячейки, из которых персонаж может атаковать врага.
+    # Из нескольких перемещений выбирается самое дешевое по энергии
+    chests = [(x + 1, y + 1) for y, row in enumerate(engine.game_field) for x, spot in enumerate(row)
+              if spot.request_occupation_tag() == "t" and not spot.get_spot_is_protected()]
+    radius = max(max(1, character.range) for character in characters)
+    targets = [(enemy, _free_cells_near(engine, enemy, radius)) for enemy in enemies]
+
+    chest_moves = []
+    boss_moves = []
+    enemy_moves = []
+    sacrifice_moves = []
+    for character in characters:
+        tag = character.get_tag()
+
+        for x, y in chests:
+            cost = (abs(character.x - x) + abs(character.y - y)) * character.mec
+            if 0 < cost <= character.energy:
+                chest_moves.append((cost, rng.random(), f"{tag}.move({x}, {y})"))
+
+        for enemy, cells in targets:
+            for x, y in cells:
+                cost = (abs(character.x - x) + abs(character.y - y)) * character.mec
+                if cost == 0 or cost + character.aec > character.energy:
+                    continue
+
+                counters = [counter for action, damage, counter in _attack_options(character, enemy, x, y)]
+                if not counters:
+                    continue
+
+                move = (cost, rng.random(), f"{tag}.move({x}, {y})")
+                if min(counters) < character.health:
+                    (boss_moves if enemy is boss else enemy_moves).append(move)
+                elif enemy is boss and len(characters) > 1:
+                    sacrifice_moves.append(move)
+
+    # Остальные враги атакуются, только если к сундукам и боссу подойти нельзя:
+    # их гибель снимает защиту ячеек и открывает путь к боссу
+    for candidates in (chest_moves, boss_moves, attacks, enemy_moves, sacrifices, sacrifice_moves):
+        if candidates:
+            return min(candidates)[-1]
+
+    # Если ни один персонаж не может действовать, восстанавливаем энергию
+    if potions.get("EnergyPotion", 0) > 0:
+        return f"{min(characters, key=lambda item: item.energy).get_tag()}.use(energy)"
+
+    return None
+
+
+# Встроенные политики по названию. Другие политики передаются в виде "модуль:функция"
+policies = {
+    "random": random_policy,
+    "greedy": greedy_policy
+}
+
+
+def load_policy(name):
+    """
+    Возвращает функцию политики по названию\n
+    :param name: str, название встроенной политики или путь "модуль:функция".
+    Функция политики принимает HeadlessGame и random.Random и возвращает команду или None, если ходов нет
+    """
+
+    if name in policies:
+        return policies[name]
+
+    module_name, _, function_name = name.partition(":")
+    if not function_name:
+        raise ValueError(f"Неизвестная политика \"{name}\"")
+
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+class Distribution:
+    """Распределение целочисленной величины. Хранит количество каждого значения, поэтому объединяется без потерь"""
+
+    __slots__ = ("values",)
+
+    def __init__(self):
+        self.values = Counter()
+
+    def add(self, value):
+        self.values[value] += 1
+
+    def merge(self, other):
+        self.values.update(other.values)
+
+    def count(self):
+        return sum(self.values.values())
+
+    def mean(self):
+        count = self.count()
+        return sum(value * number for value, number in self.values.items()) / count if count else 0
+
+    def percentiles(self, levels=(5, 25, 50, 75, 95)):
+        """Возвращает словарь процентилей распределения по методу ближайшего ранга"""
+
+        count = self.count()
+        if count == 0:
+            return {level: None for level in levels}
+
+        result = {}
+        ranks = sorted((max(1, -(-level * count // 100)), level) for level in levels)
+        seen = 0
+        items = iter(sorted(self.values.items()))
+        value, number = next(items)
+
+        for rank, level in ranks:
+            while seen + number < rank:
+                seen += number
+                value, number = next(items)
+            result[level] = value
+
+        return {level: result[level] for level in levels}
+
+    def histogram(self, bins=10):
+        """Возвращает список интервалов гистограммы (начало, конец, количество), конец интервала не включается"""
+
+        if not self.values:
+            return []
+
+        low = min(self.values)
+        high = max(self.values) + 1
+        width = max(1, -(-(high - low) // bins))
+
+        counts = [0] * (-(-(high - low) // width))
+        for value, number in self.values.items():
+            counts[(value - low) // width] += number
+
+        return [(low + index * width, low + (index + 1) * width, number) for index, number in enumerate(counts)]
+
+    def summary(self, bins=10):
+        return {
+            "count": self.count(),
+            "mean": round(self.mean(), 2),
+            "percentiles": self.percentiles(),
+            "histogram": self.histogram(bins)
+        }
+
+
+class DifficultyStats:
+    """Результаты игр одного уровня сложности"""
+
+    __slots__ = ("outcomes", "score", "actions", "commands", "survivors")
+
+    def __init__(self):
+        # Количество игр по исходу: "success", "failure", "stuck", если политика не нашла хода,
+        # или "limit", если игра не завершилась за максимальное число команд
+        self.outcomes = Counter()
+        self.score = Distribution()
+        self.actions = Distribution()
+        self.commands = Distribution()
+        self.survivors = Distribution()
+
+    def merge(self, other):
+        self.outcomes.update(other.outcomes)
+        for name in ("score", "actions", "commands", "survivors"):
+            getattr(self, name).merge(getattr(other, name))
+
+    def summary(self, bins=10):
+        games = sum(self.outcomes.values())
+        return {
+            "games": games,
+            "win_rate": round(self.outcomes["success"] / games, 4) if games else 0,
+            "outcomes": dict(self.outcomes),
+            "score": self.score.summary(bins),
+            "actions": self.actions.summary(bins),
+            "commands": self.commands.summary(bins),
+            "survivors": self.survivors.summary(bins)
+        }
+
+
+class EnemyStats:
+    """Результаты врагов одной расы и класса"""
+
+    __slots__ = ("count", "killed", "health", "damage_dealt")
+
+    def __init__(self):
+        self.count = 0
+        self.killed = 0
+        # Начальное здоровье врага и урон, нанесенный им персонажам игрока за игру
+        self.health = Distribution()
+        self.damage_dealt = Distribution()
+
+    def merge(self, other):
+        self.count += other.count
+        self.killed += other.killed
+        self.health.merge(other.health)
+        self.damage_dealt.merge(other.damage_dealt)
+
+    def summary(self, bins=10):
+        return {
+            "count": self.count,
+            "kill_rate": round(self.killed / self.count, 4) if self.count else 0,
+            "health": self.health.summary(bins),
+            "damage_dealt": self.damage_dealt.summary(bins)
+        }
+
+
+class BalanceReport:
+    """Агрегированные результаты игр по уровням сложности и по расам и классам врагов"""
+
+    def __init__(self):
+        self.difficulties = {}
+        self.enemies = {}
+
+    def merge(self, other):
+        for difficulty, stats in other.difficulties.items():
+            self.difficulties.setdefault(difficulty, DifficultyStats()).merge(stats)
+
+        for key, stats in other.enemies.items():
+            self.enemies.setdefault(key, EnemyStats()).merge(stats)
+
+        return self
+
+    def add_game(self, difficulty, record):
+        stats = self.difficulties.setdefault(difficulty, DifficultyStats())
+        stats.outcomes[record["outcome"]] += 1
+        stats.score.add(record["score"])
+        stats.actions.add(record["actions"])
+        stats.commands.add(record["commands"])
+        stats.survivors.add(record["survivors"])
+
+        for key, health, killed, damage in record["enemies"]:
+            enemy_stats = self.enemies.setdefault((difficulty, key), EnemyStats())
+            enemy_stats.count += 1
+            enemy_stats.killed += killed
+            enemy_stats.health.add(health)
+            enemy_stats.damage_dealt.add(damage)
+
+    def summary(self, bins=10):
+        return {
+            "difficulties": {difficulty: self.difficulties[difficulty].summary(bins)
+                             for difficulty in sorted(self.difficulties)},
+            "enemies": {f"{difficulty}:{key}": self.enemies[difficulty, key].summary(bins)
+                        for difficulty, key in sorted(self.enemies)}
+        }
+
+
+def enemy_kind(enemy):
+    """Возвращает ключ статистики врага: раса или раса и класс через "/" """
+    return enemy.race if enemy.enemy_class is None else f"{enemy.race}/{enemy.enemy_class}"
+
+
+def play_game(seed, difficulty, policy, max_commands=500):
+    """
+    Играет одну игру по политике\n
+    :param seed: int, зерно генератора случайных чисел игры
+    :param difficulty: int, уровень сложности
+    :param policy: function, политика, см. load_policy
+    :param max_commands: int, максимальное число команд, после которого игра завершается досрочно
+    :return: dict, исход игры, итоговый счет, число действий и команд, выживших персонажей и результаты врагов
+    """
+
+    game = HeadlessGame(seed=seed, difficulty=difficulty).start()
+    engine = game.game_engine
+    # Политика получает собственный генератор, чтобы ее случайные решения не влияли на случайные события игры
+    policy_rng = random.Random(seed ^ 0x5EED)
+
+    enemies = {enemy.get_tag(): enemy for enemy in _alive_enemies(engine)}
+    initial_health = {tag: enemy.health for tag, enemy in enemies.items()}
+    damage_dealt = dict.fromkeys(enemies, 0)
+
+    outcome = "limit"
+    commands = 0
+
+    while engine.is_game_on and commands < max_commands:
+        command = policy(game, policy_rng)
+        if command is None:
+            outcome = "stuck"
+            break
+
+        result = game.perform(command)
+        commands += 1
+
+        # Урон персонажу в событиях боя следует за уроном врагу, с которым идет бой
+        attacker = None
+        for event in result["events"]:
+            if event["type"] == "damage":
+                if event["tag"] in damage_dealt:
+                    attacker = event["tag"]
+                elif attacker is not None:
+                    damage_dealt[attacker] += event["value"]
+            elif event["type"] == "game_end":
+                outcome = event["status"]
+
+    if engine.is_game_on:
+        engine.end_game()
+
+    return {
+        "outcome": outcome,
+        "score": engine.score,
+        "actions": len(engine.get_player_actions()),
+        "commands": commands,
+        "survivors": len(engine.friendly_tags),
+        "enemies": [(enemy_kind(enemy), initial_health[tag], tag not in engine.items_dict, damage_dealt[tag])
+                    for tag, enemy in enemies.items()]
+    }
+
+
+def _evaluate_chunk(task):
+    """Играет пачку игр и возвращает их агрегированные результаты. Выполняется в процессах пула"""
+
+    policy_name, difficulty, seeds, max_commands = task
+    policy = load_policy(policy_name)
+
+    report = BalanceReport()
+    for seed in seeds:
+        report.add_game(difficulty, play_game(seed, difficulty, policy, max_commands))
+
+    return report
+
+
+def evaluate(games, difficulties=(1,), policy="greedy", seed=0, processes=None, chunk_size=250, max_commands=500):
+    """
+    Оценивает баланс игры на нескольких уровнях сложности\n
+    :param games: int, число игр для каждого уровня сложности
+    :param difficulties: [int], уровни сложности
+    :param policy: str, название политики, см. load_policy. Передается по имени, чтобы процессы загружали ее сами
+    :param seed: int, зерно первой игры. Игры уровня сложности используют зерна seed, seed + 1, ...
+    :param processes: int, число процессов. None - по числу ядер, 1 - без пула процессов
+    :param chunk_size: int, число игр в одной пачке, отправляемой процессу
+    :param max_commands: int, максимальное число команд в игре
+    :return: BalanceReport
+    """
+
+    load_policy(policy)
+
+    tasks = [(policy, difficulty, range(start, min(start + chunk_size, seed + games)), max_commands)
+             for difficulty in difficulties
+             for start in range(seed, seed + games, chunk_size)]
+
+    report = BalanceReport()
+
+    if processes == 1:
+        for task in tasks:
+            report.merge(_evaluate_chunk(task))
+        return report
+
+    with multiprocessing.Pool(processes) as pool:
+        for chunk_report in pool.imap_unordered(_evaluate_chunk, tasks):
+            report.merge(chunk_report)
+
+    return report
+
+
+def _format_distribution(name, summary, bar_width=40):
+    percentiles = ", ".join(f"p{level} {value}" for level, value in summary["percentiles"].items())
+    lines = [f"  {name}: среднее {summary['mean']}, {percentiles}"]
+
+    largest = max((number for start, end, number in summary["histogram"]), default=0)
+    for start, end, number in summary["histogram"]:
+        bar = "#" * round(bar_width * number / largest) if largest else ""
+        lines.append(f"    [{start:>6}, {end:>6}) {number:>8} {bar}")
+
+    return lines
+
+
+def format_report(summary):
+    """Возвращает текстовое представление результатов оценки баланса"""
+
+    lines = []
+
+    for difficulty, stats in summary["difficulties"].items():
+        outcomes = ", ".join(f"{outcome} {number}" for outcome, number in sorted(stats["outcomes"].items()))
+        lines.append(f"Сложность {difficulty}: игр {stats['games']}, доля побед {stats['win_rate']} ({outcomes})")
+        lines += _format_distribution("счет", stats["score"])
+        lines += _format_distribution("действия", stats["actions"])
+        lines += _format_distribution("выжившие персонажи", stats["survivors"])
+        lines.append("")
+
+    lines.append("Враги (сложность:раса/класс):")
+    for key, stats in summary["enemies"].items():
+        health = stats["health"]["percentiles"]
+        damage = stats["damage_dealt"]["percentiles"]
+        lines.append(f"  {key}: врагов {stats['count']}, доля убитых {stats['kill_rate']}, "
+                     f"здоровье p50 {health[50]}, урон персонажам p50 {damage[50]} p95 {damage[95]}")
+
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.balance",
+                                     description="Оценка баланса игры методом Монте-Карло")
+    parser.add_argument("--games", type=int, default=1000, help="число игр на каждый уровень сложности")
+    parser.add_argument("--difficulty", type=int, nargs="+", default=[1], help="уровни сложности")
+    parser.add_argument("--policy", default="greedy",
+                        help="политика: " + ", ".join(policies) + " или модуль:функция")
+    parser.add_argument("--seed", type=int, default=0, help="зерно первой игры")
+    parser.add_argument("--processes", type=int, default=None, help="число процессов, по умолчанию по числу ядер")
+    parser.add_argument("--chunk-size", type=int, default=250, help="число игр в пачке для одного процесса")
+    parser.add_argument("--max-commands", type=int, default=500, help="максимальное число команд в игре")
+    parser.add_argument("--bins", type=int, default=10, help="число интервалов гистограмм")
+    parser.add_argument("--json", action="store_true", help="вывести результаты в формате JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        load_policy(args.policy)
+    except (ValueError, ImportError, AttributeError) as err:
+        parser.error(f"политика не найдена: {err}")
+
+    report = evaluate(args.games, args.difficulty, args.policy, args.seed, args.processes,
+                      args.chunk_size, args.max_commands)
+    summary = report.summary(args.bins)
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(summary))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,10 @@ class GameItem:
     """
     Класс для игровых объектов, размещающихся на поле
     """
+
+    # Игровые объекты создаются в каждой игре, поэтому хранят атрибуты в слотах, а не в словаре экземпляра
+    __slots__ = ("x", "y")
+
     def __init__(self, x_coord, y_coord):
         self.x = x_coord
         self.y = y_coord
@@ -22,14 +26,17 @@ class SuperMovable:
     От него наследуются другие базовые классы
     """
 
+    __slots__ = ()
+
     def super_move(self, x, y, energy_cost, result):
         """
         Метод для перемещения объектов по полю\n
         :param x: int, координата x ячейки назначения
         :param y: int, координата y ячейки назначения
         :param energy_cost: int, количество энергии, необходимое для перемещения персонажа
-        :param result: str, начальная строка, продолжая которую, формируется результат, который выводится игроку
-        :return: str, строка, которая выводится игроку
+        :param result: str, начальная строка, продолжая которую, формируется результат, который выводится игроку.
+        В тихом режиме игрового движка - True
+        :return: str, строка, которая выводится игроку, или True в тихом режиме
         """
 
         # Для перемещения по полю, объекту необходимо взаимодействовать с игровым полем
@@ -48,29 +55,39 @@ class SuperMovable:
         # Проверяем занятость ячейки другими объектами
         if game_spot.get_spot_is_occupied():
             if game_spot.request_occupation_tag() != "t":
+                if self.game_engine.quiet:
+                    raise GameError("Невозможно переместиться на ячейку, в ней уже находится другой объект.")
                 raise GameError("Невозможно переместиться на ячейку, в ней уже находится другой объект.\n"
                                 f"{game_spot.get_spot_owner().info()}")
 
             # Если в ячейке незащищенный сундук с сокровищами, то его можно открыть. 't' - тэг сундука с сокровищами
             elif game_spot.request_occupation_tag() == "t" and not game_spot.get_spot_is_protected():
                 chest = game_spot.get_spot_owner()
-                treasure = chest.open()
+                treasure = chest.open(self.game_engine.get_rng())
+                self.game_engine.emit_event("chest_opened", tag=self.get_tag(), x=x, y=y, treasure=treasure.name)
 
                 # За добычу сокровища игроку начисляются игровые очки
                 self.game_engine.add_score(self.game_engine.scores["chest"])
 
-                result += "\nВ ячейке находится сундук. Открываем сундук..."
-                result += f"\nВ сундуке {treasure.name}!"
+                # В тихом режиме описание результата не формируется
+                quiet = self.game_engine.quiet
+                if not quiet:
+                    result += "\nВ ячейке находится сундук. Открываем сундук..."
+                    result += f"\nВ сундуке {treasure.name}!"
 
                 if "эликсир" in treasure.name.lower():
                     # Найденные эликсиры сохраняются в рюкзаке игрока и могут быть использованы позднее
-                    result += f"\n{self.game_engine.inventory.add_item(treasure)}"
+                    added = self.game_engine.inventory.add_item(treasure)
+                    if not quiet:
+                        result += f"\n{added}"
                 else:
                     # Найденные предметы предназначены для определенного класса
                     # Если персонаж данного класса присутствует на поле,
                     # то предмет сразу используется, изменяя характеристики персонажа
                     if treasure.character_class.lower()[0] in self.game_engine.friendly_tags:
-                        result += f"\n{treasure.use(self.game_engine.items_dict[treasure.character_class.lower()[0]])}"
+                        used = treasure.use(self.game_engine.items_dict[treasure.character_class.lower()[0]])
+                        if not quiet:
+                            result += f"\n{used}"
 
                 # Освобождаем ячейку
                 game_spot.set_spot_owner(None)
@@ -82,6 +99,9 @@ class SuperMovable:
 
             # В ячейки, защищенные врагами перемещение невозможно
             elif game_spot.request_occupation_tag() == "t" and game_spot.get_spot_is_protected():
+                if self.game_engine.quiet:
+                    raise GameError("Ячейка защищена врагами! В ячейке находится сундук с сокровищем.")
+
                 result = "Ячейка защищена врагами! В ячейке находится сундук с сокровищем.\nВраги:"
                 for enemy in self.game_engine.game_field[x-1][y-1].get_spot_protectors():
                     result += f"\n* {enemy.info()}"
@@ -89,6 +109,9 @@ class SuperMovable:
                 raise GameError(result)
 
         elif game_spot.get_spot_is_protected():
+            if self.game_engine.quiet:
+                raise GameError("Ячейка защищена врагами!")
+
             result = "Ячейка защищена врагами!\nВраги:"
             for enemy in self.game_engine.game_field[x - 1][y - 1].get_spot_protectors():
                 result += f"* {enemy.info()}"
@@ -108,9 +131,12 @@ class SuperMovable:
         """
         game_spot.set_spot_owner(self)
         self.game_engine.game_field[self.y - 1][self.x - 1].set_spot_owner(None)
+        self.game_engine.emit_event("move", tag=self.get_tag(), x_from=self.x, y_from=self.y, x=x, y=y)
         self.x = x
         self.y = y
-        self.energy = self.energy - energy_cost
+        with self.game_engine.update_features(self):
+            self.energy = self.energy - energy_cost
+        self.game_engine.update_action_maps(self)
 
 
 class Movable(SuperMovable):
@@ -118,6 +144,8 @@ class Movable(SuperMovable):
     Класс для игровых объектов, способных перемещаться по игровому полю. От него наследуются классы игровых персонажей
     """
 
+    __slots__ = ()
+
     def move(self, x, y):
         """
         Метод для перемещения игровых персонажей
@@ -130,13 +158,29 @@ class Movable(SuperMovable):
         # Увы, игровые персонажи не самые умные ребята!
         total_distance = abs(self.x - x) + abs(self.y - y)
 
+        # В режиме перемещения по пути персонаж обходит занятые и защищенные ячейки,
+        # энергия расходуется на каждый шаг кратчайшего пути
+        if self.game_engine.movement_mode == "path" and self.game_engine.get_width() >= x > 0 \
+                and self.game_engine.get_length() >= y > 0:
+            path = self.game_engine.find_path(self.x, self.y, x, y)
+            game_spot = self.game_engine.game_field[y - 1][x - 1]
+
+            if path is not None:
+                total_distance = len(path) - 1
+            # Для занятых и защищенных ячеек ошибку перемещения сообщает super_move
+            elif game_spot.get_is_spot_free() or \
+                    (game_spot.request_occupation_tag() == "t" and not game_spot.get_spot_is_protected()):
+                raise GameError("Невозможно переместиться на ячейку, к ней нет свободного пути.")
+
         # mec - характеристика персонажей, movement energy cost, расход энергии на единицу пройденного расстояния
         energy_cost = total_distance * self.mec
 
         if energy_cost > self.energy:
             raise GameError("Не хватает энергии на преодоление дистанции до указанной клетки.")
         else:
-            if self.name == "Фея":
+            if self.game_engine.quiet:
+                result = True
+            elif self.name == "Фея":
                 result = f"{self.name} переместилась в ячейку ({x}, {y})."
             else:
                 result = f"{self.name} переместился в ячейку ({x}, {y})."
@@ -149,6 +193,8 @@ class Flyable(SuperMovable):
     Класс для игровых объектов, способных летать по игровому полю. От него наследуются классы игровых персонажей
     """
 
+    __slots__ = ()
+
     default_energy_cost = 5
 
     def fly(self, x, y):
@@ -163,5 +209,5 @@ class Flyable(SuperMovable):
             raise GameError("Не хватает энергии на преодоление дистанции до указанной клетки.")
         else:
             # Так как использовать метод планируется только для феи, то вывод только для женского пола
-            result = f"{self.name} перелетела в ячейку ({x}, {y})."
+            result = True if self.game_engine.quiet else f"{self.name} перелетела в ячейку ({x}, {y})."
             return SuperMovable.super_move(self, x, y, self.default_energy_cost, result)
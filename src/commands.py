@@ -0,0 +1,125 @@
+import re
+import functools
+
+from .errors import GameError
+
+
+# Грамматика команд игрока:
+#
+#   команда   := имя [ "." имя ] [ "(" [ аргумент { "," аргумент } ] ")" ]
+#   аргумент  := имя | число
+#
+# Команда без точки - служебная команда игры (help, print_field, end_game, repeat, hint, info, actions),
+# команда с точкой - действие персонажа с переданным тэгом, например w.move(3, 4)
+
+_token_pattern = re.compile(r"\s*(?:(?P<number>\d+)|(?P<name>[^\W\d]\w*)|(?P<symbol>[.(),]))")
+
+# Служебные команды, которые не принимают аргументов
+_simple_commands = ("help", "print_field", "end_game", "repeat", "hint")
+
+
+class Command:
+    """
+    Разобранная команда игрока\n
+    kind - вид команды: "help", "print_field", "end_game", "repeat", "hint", "info", "actions" или "action",
+    tag - тэг персонажа для действий, action - название действия,
+    args - кортеж аргументов в виде строк
+    """
+
+    __slots__ = ("kind", "tag", "action", "args")
+
+    def __init__(self, kind, tag=None, action=None, args=()):
+        self.kind = kind
+        self.tag = tag
+        self.action = action
+        self.args = args
+
+    def __repr__(self):
+        return f"Command({self.kind!r}, tag={self.tag!r}, action={self.action!r}, args={self.args!r})"
+
+
+def _syntax_error(text, position, expected):
+    found = f"\"{text[position]}\"" if position < len(text.rstrip()) else "конец команды"
+    return GameError(f"Введенная команда не корректна: ожидалось: {expected}, "
+                     f"найдено {found} (позиция {position + 1}). Попробуйте изменить запрос.")
+
+
+def _tokenize(text):
+    """Разбивает команду на лексемы. Возвращает список троек (вид, значение, позиция)"""
+
+    tokens = []
+    position = 0
+    text_length = len(text.rstrip())
+
+    while position < text_length:
+        match = _token_pattern.match(text, position)
+        if match is None:
+            start = len(text) - len(text[position:].lstrip())
+            raise GameError(f"Введенная команда не корректна: недопустимый символ \"{text[start]}\" "
+                            f"(позиция {start + 1}). Попробуйте изменить запрос.")
+
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.start(kind)))
+        position = match.end()
+
+    tokens.append(("end", None, text_length))
+    return tokens
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_command(text):
+    """
+    Разбирает команду игрока. Результаты разбора кэшируются, поэтому Command не должен изменяться\n
+    :param text: str, команда в нижнем регистре
+    :return: Command, разобранная команда
+    """
+
+    tokens = _tokenize(text)
+    index = 0
+
+    def expect(kinds, expected):
+        nonlocal index
+        kind, value, position = tokens[index]
+        if kind not in kinds:
+            raise _syntax_error(text, position, expected)
+        index += 1
+        return value
+
+    def accept(symbol):
+        nonlocal index
+        if tokens[index][1] == symbol:
+            index += 1
+            return True
+        return False
+
+    name = expect(("name",), "название команды или тэг персонажа")
+    action = expect(("name",), "название действия") if accept(".") else None
+
+    args = None
+    if accept("("):
+        args = []
+        if not accept(")"):
+            args.append(expect(("name", "number"), "аргумент"))
+            while accept(","):
+                args.append(expect(("name", "number"), "аргумент"))
+            if not accept(")"):
+                raise _syntax_error(text, tokens[index][2], "\",\" или \")\"")
+
+    expect(("end",), "конец команды")
+
+    if action is not None:
+        if args is None:
+            raise _syntax_error(text, tokens[index - 1][2], "\"(\"")
+        return Command("action", tag=name, action=action, args=tuple(args))
+
+    if name in _simple_commands:
+        if args:
+            raise GameError(f"Команда \"{name}\" не принимает аргументов.")
+        return Command(name)
+
+    if name in ("info", "actions"):
+        if args is None:
+            raise _syntax_error(text, tokens[index - 1][2], "\"(\"")
+        return Command(name, args=tuple(args))
+
+    raise GameError("Введенная команда не корректна. Попробуйте изменить запрос.")
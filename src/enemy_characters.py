@@ -1,15 +1,23 @@
 import random
+import functools
 
-from . helpers import get_random_list_element, en_ru_features_dict
+from . helpers import en_ru_features_dict, iter_bits
 from . base_classes import GameItem
 
+# NumPy необязателен: без него пакетная генерация характеристик врагов выполняется в цикле
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Enemy(GameItem):
     """
     Класс враждебных персонажей
     """
 
-    enemies_count = 0
+    __slots__ = ("id", "is_boss", "game_engine", "protected_mask", "race", "enemy_class",
+                 "health", "rca", "cca", "name")
 
     # Значения характеристик по умолчанию
     default_health = 100
@@ -93,60 +101,65 @@ class Enemy(GameItem):
         # Устанавливаем расположение объекта
         GameItem.__init__(self, x, y)
 
-        # Генерируем id
-        self.id = self.enemies_count + 1
-
-        Enemy.enemies_count += 1
+        # Генерируем id, id врагов уникальны в пределах игры
+        self.id = game_engine.next_enemy_id()
 
         self.is_boss = is_boss
 
         self.game_engine = game_engine
-        self.protected_spots = []
-
-        # Генерируем коэффициент, на основании котовых будут изменятся изначальные характеристики врагов
-        # Характеристика является значением по умолчанию, помноженным на случайный коэффициент,
-        # а также мультипликаторы класса и расы врага
-        random_coefficients = [random.randint(90, 100) / 100,
-                               random.randint(90, 100) / 100,
-                               random.randint(90, 100) / 100]
-
-        # У врага три характеристики: здоровье (health), атака в ближнем бою (cca) и атака в дальнем бою (rca)
-
-        if is_boss:
-            enemy_race = get_random_list_element(list(self.boss_enemy_races.keys()))
-            self.health = int(self.default_health * self.boss_enemy_races[enemy_race]["health_multiplier"] *
-                              difficulty_level * random_coefficients[0])
-            self.rca = int(self.default_health * self.boss_enemy_races[enemy_race]["rca_multiplier"] *
-                           difficulty_level * random_coefficients[1])
-            self.cca = int(self.default_health * self.boss_enemy_races[enemy_race]["cca_multiplier"] *
-                           difficulty_level * random_coefficients[2])
-            self.name = self.boss_enemy_races[enemy_race]["name_ru"]
+        # Битовая маска индексов ячеек, которые защищает враг
+        self.protected_mask = 0
 
-        else:
-            enemy_race = get_random_list_element(list(self.enemy_races.keys()))
-
-            if self.enemy_races[enemy_race]["has_class"]:
-                enemy_class = get_random_list_element(list(self.enemy_classes.keys()))
-                self.health = int(self.default_health * self.enemy_races[enemy_race]["health_multiplier"] *
-                                  self.enemy_classes[enemy_class]["health_multiplier"] *
-                                  difficulty_level * random_coefficients[0])
-                self.rca = int(self.default_health * self.enemy_races[enemy_race]["rca_multiplier"] *
-                               self.enemy_classes[enemy_class]["rca_multiplier"] *
-                               difficulty_level * random_coefficients[1])
-                self.cca = int(self.default_health * self.enemy_races[enemy_race]["cca_multiplier"] *
-                               self.enemy_classes[enemy_class]["cca_multiplier"] *
-                               difficulty_level * random_coefficients[2])
-                self.name = self.enemy_races[enemy_race]["name_ru"] + " " + self.enemy_classes[enemy_class]["name_ru"]
-
-            # Если у расы врага не может быть класса
-            else:
-                self.health = int(self.default_health * self.enemy_races[enemy_race]["health_multiplier"] *
-                                  difficulty_level * random_coefficients[0])
-                self.rca = int(self.default_health * self.enemy_races[enemy_race]["rca_multiplier"] *
-                               difficulty_level * random_coefficients[1])
-                self.cca = int(self.default_health * self.enemy_races[enemy_race]["cca_multiplier"] *
-                               difficulty_level * random_coefficients[2])
-                self.name = self.enemy_races[enemy_race]["name_ru"]
+        # Характеристики врага - здоровье (health), атака в ближнем бою (cca) и атака в дальнем бою (rca) -
+        # берутся из таблицы характеристик рас и классов и умножаются на случайные коэффициенты, см. roll_enemy_stats.
+        # Раса и класс врага сохраняются для сериализации игры и статистики
+        self.race, self.enemy_class, self.name, self.health, self.rca, self.cca = \
+            roll_enemy_stats(game_engine.get_rng(), difficulty_level, is_boss)
+
+    @classmethod
+    def create_batch(cls, game_engine, difficulty_level, positions, is_boss=False, rng=None):
+        """
+        Создает врагов в переданных позициях, генерируя их характеристики одним пакетом\n
+        :param game_engine: GameEngine, объект игрового движка
+        :param difficulty_level: int, установленный уровень сложности игры
+        :param positions: [[int, int]], координаты (x, y) врагов
+        :param is_boss: bool, True если враги являются боссами
+        :param rng: генератор случайных чисел, см. roll_enemy_stats_batch. По умолчанию - генератор игры
+        :return: [Enemy], враги в порядке переданных позиций
+        """
+
+        stats = roll_enemy_stats_batch(len(positions), difficulty_level, is_boss,
+                                       game_engine.get_rng() if rng is None else rng)
+
+        return [cls.restore(game_engine, game_engine.next_enemy_id(), is_boss, race, enemy_class, x, y, health, rca, cca)
+                for (x, y), (race, enemy_class, name, health, rca, cca) in zip(positions, stats)]
+
+    @classmethod
+    def restore(cls, game_engine, enemy_id, is_boss, race, enemy_class, x, y, health, rca, cca):
+        """
+        Создает врага с заданными характеристиками без случайной генерации.
+        Используется при восстановлении игры из сохраненного состояния
+        """
+
+        enemy = cls.__new__(cls)
+        GameItem.__init__(enemy, x, y)
+
+        enemy.id = enemy_id
+        enemy.is_boss = is_boss
+        enemy.game_engine = game_engine
+        enemy.protected_mask = 0
+        enemy.race = race
+        enemy.enemy_class = enemy_class
+        enemy.health = health
+        enemy.rca = rca
+        enemy.cca = cca
+
+        races = cls.boss_enemy_races if is_boss else cls.enemy_races
+        enemy.name = races[race]["name_ru"]
+        if enemy_class is not None:
+            enemy.name += " " + cls.enemy_classes[enemy_class]["name_ru"]
+
+        return enemy
 
     def get_tag(self):
         """Возвращает тэг объекта"""
@@ -174,11 +187,14 @@ class Enemy(GameItem):
     def _die(self):
         """Метод для умерщвления объекта и очистки данных, где он присутствует"""
         self.game_engine.game_field[self.y - 1][self.x - 1].set_spot_owner(None)
-        for spot in self.protected_spots:
-            spot.loose_spot_protection(self.id)
+        self.game_engine.toggle_fingerprint_features(self)
+        self.game_engine.release_protection(self)
 
         self.game_engine.field_tags.remove(self.get_tag())
         del self.game_engine.items_dict[self.get_tag()]
+        self.game_engine.remove_action_maps(self)
+
+        self.game_engine.emit_event("death", tag=self.get_tag())
 
         if self.get_tag() == "b":
             self.game_engine.add_score(self.game_engine.scores["boss"])
@@ -187,7 +203,14 @@ class Enemy(GameItem):
 
     def decrease_health(self, value):
         """Метод для осуществления механики нанесения урона врагу"""
-        self.health = self.health - value
+        with self.game_engine.update_features(self):
+            self.health = self.health - value
+        self.game_engine.emit_event("damage", tag=self.get_tag(), value=value, health=self.health)
+
+        if self.game_engine.quiet:
+            if self.health <= 0:
+                self._die()
+            return None
 
         response = str()
 
@@ -199,17 +222,13 @@ class Enemy(GameItem):
 
         return response
 
-    def set_protected_spots(self, spots):
-        """Устанавливает список ячеек, которые защищаются данным врагом"""
-        self.protected_spots = spots
-
-    def add_protected_spot(self, spot):
-        """Добавляет ячейку в список ячеек, которые защищаются данным врагом"""
-        self.protected_spots.append(spot)
+    def get_protected_mask(self):
+        """Возвращает битовую маску индексов ячеек, которые защищаются данным врагом"""
+        return self.protected_mask
 
     def get_protected_spots(self):
         """Возвращает список ячеек, которые защищаются данным врагом"""
-        return self.protected_spots
+        return [self.game_engine.get_spot_by_index(index) for index in iter_bits(self.protected_mask)]
 
     def info(self):
         result = f"Враг N{self.id}. Имя: \"{self.name}\". Характеристики: "
@@ -222,3 +241,158 @@ class Enemy(GameItem):
         result += f"Находится в точке ({self.x}, {self.y})."
 
         return result
+
+
+def _build_stat_table(races, classes, default_value):
+    """
+    Строит таблицу характеристик врагов: для каждой расы и каждого доступного ей класса
+    произведение значения по умолчанию и мультипликаторов расы и класса\n
+    :return: tuple, строки таблицы (раса, класс, имя, здоровье, rca, cca) и для каждой расы
+    пара (индекс первой строки расы, число строк расы)
+    """
+
+    rows = []
+    race_rows = []
+
+    for race, race_data in races.items():
+        race_rows.append((len(rows), len(classes) if race_data["has_class"] else 1))
+
+        for enemy_class in (classes if race_data["has_class"] else [None]):
+            # Порядок умножения совпадает с прежним расчетом характеристик, поэтому округление не меняется
+            stats = [default_value * race_data[f"{name}_multiplier"] for name in ("health", "rca", "cca")]
+            name = race_data["name_ru"]
+
+            if enemy_class is not None:
+                stats = [value * classes[enemy_class][f"{name}_multiplier"]
+                         for value, name in zip(stats, ("health", "rca", "cca"))]
+                name += " " + classes[enemy_class]["name_ru"]
+
+            rows.append((race, enemy_class, name, *stats))
+
+    return tuple(rows), tuple(race_rows)
+
+
+# Таблицы характеристик обычных врагов и боссов. Все характеристики, включая атаки,
+# исторически рассчитываются от здоровья по умолчанию default_health
+_enemy_stat_table = _build_stat_table(Enemy.enemy_races, Enemy.enemy_classes, Enemy.default_health)
+_boss_stat_table = _build_stat_table(Enemy.boss_enemy_races, Enemy.enemy_classes, Enemy.default_health)
+
+
+@functools.lru_cache(maxsize=None)
+def get_stat_table(difficulty_level, is_boss=False):
+    """
+    Возвращает таблицу характеристик врагов для уровня сложности, см. _build_stat_table.
+    Таблицы вычисляются один раз для каждого уровня сложности
+    """
+
+    rows, race_rows = _boss_stat_table if is_boss else _enemy_stat_table
+    rows = tuple((race, enemy_class, name, health * difficulty_level, rca * difficulty_level, cca * difficulty_level)
+                 for race, enemy_class, name, health, rca, cca in rows)
+
+    return rows, race_rows
+
+
+def _roll_enemy(rng, rows, race_rows):
+    """Генерирует номер строки таблицы характеристик врага и его характеристики, см. roll_enemy_stats"""
+
+    health_coefficient = rng.randint(90, 100) / 100
+    rca_coefficient = rng.randint(90, 100) / 100
+    cca_coefficient = rng.randint(90, 100) / 100
+
+    first_row, rows_count = race_rows[rng.randint(0, len(race_rows) - 1)] if len(race_rows) > 1 else race_rows[0]
+    kind = first_row + rng.randint(0, rows_count - 1) if rows_count > 1 else first_row
+    health, rca, cca = rows[kind][3:]
+
+    return kind, int(health * health_coefficient), int(rca * rca_coefficient), int(cca * cca_coefficient)
+
+
+def roll_enemy_stats(rng, difficulty_level, is_boss=False):
+    """
+    Генерирует характеристики одного врага: случайные коэффициенты от 0.9 до 1 для каждой характеристики,
+    случайные расу и класс. Последовательность обращений к генератору совпадает с прежним Enemy.__init__,
+    поэтому игры с одинаковым зерном не меняются\n
+    :param rng: random.Random или модуль random
+    :return: tuple, (раса, класс, имя, здоровье, rca, cca)
+    """
+
+    rows, race_rows = get_stat_table(difficulty_level, is_boss)
+    kind, health, rca, cca = _roll_enemy(rng, rows, race_rows)
+
+    return (*rows[kind][:3], health, rca, cca)
+
+
+class EnemyStatsBatch:
+    """
+    Характеристики пакета врагов, см. roll_enemy_stats_batch. Хранит номера строк таблицы характеристик
+    и значения характеристик по столбцам. Элемент пакета - кортеж (раса, класс, имя, здоровье, rca, cca)
+    """
+
+    __slots__ = ("rows", "kinds", "health", "rca", "cca")
+
+    def __init__(self, rows, kinds, health, rca, cca):
+        """
+        :param rows: tuple, строки таблицы характеристик, см. get_stat_table
+        :param kinds: номера строк таблицы для каждого врага
+        :param health: здоровье врагов
+        :param rca: атака в дальнем бою врагов
+        :param cca: атака в ближнем бою врагов
+        """
+        self.rows = rows
+        self.kinds = kinds
+        self.health = health
+        self.rca = rca
+        self.cca = cca
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        race, enemy_class, name = self.rows[self.kinds[index]][:3]
+        return race, enemy_class, name, int(self.health[index]), int(self.rca[index]), int(self.cca[index])
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_numpy_stat_table(difficulty_level, is_boss):
+    """Возвращает таблицу характеристик в виде массивов NumPy: характеристики, первые строки рас и число строк рас"""
+
+    rows, race_rows = get_stat_table(difficulty_level, is_boss)
+    return (numpy.array([row[3:] for row in rows]),
+            numpy.array([first_row for first_row, rows_count in race_rows]),
+            numpy.array([rows_count for first_row, rows_count in race_rows]))
+
+
+def roll_enemy_stats_batch(count, difficulty_level, is_boss=False, rng=None):
+    """
+    Генерирует характеристики нескольких врагов за один вызов\n
+    :param count: int, число врагов
+    :param difficulty_level: int, уровень сложности
+    :param is_boss: bool, True для боссов
+    :param rng: генератор случайных чисел. Для numpy.random.Generator характеристики генерируются векторно,
+    для random.Random или модуля random - последовательно, как при создании врагов по одному.
+    По умолчанию - numpy.random.default_rng(), если NumPy установлен, иначе модуль random
+    :return: EnemyStatsBatch
+    """
+
+    if rng is None:
+        rng = numpy.random.default_rng() if numpy is not None else random
+
+    rows, race_rows = get_stat_table(difficulty_level, is_boss)
+
+    if numpy is None or not isinstance(rng, numpy.random.Generator):
+        enemies = [_roll_enemy(rng, rows, race_rows) for _ in range(count)]
+        kinds, health, rca, cca = (list(column) for column in zip(*enemies)) if enemies else ([], [], [], [])
+        return EnemyStatsBatch(rows, kinds, health, rca, cca)
+
+    values, first_rows, rows_counts = _get_numpy_stat_table(difficulty_level, is_boss)
+
+    coefficients = rng.integers(90, 101, size=(count, 3)) / 100
+    races = rng.integers(0, len(first_rows), size=count)
+    kinds = first_rows[races] + rng.integers(0, rows_counts[races])
+
+    # Приведение к целому отбрасывает дробную часть, как int() для положительных значений
+    stats = (values[kinds] * coefficients).astype(numpy.int64)
+
+    return EnemyStatsBatch(rows, kinds, stats[:, 0], stats[:, 1], stats[:, 2])
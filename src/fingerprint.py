@@ -0,0 +1,131 @@
+import functools
+import operator
+
+from .enemy_characters import Enemy
+from .items import TreasureChest
+
+# 64-битный отпечаток состояния игры по схеме Зобриста.
+#
+# Состояние игры раскладывается на независимые составляющие: объект в ячейке поля, значение характеристики
+# персонажа или врага, количество эликсиров одного вида в рюкзаке, счет и признак продолжения игры.
+# Каждой составляющей соответствует псевдослучайный 64-битный ключ, отпечаток - XOR ключей всех составляющих.
+# При изменении составляющей из отпечатка исключается ключ старого значения и добавляется ключ нового,
+# поэтому отпечаток обновляется за O(1) и одинаков для одинаковых состояний, полученных разными действиями.
+# Ключи вычисляются хеш-функцией от кодов составляющей, а не берутся из таблицы случайных чисел,
+# так как характеристики и счет не ограничены. Отпечаток не зависит от процесса и запуска программы
+
+_MASK = (1 << 64) - 1
+
+# Коды объектов: сундуки, персонажи игрока в порядке GameEngine._friendly_classes, враги - 16 + id врага
+_CHEST = 0
+_FIRST_ENEMY = 16
+
+# Коды составляющих, не связанных с объектами поля
+_SCORE = 8
+_GAME_ON = 9
+_INVENTORY = 10
+
+# Коды характеристик. Код 0 - ячейка, в которой находится объект
+_CELL = 0
+_get_character_features = operator.attrgetter("health", "energy", "range", "cca", "rca", "aec", "mec")
+_get_enemy_features = operator.attrgetter("race", "enemy_class", "health", "rca", "cca")
+
+_character_codes = {"f": 1, "a": 2, "m": 3, "w": 4}
+_enemy_races = {race: code for code, race in enumerate(list(Enemy.enemy_races) + list(Enemy.boss_enemy_races))}
+_enemy_classes = {enemy_class: code for code, enemy_class in enumerate([None] + list(Enemy.enemy_classes))}
+_treasures = {name: code for code, name in enumerate(TreasureChest.content_dict)}
+
+
+def _mix(value):
+    """Перемешивание битов 64-битного числа (финализатор splitmix64)"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+@functools.lru_cache(maxsize=65536)
+def component_key(code, feature, value):
+    """
+    Возвращает ключ составляющей состояния. Ключи кэшируются, так как значения характеристик повторяются\n
+    :param code: int, код объекта или составляющей
+    :param feature: int, код характеристики
+    :param value: int, значение
+    """
+    return _mix(_mix((code << 8) | feature) ^ (int(value) & _MASK))
+
+
+def item_code(item):
+    """Возвращает код объекта игрового поля"""
+
+    if isinstance(item, Enemy):
+        return _FIRST_ENEMY + item.id
+    if isinstance(item, TreasureChest):
+        return _CHEST
+
+    return _character_codes[item.get_tag()]
+
+
+def cell_key(item, index):
+    """Возвращает ключ объекта в ячейке с индексом index"""
+    return component_key(item_code(item), _CELL, index)
+
+
+@functools.lru_cache(maxsize=65536)
+def _features_key(code, values):
+    key = 0
+    for feature, value in enumerate(values, 1):
+        key ^= component_key(code, feature, value)
+
+    return key
+
+
+def features_key(item):
+    """Возвращает XOR ключей характеристик персонажа или врага. Для врага учитываются также его раса и класс"""
+
+    if isinstance(item, Enemy):
+        race, enemy_class, *values = _get_enemy_features(item)
+        return _features_key(_FIRST_ENEMY + item.id, (_enemy_races[race], _enemy_classes[enemy_class], *values))
+
+    return _features_key(_character_codes[item.get_tag()], _get_character_features(item))
+
+
+def inventory_key(treasure_name, count):
+    """Возвращает ключ количества предметов одного вида в рюкзаке"""
+    return component_key(_INVENTORY, _treasures[treasure_name], count) if count else 0
+
+
+def score_key(score):
+    return component_key(_SCORE, 0, score)
+
+
+def game_on_key(is_game_on):
+    return component_key(_GAME_ON, 0, is_game_on)
+
+
+def compute_fingerprint(engine):
+    """
+    Вычисляет отпечаток состояния игры полным обходом поля, объектов и рюкзака\n
+    :param engine: GameEngine, игровой движок
+    :return: tuple, отпечаток и список ключей объектов в ячейках поля по индексам ячеек
+    """
+
+    width = engine.get_width()
+    cells = [0] * (width * engine.get_length())
+    fingerprint = score_key(engine.score) ^ game_on_key(engine.is_game_on)
+
+    for row in engine.game_field:
+        for spot in row:
+            if spot.get_spot_is_occupied():
+                index = (spot.y - 1) * width + spot.x - 1
+                cells[index] = cell_key(spot.get_spot_owner(), index)
+                fingerprint ^= cells[index]
+
+    for item in engine.items_dict.values():
+        fingerprint ^= features_key(item)
+
+    if engine.inventory is not None:
+        for name, count in engine.inventory.get_counts().items():
+            fingerprint ^= inventory_key(name, count)
+
+    return fingerprint, cells
@@ -11,19 +11,28 @@ class Game:
 
     is_on = False
 
-    def __init__(self):
-        self.io_stream = os.getenv("IO_STREAM", "console")
+    def __init__(self, io_stream=None, game_id=None):
+        """
+        :param io_stream: str, поток ввода данных. По умолчанию берется из переменной окружения IO_STREAM
+        :param game_id: int, id игры. Если не передан, генерируется новый id
+        """
+        self.io_stream = io_stream or os.getenv("IO_STREAM", "console")
 
         self.is_on = True
 
         # Инициализируем игровой движок и контроллер
-        self.game_id = generate_game_id(self.io_stream)
+        self.game_id = game_id if game_id is not None else generate_game_id(self.io_stream)
 
         logger = Logger(self.io_stream)
 
         self.game_engine = GameEngine(self, self.game_id, logger)
         self.game_controller = GameController(self.game_engine)
 
+    def assign_id(self, game_id):
+        """Присваивает id заранее созданной игре"""
+        self.game_id = game_id
+        self.game_engine.game_id = game_id
+
     def set_off(self):
         self.is_on = False
 
@@ -0,0 +1,234 @@
+from array import array
+
+from .game_spot import GameSpot
+
+
+# Флаги состояния ячейки в массиве состояний игрового поля
+_OCCUPIED = 1
+_PROTECTED = 2
+
+# Таблицы для преобразования всего массива состояний за одну операцию bytes.translate
+_free_table = bytes(1 if state == 0 else 0 for state in range(256))
+_tag_table = bytes(ord("*") if state == 0 else ord("#") if state == _PROTECTED else ord("?") for state in range(256))
+
+
+class ArrayGameBoard:
+    """
+    Игровое поле, хранящее состояние ячеек в плоских массивах, индексируемых как (y - 1) * ширина + (x - 1).
+    Для совместимости с остальным кодом предоставляет ячейки ArrayGameSpot с интерфейсом GameSpot
+    """
+
+    __slots__ = ("width", "length", "state", "owner_index", "owners", "protection", "spots", "_on_change",
+                 "_owner_slots", "_owner_refs", "_free_slots")
+
+    def __init__(self, width, length, protection, listener=None):
+        """
+        :param width: int, ширина игрового поля
+        :param length: int, длина игрового поля
+        :param protection: ProtectionMap, защита ячеек игрового поля врагами
+        :param listener: function, функция, вызываемая при изменении ячейки
+        """
+
+        size = width * length
+
+        self.width = width
+        self.length = length
+
+        # Флаги занятости и защиты ячеек. Флаг защиты повторяет ProtectionMap для операций над всем полем
+        self.state = bytearray(size)
+        # Индекс владельца ячейки в списке owners или -1. Как и в GameSpot,
+        # после освобождения ячейки индекс прежнего владельца сохраняется
+        self.owner_index = array("i", [-1]) * size
+        self.owners = []
+        self.protection = protection
+
+        # Индекс владельца в списке owners по id владельца и количество ячеек, ссылающихся на каждый индекс.
+        # Индекс освобождается, когда на него не ссылается ни одна ячейка, и используется повторно
+        self._owner_slots = {}
+        self._owner_refs = []
+        self._free_slots = []
+
+        self._on_change = listener
+
+        self.spots = [ArrayGameSpot(self, index, index % width + 1, index // width + 1) for index in range(size)]
+
+    def __setstate__(self, state):
+        _, slots = state
+        for name, value in slots.items():
+            setattr(self, name, value)
+
+        # Индексы владельцев хранятся по id объектов, которые после загрузки сохраненной игры другие
+        self._owner_slots = {id(owner): slot for slot, owner in enumerate(self.owners) if owner is not None}
+
+    def rows(self):
+        """Возвращает ячейки поля в виде списка строк, обращение к ячейке - rows[y - 1][x - 1]"""
+        return [self.spots[row * self.width: (row + 1) * self.width] for row in range(self.length)]
+
+    def changed(self, index):
+        if self._on_change is not None:
+            self._on_change(self.spots[index])
+
+    def owner_slot(self, owner):
+        """Возвращает индекс объекта в списке владельцев, добавляя его при первом обращении"""
+        slot = self._owner_slots.get(id(owner))
+
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self.owners[slot] = owner
+            else:
+                slot = len(self.owners)
+                self.owners.append(owner)
+                self._owner_refs.append(0)
+            self._owner_slots[id(owner)] = slot
+
+        return slot
+
+    def set_owner(self, index, owner):
+        """Записывает владельца ячейки с индексом index и освобождает индекс прежнего владельца, если он не нужен"""
+        slot = self.owner_slot(owner)
+        previous = self.owner_index[index]
+        if previous == slot:
+            return
+
+        self.owner_index[index] = slot
+        self._owner_refs[slot] += 1
+
+        if previous >= 0:
+            self._owner_refs[previous] -= 1
+            if self._owner_refs[previous] == 0:
+                del self._owner_slots[id(self.owners[previous])]
+                self.owners[previous] = None
+                self._free_slots.append(previous)
+
+    def free_mask(self):
+        """Возвращает маску свободных ячеек: 1 - ячейка свободна и не защищена"""
+        return self.state.translate(_free_table)
+
+    def count_free(self):
+        """Возвращает количество свободных незащищенных ячеек"""
+        return self.state.count(0)
+
+    def count_occupied(self):
+        """Возвращает количество занятых ячеек"""
+        return len(self.state) - self.state.count(0) - self.state.count(_PROTECTED)
+
+    def tags(self, start=0, stop=None):
+        """
+        Возвращает тэги ячеек поля в порядке индексов\n
+        :param start: int, индекс первой ячейки
+        :param stop: int, индекс после последней ячейки. По умолчанию - до конца поля
+        """
+
+        if stop is None:
+            stop = len(self.state)
+
+        tags = list(self.state[start:stop].translate(_tag_table).decode("ascii"))
+
+        # Тэги владельцев подставляются только для занятых ячеек
+        for flag in (_OCCUPIED, _OCCUPIED | _PROTECTED):
+            index = self.state.find(flag, start, stop)
+            while index >= 0:
+                tags[index - start] = self.owners[self.owner_index[index]].get_tag()
+                index = self.state.find(flag, index + 1, stop)
+
+        return tags
+
+
+class ArrayGameSpot:
+    """
+    Ячейка игрового поля ArrayGameBoard. Не хранит собственного состояния,
+    а читает и изменяет массивы поля. Интерфейс совпадает с GameSpot
+    """
+
+    __slots__ = ("board", "index", "x", "y")
+
+    def __init__(self, board, index, x_coord, y_coord):
+        self.board = board
+        self.index = index
+        self.x = x_coord
+        self.y = y_coord
+
+    # Свойства с именами атрибутов GameSpot позволяют использовать его методы info и request_occupation_tag
+
+    @property
+    def _is_occupied(self):
+        return bool(self.board.state[self.index] & _OCCUPIED)
+
+    @property
+    def _is_protected(self):
+        return self.board.protection.counts[self.index] > 0
+
+    @property
+    def _owner(self):
+        owner_index = self.board.owner_index[self.index]
+        return self.board.owners[owner_index] if owner_index >= 0 else None
+
+    @property
+    def _protectors(self):
+        return self.board.protection.get_protectors(self.index)
+
+    info = GameSpot.info
+    request_occupation_tag = GameSpot.request_occupation_tag
+
+    def set_change_listener(self, listener):
+        """Изменения ячеек отслеживаются полем целиком, см. ArrayGameBoard"""
+        self.board._on_change = listener
+
+    def get_is_spot_free(self):
+        """Возвращает статус ячейки. True, если в ячейке нет объекта и она не защищена врагами"""
+        return self.board.state[self.index] == 0
+
+    def get_spot_is_occupied(self):
+        """Возвращает статус ячейки. True, если в ячейке находится объект"""
+        return self._is_occupied
+
+    def get_spot_is_protected(self):
+        """Возвращает статус ячейки. True, если ячейка защищена врагами"""
+        return self.board.protection.counts[self.index] > 0
+
+    def get_spot_owner(self):
+        """Возвращает объект, расположенный в ячейке"""
+        return self._owner
+
+    def get_spot_protectors(self):
+        """Возвращает врагов, защищающих клетку"""
+        return self.board.protection.get_protectors(self.index)
+
+    def change_spot_owner(self, new_owner):
+        """Изменяет объект, расположенный в ячейке"""
+        self.board.set_owner(self.index, new_owner)
+        self.board.state[self.index] |= _OCCUPIED
+        self.board.changed(self.index)
+
+    def loose_spot_protection(self, enemy_id):
+        """
+        Удаляет врага с переданным id из списка защитников ячейки\n
+        :param enemy_id: int, id врага
+        """
+        self.board.protection.release(enemy_id, 1 << self.index)
+        self.protection_changed()
+
+    def set_spot_protector(self, protector):
+        """Добавляет защитника для ячейки"""
+        self.board.protection.protect(protector, 1 << self.index)
+        self.protection_changed()
+
+    def protection_changed(self):
+        """Обновляет флаг защиты ячейки после изменения ProtectionMap"""
+
+        if self.board.protection.counts[self.index]:
+            self.board.state[self.index] |= _PROTECTED
+        else:
+            self.board.state[self.index] &= ~_PROTECTED
+        self.board.changed(self.index)
+
+    def set_spot_owner(self, new_owner):
+        """Устанавливает нового владельца ячейки - находящийся в ячейке объект"""
+
+        if new_owner is None:
+            self.board.state[self.index] &= ~_OCCUPIED
+        else:
+            self.board.set_owner(self.index, new_owner)
+            self.board.state[self.index] |= _OCCUPIED
+        self.board.changed(self.index)
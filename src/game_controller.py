@@ -1,4 +1,6 @@
+from . commands import parse_command
 from . errors import GameError, GameEngineError
+from . import solver
 
 
 class GameController:
@@ -8,10 +10,18 @@ class GameController:
 
     is_end_game_confirmation_request_pending = False
 
+    # Ограничения поиска для подсказки, None - значения из переменных окружения, см. solver.get_hint
+    hint_time_budget = None
+    hint_node_budget = None
+
     def __init__(self, game_engine):
         self.game_engine = game_engine
         self.io_stream = ""
         self.action_result = ""
+        self.is_end_game_confirmation_request_pending = False
+
+        # True, если последняя выполненная команда завершилась ошибкой
+        self.last_command_failed = False
 
     def listen(self, io_stream="console"):
         """Запуск приема команд от игрока"""
@@ -42,101 +52,196 @@ class GameController:
         else:
             return "Ваш ответ должен быть формата \"да\" или \"нет\"."
 
+    def _command_help(self, command):
+        return self.game_engine.help()
+
+    def _command_print_field(self, command):
+        return self.game_engine.get_current_field_view()
+
+    def _command_end_game(self, command):
+        # Проверяем, действительно ли пользователь хочет закончить игру
+        self.is_end_game_confirmation_request_pending = True
+
+        return "Вы уверены, что хотите завершить игру? (Да / Нет)"
+
+    def _command_repeat(self, command):
+        player_actions = self.game_engine.get_player_actions()
+        if len(player_actions) == 0:
+            raise GameError("Нет команд, которые можно было бы повторить!")
+
+        character = player_actions[-1]["subject"]
+        action = player_actions[-1]["action"]
+        args = player_actions[-1]["args"]
+
+        if character.__class__.__name__[0].lower() not in self.game_engine.get_friendly_tags():
+            raise GameError(f"Команду невозможно повторить, возможно ваш \"{character.name}\" погиб!")
+
+        return character.perform_action(action, args)
+
+    def _command_hint(self, command):
+        return solver.get_hint(self.game_engine, self.hint_time_budget, self.hint_node_budget)
+
+    def _command_info(self, command):
+        arguments = command.args
+
+        if len(arguments) == 1:
+            if arguments[0] == "inv":
+                return self.game_engine.inventory.info()
+            elif arguments[0] in self.game_engine.get_tags():
+                return self.game_engine.items_dict[arguments[0]].info()
+            else:
+                raise GameError("Переданный тэг не верен. Попробуйте запросить информацию по другому тэгу.")
+
+        elif len(arguments) == 2 and arguments[0].isdigit() and arguments[1].isdigit():
+            x, y = int(arguments[0]), int(arguments[1])
+
+            if x > self.game_engine.get_width() or x < 1 or y > self.game_engine.get_length() or y < 1:
+                raise GameError("Переданные координаты находятся за пределами игрового поля. "
+                                "Попробуйте изменить запрос.")
+
+            return self.game_engine.game_field[y - 1][x - 1].info()
+
+        raise GameError("Переданные аргументы не соответствуют требованиям. Попробуйте изменить запрос.")
+
+    def _command_actions(self, command):
+        if len(command.args) != 1:
+            raise GameError("Передайте тэг персонажа, например actions(w).")
+
+        actions = self.game_engine.legal_actions(command.args[0])
+        if len(actions) == 0:
+            return "У персонажа нет доступных действий."
+
+        return "Доступные действия:\n" + "\n".join(actions)
+
+    def _command_action(self, command):
+        if command.tag not in self.game_engine.get_tags():
+            raise GameError("Введенная команда не корректна. Попробуйте изменить запрос.")
+
+        if command.tag not in self.game_engine.get_friendly_tags():
+            raise GameError("Вы не можете отдавать команды враждебным персонажам или неигровым объектам.")
+
+        return self.game_engine.items_dict[command.tag].perform_action(command.action, list(command.args))
+
+    # Обработчики команд по виду разобранной команды
+    _command_handlers = {
+        "help": _command_help,
+        "print_field": _command_print_field,
+        "end_game": _command_end_game,
+        "repeat": _command_repeat,
+        "hint": _command_hint,
+        "info": _command_info,
+        "actions": _command_actions,
+        "action": _command_action
+    }
+
     def listen_command(self, user_command):
-        """Выполнение переданной команды"""
-        active_tags = self.game_engine.get_tags()
+        """
+        Выполнение переданной команды\n
+        :return: str, результат команды для игрока. В тихом режиме игрового движка - словарь с результатом команды,
+        см. _listen_command_quiet
+        """
+        if self.game_engine.quiet:
+            result = self._listen_command_quiet(user_command)
+        else:
+            result = self._listen_command_narrated(user_command)
+
+        # В отладочном режиме отпечаток состояния игры сверяется с полным пересчетом после каждой команды
+        if self.game_engine.fingerprint_check:
+            self.game_engine.get_fingerprint()
+
+        return result
+
+    def _listen_command_narrated(self, user_command):
+        """Выполнение команды с описанием результата для игрока"""
+
         self.action_result = ""
+        self.last_command_failed = False
 
         user_command = user_command.lower()
 
-        def append_result(line):
-            self.action_result += line + "\n"
-
         try:
 
             if self.is_end_game_confirmation_request_pending:
-                append_result(self._validate_end_game_confirmation_request(user_command))
-
-            elif user_command.startswith("help"):
-                append_result(self.game_engine.help())
-
-            elif user_command.startswith("print_field"):
-                append_result(self.game_engine.get_current_field_view())
-
-            elif user_command.startswith("end_game"):
-                # Проверяем, действительно ли пользователь хочет закончить игру
-                self.is_end_game_confirmation_request_pending = True
-
-                append_result("Вы уверены, что хотите завершить игру? (Да / Нет)")
-
-            elif user_command == "repeat" or user_command == "repeat()":
-                player_actions = self.game_engine.get_player_actions()
-                if len(player_actions) == 0:
-                    raise GameError("Нет команд, которые можно было бы повторить!")
-                else:
-                    character = player_actions[-1]["subject"]
-                    action = player_actions[-1]["action"]
-                    args = player_actions[-1]["args"]
-
-                    if character.__class__.__name__[0].lower() not in self.game_engine.get_friendly_tags():
-                        raise GameError(f"Команду невозможно повторить, возможно ваш \"{character.name}\" погиб!")
-
-                    append_result(character.perform_action(action, args))
-
-            elif user_command.startswith("info("):
-                arguments = list(map(lambda x: x.strip(), user_command[user_command.index("(") + 1: -1].split(",")))
-
-                if len(arguments) == 1:
-                    if arguments[0] == "inv":
-                        append_result(self.game_engine.inventory.info())
-                    elif arguments[0] in active_tags:
-                        append_result(self.game_engine.items_dict[arguments[0]].info())
-                    else:
-                        raise GameError("Переданный тэг не верен. Попробуйте запросить информацию по другому тэгу.")
-
-                elif len(arguments) == 2:
-                    if arguments[0].isdigit() and arguments[1].isdigit():
-                        arguments = list(map(int, arguments))
-
-                        if arguments[0] > 8 or arguments[0] < 1 or arguments[1] > 8 or arguments[1] < 1:
-                            raise GameError("Переданные координаты находятся за пределами игрового поля. "
-                                            "Попробуйте изменить запрос.")
-                        else:
-                            append_result(self.game_engine.game_field[arguments[1] - 1][arguments[0] - 1].info())
-                    else:
-                        raise GameError(
-                            "Переданные аргументы не соответствуют требованиям. Попробуйте изменить запрос.")
-
-            elif "." in user_command:
-                if user_command[:user_command.index(".")] in active_tags:
-                    tag = user_command[:user_command.index(".")]
-
-                    if tag in self.game_engine.get_friendly_tags():
-                        action = user_command[user_command.index(".") + 1: user_command.index("(")]
-                        arguments = list(
-                            map(lambda x: x.strip(), user_command[user_command.index("(") + 1: -1].split(",")))
-
-                        append_result(self.game_engine.items_dict[tag].perform_action(action, [*arguments]))
-
-                    else:
-                        raise GameError(
-                            "Вы не можете отдавать команды враждебным персонажам или неигровым объектам.")
-                else:
-                    raise GameError("Введенная команда не корректна. Попробуйте изменить запрос.")
+                self.action_result = self._validate_end_game_confirmation_request(user_command) + "\n"
 
             else:
-                raise GameError("Введенная команда не корректна. Попробуйте изменить запрос.")
+                command = parse_command(user_command)
+                self.action_result = self._command_handlers[command.kind](self, command) + "\n"
 
-            append_result(self.game_engine.check_is_game_on())
+            self.action_result += self.game_engine.check_is_game_on() + "\n"
 
             return self.action_result[:-1]
 
         # Обрабатываем все игровые ошибки, возникшие в ходе игры
         except GameError as err:
+            self.last_command_failed = True
             return f"Операция не может быть выполнена. {err}\n"
 
         except GameEngineError as err:
+            self.last_command_failed = True
             return f"Операция не может быть выполнена. {err}\n"
 
         except Exception as err:
+            self.last_command_failed = True
             return f"Операция не может быть выполнена. {err}\n"
+
+    def _listen_command_quiet(self, user_command):
+        """
+        Выполнение команды в тихом режиме без описаний действий\n
+        :return: dict, признак успеха "ok", текст ошибки "error", игровые события команды "events",
+        счет "score" и признак продолжения игры "is_game_on"
+        """
+
+        engine = self.game_engine
+        engine.outcome_events = []
+        self.last_command_failed = False
+        error = None
+
+        try:
+            user_command = user_command.lower()
+
+            if self.is_end_game_confirmation_request_pending:
+                self._validate_end_game_confirmation_request(user_command)
+            else:
+                command = parse_command(user_command)
+                self._command_handlers[command.kind](self, command)
+
+            engine.check_is_game_on()
+
+        except Exception as err:
+            self.last_command_failed = True
+            error = str(err)
+
+        events = engine.outcome_events
+        engine.outcome_events = None
+
+        return {
+            "ok": not self.last_command_failed,
+            "error": error,
+            "events": events,
+            "score": engine.score,
+            "is_game_on": engine.is_game_on
+        }
+
+    def listen_commands(self, user_commands, stop_on_error=True):
+        """
+        Последовательное выполнение списка команд\n
+        :param user_commands: [str], список команд
+        :param stop_on_error: bool, True, если выполнение нужно прекратить после первой команды с ошибкой
+        :return: [dict], результаты выполненных команд
+        """
+
+        results = []
+
+        for user_command in user_commands:
+            result = self.listen_command(user_command)
+            results.append({
+                "command": user_command,
+                "response_content": result,
+                "is_error": self.last_command_failed
+            })
+
+            if not self.game_engine.is_game_on or (stop_on_error and self.last_command_failed):
+                break
+
+        return results
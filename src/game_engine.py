@@ -1,9 +1,24 @@
+import os
+import random
+from contextlib import contextmanager
+
 from .enemy_characters import Enemy
 from .game_spot import GameSpot
+from .game_board import ArrayGameBoard
+from .protection import ProtectionMap
+from .pathfinding import DistanceMaps
+from .action_maps import ActionMaps
+from .errors import GameError, GameEngineError
 from .playable_characters import Warrior, Mage, Archer, Fairy
 from .inventory import Inventory
 from .items import HealthPotion, EnergyPotion, TreasureChest
-from .helpers import get_random_list_element
+from .helpers import get_random_list_element, get_deep_size, iter_bits
+from .snapshot import dump_engine, load_engine
+from .fingerprint import compute_fingerprint, cell_key, features_key, inventory_key, score_key, game_on_key
+
+
+# Таблица преобразования маски свободных ячеек из байтов 0 и 1 в строку двоичного числа
+_mask_digits = bytes.maketrans(b"\x00\x01", b"01")
 
 
 class GameEngine:
@@ -15,15 +30,32 @@ class GameEngine:
     _game_field_width = 8
     _game_field_length = 8
 
-    # Данные запущенной игры
+    # Данные запущенной игры. Изменяемые данные создаются для каждой игры в __init__
     difficulty = 1
     is_game_on = False
-    game_field = []
-    field_tags = []
-    friendly_tags = []
-    items_dict = {}
+    quiet = False
+    rng = None
+    outcome_events = None
+    game_field = None
+    board_backend = "objects"
+    board = None
+    protection = None
+    movement_mode = "manhattan"
+    distance_maps = None
+    action_maps = None
+    _render_rows = None
+    _dirty_rows = None
+    field_tags = None
+    friendly_tags = None
+    items_dict = None
     inventory = None
-    player_actions = []
+    player_actions = None
+    fingerprint = 0
+    fingerprint_check = False
+    _fingerprint_cells = None
+
+    # Текст инструкции по игре
+    _help_text = None
 
     # Количество очков за игровые действия
     scores = {
@@ -68,6 +100,9 @@ class GameEngine:
          "protected": [[7, 7], [8, 6], [8, 7]]},
     ]
 
+    # Маски ячеек, защищаемых врагами из _enemies_positions. Вычисляются один раз при первом создании врагов
+    _enemies_protected_masks = None
+
     # Координаты босса
     _main_enemy_default_position = [8, 8]
 
@@ -79,57 +114,440 @@ class GameEngine:
         [[8, 3], [8, 4]]
     ]
 
-    def __init__(self, game, game_id, logger):
+    def __init__(self, game, game_id, logger, quiet=False, rng=None):
+        """
+        :param game: Game, игра, которой принадлежит движок, или None для игр без обертки Game
+        :param game_id: int, id игры
+        :param logger: Logger, журнал игры или None, если события игры не записываются
+        :param quiet: bool, True для тихого режима: описания действий не формируются,
+        контроллер возвращает результаты команд в виде словарей
+        :param rng: random.Random, генератор случайных чисел игры. По умолчанию - общий генератор модуля random
+        """
 
         self.game = game
         self.game_id = game_id
         self.logger = logger
+        self.quiet = quiet
+        self.rng = rng
         self.score = 0
         self.is_game_on = True
         self.game_field = []
         self._init_result_output = []
 
+        # Способ хранения игрового поля: "objects" - объекты GameSpot, "array" - плоские массивы ArrayGameBoard
+        self.board_backend = os.getenv("BOARD_BACKEND", "objects")
+        self.board = None
+
+        # Способ перемещения персонажей: "manhattan" - расход энергии по расстоянию между ячейками без учета
+        # препятствий, "path" - по кратчайшему пути через свободные ячейки, см. find_path
+        self.movement_mode = os.getenv("MOVEMENT_MODE", "manhattan")
+
+        # Данные игры хранятся в экземпляре, чтобы игры одного процесса не разделяли общие списки,
+        # а сериализованная игра содержала все свое состояние
+        self.field_tags = []
+        self.friendly_tags = []
+        self.items_dict = {}
+        self.player_actions = []
+
+        # Счетчик врагов игры, используется для генерации их id
+        self.enemies_count = 0
+
+        # Версия состояния игры увеличивается при каждом изменении.
+        # Для каждой ячейки поля хранится версия ее последнего изменения
+        self.state_version = 0
+        self._cell_versions = [0] * (self._game_field_width * self._game_field_length)
+
+        # 64-битный отпечаток состояния игры, см. fingerprint.py. Для каждой ячейки поля хранится
+        # ключ находящегося в ней объекта, входящий в отпечаток, или 0 для пустой ячейки.
+        # Отпечаток вычисляется после создания игрового поля
+        self.fingerprint = 0
+        self._fingerprint_cells = None
+
+        # Отладочный режим: при каждом запросе отпечаток сверяется с вычисленным полным обходом состояния
+        self.fingerprint_check = os.getenv("FINGERPRINT_CHECK", "0") == "1"
+
+        # Кэш изображения поля: для каждой строки поля - тэги ячеек и готовая строка изображения.
+        # Строки, ячейки которых изменились после отрисовки, отмечаются в _dirty_rows
+        self._render_rows = None
+        self._dirty_rows = None
+
+        # Функция, получающая игровые события: перемещения, урон, смерти, открытие сундуков, изменения счета
+        self.event_handler = None
+
+    def __getstate__(self):
+        # Обработчик событий принадлежит серверу и не сохраняется вместе с игрой
+        state = self.__dict__.copy()
+        state["event_handler"] = None
+        # Кэш изображения поля восстанавливается при первой отрисовке
+        state["_render_rows"] = None
+        state["_dirty_rows"] = None
+        return state
+
+    def set_event_handler(self, handler):
+        """
+        Устанавливает обработчик игровых событий\n
+        :param handler: function, функция, принимающая id игры и событие
+        """
+        self.event_handler = handler
+
+    def emit_event(self, event_type, **data):
+        """
+        Передает игровое событие обработчику, если он установлен,
+        и добавляет его в результат выполняемой команды, если результат собирается\n
+        :param event_type: str, тип события
+        :param data: данные события
+        """
+        if self.event_handler is None and self.outcome_events is None:
+            return
+
+        event = {"type": event_type, "version": self.state_version, **data}
+
+        if self.outcome_events is not None:
+            self.outcome_events.append(event)
+        if self.event_handler is not None:
+            self.event_handler(self.game_id, event)
+
+    def get_rng(self):
+        """Возвращает генератор случайных чисел игры"""
+        return self.rng if self.rng is not None else random
+
     def _init_empty_game_field(self):
         """Функция создания пустого игрового поля"""
 
+        if self.movement_mode not in ("manhattan", "path"):
+            raise ValueError(f"Неизвестный способ перемещения персонажей: {self.movement_mode}")
+
+        self.protection = ProtectionMap(self._game_field_width * self._game_field_length)
+        self.distance_maps = DistanceMaps(self._game_field_width, self._game_field_length, self._get_passable_mask)
+        self.action_maps = ActionMaps(self._game_field_width, self._game_field_length, self._get_enterable_mask)
+        self._fingerprint_cells = None
+        self._render_rows = None
+        self._dirty_rows = None
+
+        if self.board_backend == "array":
+            self.board = ArrayGameBoard(self._game_field_width, self._game_field_length, self.protection,
+                                        self._on_spot_changed)
+            self.game_field = self.board.rows()
+            return
+        elif self.board_backend != "objects":
+            raise ValueError(f"Неизвестный способ хранения игрового поля: {self.board_backend}")
+
         for x in range(self._game_field_length):
             self.game_field.append([])
             for y in range(self._game_field_width):
                 # Здесь транспонируются координаты. В дальнейшем обращение к игровому полю будет формата [y][x]
-                game_spot = GameSpot(y + 1, x + 1, False, None, False, [])
+                game_spot = GameSpot(y + 1, x + 1, False, None, self.protection, x * self._game_field_width + y)
+                game_spot.set_change_listener(self._on_spot_changed)
                 self.game_field[x].append(game_spot)
 
+    def get_spot_by_index(self, index):
+        """Возвращает ячейку игрового поля по индексу (y - 1) * ширина + (x - 1)"""
+        return self.game_field[index // self._game_field_width][index % self._game_field_width]
+
+    def get_cells_mask(self, coords):
+        """
+        Возвращает битовую маску индексов ячеек\n
+        :param coords: [[x, y]], список координат ячеек
+        """
+        mask = 0
+        for x, y in coords:
+            mask |= 1 << ((y - 1) * self._game_field_width + x - 1)
+
+        return mask
+
+    def add_protection(self, enemy, mask):
+        """
+        Добавляет врагу защиту ячеек\n
+        :param enemy: Enemy, защищающий враг
+        :param mask: int, битовая маска индексов ячеек
+        """
+        for index in iter_bits(self.protection.protect(enemy, mask)):
+            self.get_spot_by_index(index).protection_changed()
+
+    def release_protection(self, enemy):
+        """Снимает защиту врага со всех ячеек, которые он защищал"""
+        for index in iter_bits(self.protection.release(enemy.id)):
+            self.get_spot_by_index(index).protection_changed()
+
+    def _get_enemies_protected_masks(self):
+        cls = type(self)
+        if cls._enemies_protected_masks is None:
+            cls._enemies_protected_masks = [self.get_cells_mask(enemy_positions["protected"])
+                                            for enemy_positions in self._enemies_positions]
+
+        return cls._enemies_protected_masks
+
+    def _bump_version(self):
+        """Увеличивает версию состояния игры"""
+        self.state_version += 1
+
+    def _on_spot_changed(self, spot):
+        """Отмечает изменение ячейки игрового поля"""
+        self.state_version += 1
+        index = (spot.y - 1) * self._game_field_width + spot.x - 1
+        self._cell_versions[index] = self.state_version
+
+        # Ключ объекта в ячейке заменяется в отпечатке. При изменении защиты ячейки ключ не меняется.
+        # Пока поле заполняется при создании или восстановлении игры, отпечаток не ведется, см. reset_fingerprint
+        if self._fingerprint_cells is not None:
+            key = cell_key(spot.get_spot_owner(), index) if spot.get_spot_is_occupied() else 0
+            if key != self._fingerprint_cells[index]:
+                self.fingerprint ^= self._fingerprint_cells[index] ^ key
+                self._fingerprint_cells[index] = key
+
+        if self._dirty_rows is not None:
+            self._dirty_rows[spot.y - 1] = 1
+        # Карты расстояний зависят только от занятости и защиты ячеек, которые и меняются здесь
+        if self.distance_maps is not None:
+            self.distance_maps.invalidate()
+            self.action_maps.invalidate()
+
+    def toggle_fingerprint_features(self, item):
+        """
+        Исключает из отпечатка состояния характеристики персонажа или врага, если они в нем учтены, иначе добавляет.
+        Вызывается при гибели, изменения характеристик выполняются в update_features. Характеристики объектов,
+        которых уже нет в игре, в отпечатке не учитываются
+        """
+        if self.items_dict.get(item.get_tag()) is item:
+            self.fingerprint ^= features_key(item)
+
+    @contextmanager
+    def update_features(self, item):
+        """
+        Контекст изменения характеристик персонажа или врага: на время изменения характеристики исключаются
+        из отпечатка состояния и добавляются обратно с новыми значениями, в том числе при ошибке
+        """
+        self.toggle_fingerprint_features(item)
+        try:
+            yield item
+        finally:
+            self.toggle_fingerprint_features(item)
+
+    def _on_inventory_changed(self, treasure_name, count, new_count):
+        """Отмечает в отпечатке состояния изменение количества предметов одного вида в рюкзаке"""
+        self.fingerprint ^= inventory_key(treasure_name, count) ^ inventory_key(treasure_name, new_count)
+
+    def reset_fingerprint(self):
+        """Вычисляет отпечаток состояния игры полным обходом. Вызывается после создания и восстановления игры"""
+        self.fingerprint, self._fingerprint_cells = compute_fingerprint(self)
+        if self.inventory is not None:
+            self.inventory.set_change_listener(self._on_inventory_changed)
+
+    def get_fingerprint(self):
+        """
+        Возвращает 64-битный отпечаток состояния игры: поля, персонажей, врагов, рюкзака, счета и признака
+        продолжения игры. Одинаковые состояния имеют одинаковые отпечатки независимо от истории действий,
+        поэтому сравнение отпечатков заменяет сравнение состояний.
+        В отладочном режиме FINGERPRINT_CHECK отпечаток сверяется с вычисленным полным обходом
+        """
+
+        if self.fingerprint_check:
+            expected = compute_fingerprint(self)[0]
+            if expected != self.fingerprint:
+                raise GameEngineError(f"Отпечаток состояния игры {self.fingerprint:016x} не совпадает "
+                                      f"с вычисленным полным обходом {expected:016x}.")
+
+        return self.fingerprint
+
+    def get_field_delta(self, since_version=None):
+        """
+        Возвращает ячейки игрового поля, изменившиеся после переданной версии состояния\n
+        :param since_version: int, версия состояния, которая уже есть у клиента.
+        Если не передана или неизвестна, возвращаются все ячейки
+        :return: dict, текущая версия, признак отсутствия изменений и список измененных ячеек
+        """
+
+        if since_version is None or since_version < 0 or since_version > self.state_version:
+            since_version = -1
+
+        cells = []
+        for index, version in enumerate(self._cell_versions):
+            if version > since_version:
+                x = index % self._game_field_width + 1
+                y = index // self._game_field_width + 1
+                cells.append({"x": x, "y": y, "tag": self.game_field[y - 1][x - 1].request_occupation_tag()})
+
+        return {
+            "version": self.state_version,
+            "not_modified": len(cells) == 0,
+            "cells": cells
+        }
+
     def _append_init_results_output(self, line):
-        self._init_result_output.append(line)
+        # В тихом режиме вывод инициализации не формируется
+        if not self.quiet:
+            self._init_result_output.append(line)
 
-    def get_current_field_raw(self):
-        raw_view = []
+    def get_free_cells_mask(self):
+        """Возвращает маску свободных ячеек поля в порядке (y - 1) * ширина + (x - 1): 1 - ячейка свободна"""
 
-        for i in range(len(self.game_field)):
-            line = self.game_field[self._game_field_width - i - 1]
+        if self.board is not None:
+            return self.board.free_mask()
 
-            def get_tag(a):
-                return a.request_occupation_tag()
+        return bytes(int(spot.get_is_spot_free()) for line in self.game_field for spot in line)
 
-            raw_view.append(list(map(get_tag, line)))
+    def _get_passable_mask(self):
+        """Возвращает битовую маску свободных ячеек поля: бит с номером индекса ячейки установлен, если она свободна"""
+        return int(self.get_free_cells_mask()[::-1].translate(_mask_digits), 2)
 
-        return raw_view
+    def find_path(self, x_from, y_from, x, y):
+        """
+        Возвращает кратчайший путь между ячейками по свободным ячейкам поля с шагом на соседнюю по стороне ячейку.
+        Конечной ячейкой пути может быть ячейка с незащищенным сундуком\n
+        :param x_from: int, координата x начальной ячейки
+        :param y_from: int, координата y начальной ячейки
+        :param x: int, координата x конечной ячейки
+        :param y: int, координата y конечной ячейки
+        :return: [(int, int)], координаты ячеек пути, включая начальную и конечную, или None, если пути нет
+        """
 
-    def get_current_field_view(self):
-        """Функция для отображения игрового поля"""
+        target_spot = self.game_field[y - 1][x - 1]
+        # В ячейку с незащищенным сундуком можно войти, чтобы открыть его, но нельзя пройти через нее
+        is_enterable = target_spot.request_occupation_tag() == "t" and not target_spot.get_spot_is_protected()
+
+        path = self.distance_maps.find_path((y_from - 1) * self._game_field_width + x_from - 1,
+                                            (y - 1) * self._game_field_width + x - 1, is_enterable)
+        if path is None:
+            return None
+
+        return [(index % self._game_field_width + 1, index // self._game_field_width + 1) for index in path]
 
-        result_as_lines = []
+    def _get_enterable_mask(self):
+        """Возвращает битовую маску ячеек, в которые может переместиться персонаж: свободных и с незащищенными сундуками"""
 
-        for i in range(len(self.game_field)):
-            line = self.game_field[self._game_field_width - i - 1]
+        mask = self.distance_maps.get_passable()
+        for line in self.game_field:
+            for spot in line:
+                if spot.get_spot_is_occupied() and spot.request_occupation_tag() == "t" \
+                        and not spot.get_spot_is_protected():
+                    mask |= 1 << ((spot.y - 1) * self._game_field_width + spot.x - 1)
 
-            def get_tag(a):
-                return a.request_occupation_tag() if len(a.request_occupation_tag()) == 2 \
-                    else f' {a.request_occupation_tag()}'
+        return mask
 
-            result_as_lines.append(f"{self._game_field_width - i}| " + f"{' '.join(list(map(get_tag, line)))}")
+    def update_action_maps(self, item):
+        """Пересчитывает карту досягаемости переместившегося персонажа"""
+        self.action_maps.update_character(item.get_tag(), (item.y - 1) * self._game_field_width + item.x - 1,
+                                          item.range)
 
-            i += 1
+    def remove_action_maps(self, item):
+        """Удаляет карты погибшего персонажа или врага"""
+        self.action_maps.remove(item.get_tag())
+
+    def legal_actions(self, tag):
+        """
+        Возвращает все допустимые действия дружественного персонажа в виде команд, например "w.attack(e1)"
+        или "f.fly(3, 4)". Для каждой команды выполнены условия по энергии, дальности атаки,
+        занятости и защите ячеек, то есть команда не завершится игровой ошибкой\n
+        :param tag: str, тэг персонажа
+        :return: [str], команды в порядке: атаки, выстрелы, перемещения, перелеты, эликсиры
+        """
+
+        if tag not in self.friendly_tags:
+            raise GameError("Вы не можете отдавать команды враждебным персонажам или неигровым объектам.")
+
+        if not self.is_game_on:
+            return []
+
+        character = self.items_dict[tag]
+        index = (character.y - 1) * self._game_field_width + character.x - 1
+        actions = []
+
+        if character.aec <= character.energy:
+            enemies = [(item.get_tag(), (item.y - 1) * self._game_field_width + item.x - 1)
+                       for item in self.items_dict.values() if isinstance(item, Enemy)]
+
+            # Персонаж может атаковать врага в ближнем бою, если находится в соседней с ним ячейке
+            for enemy_tag, enemy_index in enemies:
+                if self.action_maps.get_threat(enemy_tag, enemy_index) >> index & 1:
+                    actions.append(f"{tag}.attack({enemy_tag})")
+
+            if type(character) != Warrior:
+                reach = self.action_maps.get_reach(tag, index, character.range)
+                for enemy_tag, enemy_index in enemies:
+                    if reach >> enemy_index & 1:
+                        actions.append(f"{tag}.shoot({enemy_tag})")
+
+        enterable = self.action_maps.get_enterable()
+
+        if self.movement_mode == "path":
+            distances = self.distance_maps.get_distances(index)
+
+        for target in iter_bits(enterable):
+            x = target % self._game_field_width + 1
+            y = target // self._game_field_width + 1
+
+            if self.movement_mode == "path":
+                # До ячеек с сундуками, через которые нельзя пройти, расстояние определяется поиском пути
+                distance = distances[target]
+                if distance < 0:
+                    path = self.distance_maps.find_path(index, target)
+                    distance = -1 if path is None else len(path) - 1
+                if distance < 0:
+                    continue
+            else:
+                distance = abs(character.x - x) + abs(character.y - y)
+
+            if distance * character.mec <= character.energy:
+                actions.append(f"{tag}.move({x}, {y})")
+
+        if isinstance(character, Fairy) and character.default_energy_cost <= character.energy:
+            actions += [f"{tag}.fly({target % self._game_field_width + 1}, {target // self._game_field_width + 1})"
+                        for target in iter_bits(enterable)]
+
+        for potion_name in ("health", "energy"):
+            try:
+                self.inventory.get_potion(potion_name)
+            except GameError:
+                continue
+            actions.append(f"{tag}.use({potion_name})")
+
+        return actions
+
+    def count_free_cells(self):
+        """Возвращает количество свободных ячеек поля"""
+
+        if self.board is not None:
+            return self.board.count_free()
+
+        return sum(spot.get_is_spot_free() for line in self.game_field for spot in line)
+
+    def count_occupied_cells(self):
+        """Возвращает количество ячеек поля, в которых находятся объекты"""
+
+        if self.board is not None:
+            return self.board.count_occupied()
+
+        return sum(spot.get_spot_is_occupied() for line in self.game_field for spot in line)
+
+    def _refresh_render_rows(self):
+        """Перестраивает строки изображения поля, ячейки которых изменились после предыдущей отрисовки"""
+
+        if self._render_rows is None:
+            self._render_rows = [None] * self._game_field_length
+            self._dirty_rows = bytearray(b"\x01") * self._game_field_length
+
+        row = self._dirty_rows.find(1)
+        while row >= 0:
+            if self.board is not None:
+                tags = self.board.tags(row * self._game_field_width, (row + 1) * self._game_field_width)
+            else:
+                tags = [spot.request_occupation_tag() for spot in self.game_field[row]]
+
+            line = f"{row + 1}| " + " ".join(tag if len(tag) == 2 else f" {tag}" for tag in tags)
+            self._render_rows[row] = (tags, line)
+            self._dirty_rows[row] = 0
+
+            row = self._dirty_rows.find(1, row + 1)
+
+        return self._render_rows
+
+    def get_current_field_raw(self):
+        return [list(tags) for tags, _ in reversed(self._refresh_render_rows())]
+
+    def get_current_field_view(self):
+        """Функция для отображения игрового поля"""
+
+        result_as_lines = [line for _, line in reversed(self._refresh_render_rows())]
 
         vert_lines_count = []
 
@@ -141,6 +559,15 @@ class GameEngine:
 
         return "\n".join(result_as_lines)
 
+    def next_enemy_id(self):
+        """Возвращает id для нового врага игры"""
+        self.enemies_count += 1
+        return self.enemies_count
+
+    def get_memory_footprint(self):
+        """Возвращает размер в байтах объектов, принадлежащих игре"""
+        return get_deep_size(self.game if self.game is not None else self)
+
     def get_tags(self):
         """Возвращает список тэгов, присутствующих на игровом поле (кроме сундуков с сокровищами)"""
         return self.field_tags
@@ -167,10 +594,16 @@ class GameEngine:
         self._init_treasures()
         self._init_characters()
         self._init_enemies()
+        self.reset_fingerprint()
+
+        if not self.quiet:
+            self._append_init_results_output(f"\n{self.help()}")
 
-        self._append_init_results_output(f"\n{self.help()}")
+        # Вывод инициализации нужен только для ответа игроку и не хранится в игре
+        result = "\n".join(self._init_result_output)
+        self._init_result_output = []
 
-        return "\n".join(self._init_result_output)
+        return result
 
     def _init_inventory(self):
         """Создает рюкзак и добавляет в него начальный запас эликсиров"""
@@ -181,10 +614,12 @@ class GameEngine:
         self._append_init_results_output("В рюкзак добавлены предметы:")
         health_potion = HealthPotion()
         self.inventory.add_item(health_potion)
-        self._append_init_results_output(f"* {health_potion.info()}")
+        if not self.quiet:
+            self._append_init_results_output(f"* {health_potion.info()}")
         energy_potion = EnergyPotion()
         self.inventory.add_item(energy_potion)
-        self._append_init_results_output(f"* {energy_potion.info()}")
+        if not self.quiet:
+            self._append_init_results_output(f"* {energy_potion.info()}")
 
     def _init_treasures(self):
         """Инициализирует на игровом поле сундуки с сокровищами"""
@@ -192,7 +627,7 @@ class GameEngine:
         self._append_init_results_output("\n...Инициализация сундуков с сокровищами...")
 
         for coords in self._treasures_variable_positions:
-            chest_coords = get_random_list_element(coords)
+            chest_coords = get_random_list_element(coords, self.get_rng())
             treasure_chest = TreasureChest(chest_coords[0], chest_coords[1])
             self.game_field[chest_coords[0] - 1][chest_coords[1] - 1].set_spot_owner(treasure_chest)
             self._append_init_results_output(f"В клетку ({chest_coords[1]}, {chest_coords[0]}) был добавлен сундук с сокровищем.")
@@ -209,26 +644,25 @@ class GameEngine:
             self.friendly_tags.append(character.get_tag())
             self.field_tags.append(character.get_tag())
             self.items_dict[character.get_tag()] = character
-            self._append_init_results_output(f"Создан игровой персонаж. {character.info()}")
+            if not self.quiet:
+                self._append_init_results_output(f"Создан игровой персонаж. {character.info()}")
 
     def _init_enemies(self):
         """Инициализирует на игровом поле враждебных персонажей"""
 
         self._append_init_results_output("\n...Инициализация врагов...")
 
-        for enemy_positions in self._enemies_positions:
-            coords = enemy_positions["position"]
-            enemy = Enemy(self, 1, coords[0], coords[1], False)
-            self.game_field[coords[1] - 1][coords[0] - 1].set_spot_owner(enemy)
+        # Характеристики обычных врагов генерируются одним пакетом, см. Enemy.create_batch
+        enemies = Enemy.create_batch(self, 1, [enemy_positions["position"] for enemy_positions in self._enemies_positions])
+
+        for enemy, protected_mask in zip(enemies, self._get_enemies_protected_masks()):
+            self.game_field[enemy.y - 1][enemy.x - 1].set_spot_owner(enemy)
             self.field_tags.append(enemy.get_tag())
             self.items_dict[enemy.get_tag()] = enemy
-            protected_coords = enemy_positions["protected"]
-            for protected in protected_coords:
-                spot = self.game_field[protected[1] - 1][protected[0] - 1]
-                spot.set_spot_protector(enemy)
-                enemy.add_protected_spot(spot)
+            self.add_protection(enemy, protected_mask)
 
-            self._append_init_results_output(f"* {enemy.info()}")
+            if not self.quiet:
+                self._append_init_results_output(f"* {enemy.info()}")
 
         boss = Enemy(self,
                      self.difficulty,
@@ -239,7 +673,8 @@ class GameEngine:
             .set_spot_owner(boss)
         self.field_tags.append(boss.get_tag())
         self.items_dict[boss.get_tag()] = boss
-        self._append_init_results_output(f"* {boss.info()}\n")
+        if not self.quiet:
+            self._append_init_results_output(f"* {boss.info()}\n")
 
     def add_player_action(self, subject, action, args):
         """
@@ -249,6 +684,7 @@ class GameEngine:
         :param args: list [], список аргументов действия
         """
         self.player_actions.append({"subject": subject, "action": action, "args": args})
+        self._bump_version()
 
     def get_player_actions(self):
         """Возвращает список действия персонажей игрока """
@@ -259,35 +695,48 @@ class GameEngine:
         Увеличивает счет на переданное значение\n
         :param score: int, величина, на которую увеличивается счет
         """
+        self.fingerprint ^= score_key(self.score) ^ score_key(self.score + score)
         self.score += score
+        self._bump_version()
+        self.emit_event("score", score=self.score)
 
     def decrease_score(self, score):
         """
         Уменьшает счет на переданное значение\n
         :param score: int, величина, на которую уменьшается счет
         """
+        self.fingerprint ^= score_key(self.score) ^ score_key(self.score - score)
         self.score -= score
+        self._bump_version()
+        self.emit_event("score", score=self.score)
 
     def _calculate_final_score(self):
         """Рассчитывает и возвращает итоговый игровой счет"""
         actions_score = len(self.player_actions) * self.scores["action"]
+        self.fingerprint ^= score_key(self.score) ^ score_key(self.score - actions_score)
         self.score -= actions_score
         return self.score
 
     def end_game(self, status=""):
         """Функция для завершения игры"""
+        self.fingerprint ^= game_on_key(self.is_game_on) ^ game_on_key(False)
         self.is_game_on = False
+        self._bump_version()
 
         score = self._calculate_final_score()
         game_status = "победой" if status == "success" else "поражением" if status == "failure" else "досрочно"
 
-        self.logger.log(game_id=self.game_id,
-                        game_event="Окончание игры",
-                        message=f"Игра окончена {game_status}. "
-                                + f"Было отдано {len(self.get_player_actions())} игровых команд. "
-                                + f"Игровой счет: {score}.")
+        if self.logger is not None:
+            self.logger.log(game_id=self.game_id,
+                            game_event="Окончание игры",
+                            message=f"Игра окончена {game_status}. "
+                                    + f"Было отдано {len(self.get_player_actions())} игровых команд. "
+                                    + f"Игровой счет: {score}.")
+
+        if self.game is not None:
+            self.game.set_off()
 
-        self.game.set_off()
+        self.emit_event("game_end", status=status or "ended", score=score)
 
         return f"Игра окончена. Ваш счет: {score}."
 
@@ -314,9 +763,26 @@ class GameEngine:
 
         return ''
 
+    def snapshot(self):
+        """Возвращает сохраненное состояние игры в компактном двоичном формате"""
+        return dump_engine(self)
+
+    def restore(self, data):
+        """
+        Восстанавливает состояние игры из сохраненного состояния\n
+        :param data: bytes, состояние, полученное из snapshot()
+        """
+        load_engine(self, data)
+        self.reset_fingerprint()
+        return self
+
     @staticmethod
     def help():
         """Возвращает инструкцию по игре"""
-        with open("src/help.txt", encoding='utf-8', errors='ignore') as file:
-            text = file.read()
-            return text
+
+        # Инструкция читается из файла один раз за время работы процесса
+        if GameEngine._help_text is None:
+            with open(os.path.join(os.path.dirname(__file__), "help.txt"), encoding='utf-8', errors='ignore') as file:
+                GameEngine._help_text = file.read()
+
+        return GameEngine._help_text
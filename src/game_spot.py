@@ -1,26 +1,50 @@
 class GameSpot:
     """Класс ячейки игрового поля"""
 
-    def __init__(self, x_coord, y_coord, is_occupied, spot_owner, is_protected, protectors):
+    __slots__ = ("x", "y", "index", "_is_occupied", "_owner", "_protection", "_on_change")
+
+    def __init__(self, x_coord, y_coord, is_occupied, spot_owner, protection, index):
         """
         :param x_coord: int, координата x ячейки
         :param y_coord: int, координата y ячейки
         :param is_occupied: bool, True, если в ячейке есть объект
         :param spot_owner: object, объект, расположенный в ячейке
-        :param is_protected: bool, True, если ячейка защищена врагом
-        :param protectors: [objects], список врагов, защищающих ячейку
+        :param protection: ProtectionMap, защита ячеек игрового поля врагами
+        :param index: int, индекс ячейки в ProtectionMap
         """
 
         self.x = x_coord
         self.y = y_coord
+        self.index = index
         self._is_occupied = is_occupied
         self._owner = spot_owner
-        self._is_protected = is_protected
-        self._protectors = [*protectors]
+        self._protection = protection
+
+        # Функция, вызываемая при каждом изменении ячейки
+        self._on_change = None
+
+    @property
+    def _is_protected(self):
+        return self._protection.counts[self.index] > 0
+
+    @property
+    def _protectors(self):
+        return self._protection.get_protectors(self.index)
+
+    def set_change_listener(self, listener):
+        """
+        Устанавливает функцию, которая вызывается при каждом изменении ячейки\n
+        :param listener: function, функция, принимающая измененную ячейку
+        """
+        self._on_change = listener
+
+    def _changed(self):
+        if self._on_change is not None:
+            self._on_change(self)
 
     def get_is_spot_free(self):
         """Возвращает статус ячейки. True, если в ячейке нет объекта и она не защищена врагами"""
-        return not self._is_protected and not self._is_occupied
+        return not self._is_occupied and not self._protection.counts[self.index]
 
     def get_spot_is_occupied(self):
         """Возвращает статус ячейки. True, если в ячейке находится объект"""
@@ -28,7 +52,7 @@ class GameSpot:
 
     def get_spot_is_protected(self):
         """Возвращает статус ячейки. True, если ячейка защищена врагами"""
-        return self._is_protected
+        return self._protection.counts[self.index] > 0
 
     def get_spot_owner(self):
         """Возвращает объект, расположенный в ячейке"""
@@ -36,28 +60,30 @@ class GameSpot:
 
     def get_spot_protectors(self):
         """Возвращает врагов, защищающих клетку"""
-        return self._protectors
+        return self._protection.get_protectors(self.index)
 
     def change_spot_owner(self, new_owner):
         """Изменяет объект, расположенный в ячейке"""
         self._owner = new_owner
         self._is_occupied = True
+        self._changed()
 
     def loose_spot_protection(self, enemy_id):
         """
         Удаляет врага с переданным id из списка защитников ячейки\n
         :param enemy_id: int, id врага
         """
-
-        self._protectors = list(filter(lambda protector: protector.id != enemy_id, self._protectors))
-        if len(self._protectors) == 0:
-            self._is_protected = False
+        self._protection.release(enemy_id, 1 << self.index)
+        self._changed()
 
     def set_spot_protector(self, protector):
         """Добавляет защитника для ячейки"""
+        self._protection.protect(protector, 1 << self.index)
+        self._changed()
 
-        self._protectors.append(protector)
-        self._is_protected = True
+    def protection_changed(self):
+        """Отмечает изменение защиты ячейки, выполненное через ProtectionMap"""
+        self._changed()
 
     def set_spot_owner(self, new_owner):
         """Устанавливает нового владельца ячейки - находящийся в ячейке объект"""
@@ -67,6 +93,7 @@ class GameSpot:
         else:
             self._owner = new_owner
             self._is_occupied = True
+        self._changed()
 
     def request_occupation_tag(self):
         """Возвращает тэг владельца ячейки"""
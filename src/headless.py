@@ -0,0 +1,45 @@
+import random
+
+from .game_engine import GameEngine
+from .game_controller import GameController
+
+
+class HeadlessGame:
+    """
+    Игра без ввода-вывода для массового моделирования и тестирования.
+    Игровой движок работает в тихом режиме: описания действий не формируются, журнал не ведется,
+    id игры не запрашивается у API. Результаты команд возвращаются в виде словарей,
+    все случайные события определяются генератором случайных чисел игры
+    """
+
+    def __init__(self, seed=None, game_id=0, difficulty=1, rng=None):
+        """
+        :param seed: int, зерно генератора случайных чисел игры
+        :param game_id: int, id игры
+        :param difficulty: int, уровень сложности игры
+        :param rng: random.Random, генератор случайных чисел. Если передан, seed не используется
+        """
+
+        self.game_id = game_id
+        self.rng = rng if rng is not None else random.Random(seed)
+
+        self.game_engine = GameEngine(None, game_id, None, quiet=True, rng=self.rng)
+        self.game_engine.difficulty = difficulty
+        self.game_controller = GameController(self.game_engine)
+
+    @property
+    def is_on(self):
+        return self.game_engine.is_game_on
+
+    def start(self):
+        """Инициализирует игровое поле и игровые объекты"""
+        self.game_engine.start_game()
+        return self
+
+    def perform(self, command):
+        """
+        Выполняет команду игрока\n
+        :param command: str, команда
+        :return: dict, результат команды, см. GameController._listen_command_quiet
+        """
+        return self.game_controller.listen_command(command)
@@ -1,3 +1,5 @@
+import sys
+import types
 import random
 import functools
 
@@ -22,12 +24,66 @@ class_ru_names = {
 """Словарь с русскоязычными названиями классов"""
 
 
-def get_random_list_element(values_list):
-    """Функция для получения случайного элемента из списка"""
+def get_random_list_element(values_list, rng=random):
+    """
+    Функция для получения случайного элемента из списка\n
+    :param values_list: list, список значений
+    :param rng: random.Random, генератор случайных чисел. По умолчанию - общий генератор модуля random
+    """
     if len(values_list) == 1:
         return values_list[0]
 
-    return values_list[random.randint(0, len(values_list) - 1)]
+    return values_list[rng.randint(0, len(values_list) - 1)]
+
+
+# Типы объектов, которые являются общими для всех игр и не учитываются при подсчете размера игры
+_shared_types = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+                 types.MethodType, types.CodeType)
+
+
+def iter_bits(mask):
+    """Возвращает номера установленных битов маски в порядке возрастания"""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+def get_deep_size(root):
+    """
+    Возвращает суммарный размер в байтах объекта и всех объектов, достижимых из него
+    через атрибуты экземпляров и элементы коллекций. Классы, модули и функции не учитываются
+    """
+
+    seen = set()
+    stack = [root]
+    total = 0
+
+    while stack:
+        obj = stack.pop()
+
+        if id(obj) in seen or isinstance(obj, _shared_types):
+            continue
+
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+
+        if hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+
+        for cls in type(obj).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            for slot in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+
+    return total
 
 
 def __track_class_calls__(class_declaration):
@@ -4,15 +4,47 @@ from . errors import GameError
 class Inventory:
     """Класс рюкзака игрока"""
 
-    _inventory = []
+    _inventory = None
+    _counts = None
+    _on_change = None
+
+    def __init__(self):
+        self._inventory = []
+
+        # Количество предметов каждого вида по имени класса предмета
+        self._counts = {}
+
+        # Функция, вызываемая при каждом изменении количества предметов одного вида
+        self._on_change = None
+
+    def set_change_listener(self, listener):
+        """
+        Устанавливает функцию, которая вызывается при каждом изменении содержимого рюкзака\n
+        :param listener: function, функция, принимающая имя класса предмета, прежнее и новое количество
+        """
+        self._on_change = listener
+
+    def _change_count(self, item, delta):
+        name = item.__class__.__name__
+        count = self._counts.get(name, 0)
+        self._counts[name] = count + delta
+
+        if self._on_change is not None:
+            self._on_change(name, count, count + delta)
+
+    def get_counts(self):
+        """Возвращает количество предметов каждого вида по имени класса предмета"""
+        return self._counts
 
     def del_item(self, item):
         """Удаляет переданный предмет из рюкзака"""
         self._inventory.remove(item)
+        self._change_count(item, -1)
 
     def add_item(self, item):
         """Добавляет переданный предмет в рюкзак"""
         self._inventory.append(item)
+        self._change_count(item, 1)
 
         return f"Предмет {item.name} был добавлен в рюкзак."
 
@@ -8,10 +8,20 @@ from . base_classes import GameItem
 class Treasure:
     """Класс игровых предметов"""
 
+    # Эликсиры не имеют собственных атрибутов и хранятся без словаря экземпляра.
+    # Предметы для персонажей генерируют имя и характеристики при создании и используют словарь экземпляра
+    __slots__ = ()
+
     name = "Сокровище"
     character_class = "any"
     features_for_update = {}
 
+    def __init__(self, rng=random):
+        """
+        :param rng: random.Random, генератор случайных чисел для предметов со случайными характеристиками
+        """
+        pass
+
     def use(self, character):
         """
         Использование предмет для улучшения характеристик персонажа\n
@@ -23,12 +33,18 @@ class Treasure:
                             f"Данный предмет предназначен для: {self.character_class}. "
                             f"Класс персонажа: {character.__class__.__name__}.")
         else:
+            with character.game_engine.update_features(character):
+                for feature in list(self.features_for_update.keys()):
+                    character.__setattr__(feature, character.__getattribute__(feature)
+                                          + self.features_for_update[feature])
+
+            # В тихом режиме описание результата не формируется
+            if character.game_engine.quiet:
+                return True
+
             result_str = f"Предмет \"{self.name}\" был применен. Персонаж {character.name} получил улучшения! "
 
             for feature in list(self.features_for_update.keys()):
-                character.__setattr__(feature, character.__getattribute__(feature)
-                                      + self.features_for_update[feature])
-
                 result_str += f"Характеристика \"{en_ru_features_dict[feature]}\" " \
                               f"была {'увеличена' if self.features_for_update[feature] > 0 else 'уменьшена'} " \
                               f"на {self.features_for_update[feature]}. "
@@ -53,6 +69,8 @@ class Treasure:
 class HealthPotion(Treasure):
     """Зелье здоровья"""
 
+    __slots__ = ()
+
     name = "Эликсир здоровья"
     character_class = "any"
 
@@ -64,6 +82,8 @@ class HealthPotion(Treasure):
 class EnergyPotion(Treasure):
     """Зелье энергии"""
 
+    __slots__ = ()
+
     name = "Эликсир энергии"
     character_class = "any"
 
@@ -80,9 +100,9 @@ class Staff(Treasure):
 
     item_names = ["Посох Мерлина", "Посох огня", "Посох грома", "Скипетр Зевса"]
 
-    def __init__(self):
-        self.name = get_random_list_element(self.item_names)
-        self.features_for_update = {"range": 1, "rca": random.randint(10, 20)}
+    def __init__(self, rng=random):
+        self.name = get_random_list_element(self.item_names, rng)
+        self.features_for_update = {"range": 1, "rca": rng.randint(10, 20)}
 
 
 class Sword(Treasure):
@@ -93,10 +113,10 @@ class Sword(Treasure):
 
     item_names = ["Дамоклов меч", "Меч Короля Артура", "Заточенная фальката", "Катана императора"]
 
-    def __init__(self):
-        self.name = get_random_list_element(self.item_names)
-        self.features_for_update = {"cca": random.randint(10, 30), "energy": random.randint(10, 30),
-                                    "health": random.randint(10, 30)}
+    def __init__(self, rng=random):
+        self.name = get_random_list_element(self.item_names, rng)
+        self.features_for_update = {"cca": rng.randint(10, 30), "energy": rng.randint(10, 30),
+                                    "health": rng.randint(10, 30)}
 
 
 class Bow(Treasure):
@@ -107,9 +127,9 @@ class Bow(Treasure):
 
     item_names = ["Лук Купидона", "Лук ястреба", "Английский длинный лук", "Составной лук"]
 
-    def __init__(self):
-        self.name = get_random_list_element(self.item_names)
-        self.features_for_update = {"rca": random.randint(10, 30), "energy": random.randint(10, 30)}
+    def __init__(self, rng=random):
+        self.name = get_random_list_element(self.item_names, rng)
+        self.features_for_update = {"rca": rng.randint(10, 30), "energy": rng.randint(10, 30)}
 
 
 class MagicLamp(Treasure):
@@ -118,13 +138,15 @@ class MagicLamp(Treasure):
     name = "Магическая лампа"
     character_class = "Fairy"
 
-    def __init__(self):
-        self.features_for_update = {"rca": random.randint(10, 30), "energy": random.randint(10, 30)}
+    def __init__(self, rng=random):
+        self.features_for_update = {"rca": rng.randint(10, 30), "energy": rng.randint(10, 30)}
 
 
 class TreasureChest(GameItem):
     """Сундук с сокровищами"""
 
+    __slots__ = ()
+
     content_dict = {
         "HealthPotion": HealthPotion,
         "EnergyPotion": EnergyPotion,
@@ -141,11 +163,14 @@ class TreasureChest(GameItem):
         """
         GameItem.__init__(self, x, y)
 
-    def open(self):
-        """Возвращает случайный предмет из списка возможного содержимого сундука"""
+    def open(self, rng=random):
+        """
+        Возвращает случайный предмет из списка возможного содержимого сундука\n
+        :param rng: random.Random, генератор случайных чисел игры
+        """
 
-        item = self.content_dict[get_random_list_element(list(self.content_dict.keys()))]()
-        return item
+        item_class = self.content_dict[get_random_list_element(list(self.content_dict.keys()), rng)]
+        return item_class(rng)
 
     def get_tag(self):
         """Возвращает тэг сундука"""
@@ -0,0 +1,146 @@
+from array import array
+
+
+class DistanceMaps:
+    """
+    Кэш карт расстояний игрового поля для поиска кратчайших путей.
+    Ячейки поля задаются индексами (y - 1) * ширина + (x - 1), множества ячеек - битовыми масками.
+    Карта расстояний от ячейки строится поиском в ширину по маске проходимых ячеек: каждый шаг поиска
+    расширяет фронт на соседние по стороне ячейки несколькими сдвигами маски, поэтому стоимость шага
+    не зависит от числа ячеек фронта. Карта хранится как список масок ячеек на расстоянии 0, 1, 2, ...
+    и как массив расстояний до ячеек, по которому восстанавливаются пути.
+    Все карты сбрасываются при изменении занятости или защиты ячеек поля
+    """
+
+    __slots__ = ("width", "length", "_load_passable", "_full", "_not_first_column", "_not_last_column",
+                 "_passable", "_maps", "_distances")
+
+    def __init__(self, width, length, load_passable):
+        """
+        :param width: int, ширина игрового поля
+        :param length: int, длина игрового поля
+        :param load_passable: function, функция, возвращающая битовую маску проходимых ячеек поля
+        """
+
+        self.width = width
+        self.length = length
+        self._load_passable = load_passable
+
+        first_column = sum(1 << (row * width) for row in range(length))
+        self._full = (1 << width * length) - 1
+        # Маски ячеек без первого и без последнего столбца, чтобы сдвиги на одну ячейку не переходили между строками
+        self._not_first_column = self._full ^ first_column
+        self._not_last_column = self._full ^ (first_column << (width - 1))
+
+        # Маска проходимых ячеек и карты расстояний по индексу начальной ячейки. None - маска еще не получена
+        self._passable = None
+        self._maps = {}
+        self._distances = {}
+
+    def invalidate(self):
+        """Сбрасывает маску проходимых ячеек и все карты расстояний"""
+        self._passable = None
+        if self._maps:
+            self._maps = {}
+            self._distances = {}
+
+    def neighbours(self, mask):
+        """Возвращает маску ячеек, соседних по стороне с ячейками маски"""
+        return ((mask << 1 & self._not_first_column) | (mask >> 1 & self._not_last_column)
+                | (mask << self.width & self._full) | mask >> self.width)
+
+    def get_passable(self):
+        """Возвращает маску проходимых ячеек. Маска запрашивается у поля один раз после каждого изменения"""
+        if self._passable is None:
+            self._passable = self._load_passable()
+        return self._passable
+
+    def get_layers(self, source):
+        """
+        Возвращает карту расстояний от ячейки: список масок ячеек, достижимых ровно за 0, 1, 2, ... шагов\n
+        :param source: int, индекс начальной ячейки. Сама ячейка может быть непроходимой
+        """
+
+        layers = self._maps.get(source)
+        if layers is not None:
+            return layers
+
+        passable = self.get_passable()
+        frontier = visited = 1 << source
+        layers = [frontier]
+
+        while True:
+            frontier = self.neighbours(frontier) & passable & ~visited
+            if not frontier:
+                break
+            visited |= frontier
+            layers.append(frontier)
+
+        self._maps[source] = layers
+        return layers
+
+    def get_distances(self, source):
+        """
+        Возвращает карту расстояний от ячейки в виде массива: расстояние до каждой ячейки или -1, если она недостижима\n
+        :param source: int, индекс начальной ячейки
+        """
+
+        distances = self._distances.get(source)
+        if distances is not None:
+            return distances
+
+        distances = array("i", [-1]) * (self.width * self.length)
+
+        # Номера установленных битов слоя находятся поиском единиц в двоичной записи маски,
+        # младший бит записан последним
+        for distance, layer in enumerate(self.get_layers(source)):
+            digits = bin(layer)
+            last = len(digits) - 1
+            position = digits.find("1", 2)
+            while position >= 0:
+                distances[last - position] = distance
+                position = digits.find("1", position + 1)
+
+        self._distances[source] = distances
+        return distances
+
+    def _get_neighbour_indices(self, index):
+        x = index % self.width
+        if x > 0:
+            yield index - 1
+        if x < self.width - 1:
+            yield index + 1
+        if index >= self.width:
+            yield index - self.width
+        if index + self.width < self.width * self.length:
+            yield index + self.width
+
+    def find_path(self, source, target, target_is_enterable=True):
+        """
+        Возвращает кратчайший путь между ячейками\n
+        :param source: int, индекс начальной ячейки
+        :param target: int, индекс конечной ячейки
+        :param target_is_enterable: bool, True, если в конечную ячейку можно войти, даже если через нее нельзя пройти
+        :return: [int], индексы ячеек пути от начальной до конечной включительно или None, если пути нет
+        """
+
+        distances = self.get_distances(source)
+        path = [target]
+
+        # В непроходимую конечную ячейку можно войти из ближайшей к началу соседней ячейки
+        if distances[target] < 0:
+            reachable = [(distances[index], index) for index in self._get_neighbour_indices(target)
+                         if distances[index] >= 0]
+            if not target_is_enterable or not reachable:
+                return None
+            path.append(min(reachable)[1])
+
+        # Путь восстанавливается от конца: на каждом шаге выбирается соседняя ячейка на единицу ближе к началу
+        current = path[-1]
+        while current != source:
+            distance = distances[current] - 1
+            current = next(index for index in self._get_neighbour_indices(current) if distances[index] == distance)
+            path.append(current)
+
+        path.reverse()
+        return path
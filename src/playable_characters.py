@@ -7,6 +7,8 @@ from . helpers import class_ru_names, __track_class_calls__, en_ru_features_dict
 class PlayableCharacter(GameItem, Movable):
     """Класс игровых персонажей"""
 
+    __slots__ = ("game_engine", "name", "health", "energy", "range", "cca", "rca", "aec", "mec")
+
     # Значения характеристик по умолчанию
     default_health = 200
     default_energy = 100
@@ -16,8 +18,6 @@ class PlayableCharacter(GameItem, Movable):
     default_attack_energy_cost = 5
     default_movement_energy_cost = 1
 
-    name = "Персонаж"
-
     def __init__(self, health_multiplier, energy_multiplier,
                  cca_multiplier, rca_multiplier,
                  rca_range_multiplier, attack_energy_cost_multiplier,
@@ -66,11 +66,15 @@ class PlayableCharacter(GameItem, Movable):
     def _die(self):
         """Отвечает за смерть персонажа и очистку данных, связанных с ним"""
         self.game_engine.game_field[self.y - 1][self.x - 1].set_spot_owner(None)
+        self.game_engine.toggle_fingerprint_features(self)
         self.game_engine.add_score(self.game_engine.scores["friendly_character_death"])
 
         self.game_engine.field_tags.remove(self.get_tag())
         self.game_engine.friendly_tags.remove(self.get_tag())
         del self.game_engine.items_dict[self.get_tag()]
+        self.game_engine.remove_action_maps(self)
+
+        self.game_engine.emit_event("death", tag=self.get_tag())
 
         return f"Ваш персонаж \"{self.name}\" погиб!"
 
@@ -114,17 +118,27 @@ class PlayableCharacter(GameItem, Movable):
             if self.aec > self.energy:
                 raise GameError("У персонажа недостаточно энергии для атаки!")
 
-            self.energy -= self.aec
+            with self.game_engine.update_features(self):
+                self.energy -= self.aec
 
-            result = f"Бой между \"{self.name}\" и \"{enemy.name}\" начался!"
-            result += f"\n{enemy.decrease_health(self.cca)}"
+            enemy_result = enemy.decrease_health(self.cca)
 
             damage = enemy.get_cca()
-            self.health -= damage
+            with self.game_engine.update_features(self):
+                self.health -= damage
+            self.game_engine.emit_event("damage", tag=self.get_tag(), value=damage, health=self.health)
+            death_result = self._die() if self.health <= 0 else None
+
+            # В тихом режиме описание боя не формируется
+            if self.game_engine.quiet:
+                return True
+
+            result = f"Бой между \"{self.name}\" и \"{enemy.name}\" начался!"
+            result += f"\n{enemy_result}"
             result += f"\n\"{enemy.name}\" атакует!"
             result += f"\nПерсонаж \"{self.name}\" получил {damage} урона! Осталось здоровья: {self.health}."
-            if self.health <= 0:
-                result += f"\n{self._die()}"
+            if death_result is not None:
+                result += f"\n{death_result}"
 
             return result
 
@@ -140,18 +154,28 @@ class PlayableCharacter(GameItem, Movable):
             if self.aec > self.energy:
                 raise GameError("У персонажа недостаточно энергии для выстрела!")
 
-            self.energy -= self.aec
+            with self.game_engine.update_features(self):
+                self.energy -= self.aec
 
-            result = f"Бой между \"{self.name}\" и \"{enemy.name}\" начался!"
-            result += f"\n\"{self.name}\" стреляет во врага!"
-            result += f"\n{enemy.decrease_health(self.rca)}"
+            enemy_result = enemy.decrease_health(self.rca)
 
             damage = enemy.get_rca()
-            self.health -= damage
+            with self.game_engine.update_features(self):
+                self.health -= damage
+            self.game_engine.emit_event("damage", tag=self.get_tag(), value=damage, health=self.health)
+            death_result = self._die() if self.health <= 0 else None
+
+            # В тихом режиме описание боя не формируется
+            if self.game_engine.quiet:
+                return True
+
+            result = f"Бой между \"{self.name}\" и \"{enemy.name}\" начался!"
+            result += f"\n\"{self.name}\" стреляет во врага!"
+            result += f"\n{enemy_result}"
             result += f"\n\"{enemy.name}\" атакует!"
             result += f"\nПерсонаж \"{self.name}\" получил {damage} урона! Осталось здоровья: {self.health}."
-            if self.health <= 0:
-                result += f"\n{self._die()}"
+            if death_result is not None:
+                result += f"\n{death_result}"
 
             return result
 
@@ -211,59 +235,98 @@ class PlayableCharacter(GameItem, Movable):
 
         return result
 
-    def perform_action(self, action, args):
+    def path(self, x, y):
         """
-        Выполнение персонажем переданного действия\n
-        :param action: str, действие персонажа
-        :param args: list [], список аргументов функции действия
+        Возвращает кратчайший путь персонажа до ячейки по свободным ячейкам поля и его стоимость\n
+        :param x: int, координата x ячейки назначения
+        :param y: int, координата y ячейки назначения
         """
 
-        # Проверяем, являются ли переданные координаты корректными
+        if x < 1 or y < 1:
+            raise GameError("Переданные координаты находятся за пределами игрового поля!")
+
+        path = self.game_engine.find_path(self.x, self.y, x, y)
+        if path is None:
+            raise GameError(f"Нет свободного пути до ячейки ({x}, {y}).")
+
+        steps = " -> ".join(f"({step_x}, {step_y})" for step_x, step_y in path)
+        return f"Путь до ячейки ({x}, {y}): {steps}. Длина пути {len(path) - 1}, " \
+               f"расход энергии {(len(path) - 1) * self.mec}."
+
+    def _perform_attack(self, args):
         if len(args) == 2:
-            self.check_is_valid_coords(*args)
+            return self.attack_by_coords(int(args[0]), int(args[1]))
 
-        result = str()
+        return self.attack_by_tag(args[0])
 
-        if action == "attack":
-            if len(args) == 2:
-                result = self.attack_by_coords(int(args[0]), int(args[1]))
+    def _perform_shoot(self, args):
+        if type(self) == Warrior:
+            raise GameError("Воин не умеет атаковать издалека. Попробуйте использовать атаку в ближнем бою.")
 
-            elif len(args) == 1:
-                result = self.attack_by_tag(args[0])
+        if len(args) == 2:
+            return self.shoot_by_coords(int(args[0]), int(args[1]))
 
-            else:
-                raise GameError("Неверное число аргументов.")
+        return self.shoot_by_tag(args[0])
 
-        elif action == "shoot":
-            if type(self) == Warrior:
-                raise GameError("Воин не умеет атаковать издалека. Попробуйте использовать атаку в ближнем бою.")
+    def _perform_move(self, args):
+        return self.move(int(args[0]), int(args[1]))
 
-            if len(args) == 2:
-                result = self.shoot_by_coords(int(args[0]), int(args[1]))
-            elif len(args) == 1:
-                result = self.shoot_by_tag(args[0])
-            else:
-                raise GameError("Неверное число аргументов.")
+    def _perform_fly(self, args):
+        if type(self) != Fairy:
+            raise GameError("Только феи умеют летать!")
 
-        elif action == "move":
-            if len(args) == 2:
-                result = self.move(int(args[0]), int(args[1]))
-            else:
-                raise GameError("Неверное число аргументов.")
+        return self.fly(int(args[0]), int(args[1]))
 
-        elif action == "fly":
-            if type(self) != Fairy:
-                raise GameError("Только феи умеют летать!")
-            else:
-                result = self.fly(int(args[0]), int(args[1]))
+    def _perform_use(self, args):
+        return self.use(args[0])
 
-        elif action == "use":
-            result = self.use(args[0])
+    def _perform_path(self, args):
+        return self.path(int(args[0]), int(args[1]))
 
-        else:
+    # Обработчики действий персонажа по названию действия
+    _action_handlers = {
+        "attack": _perform_attack,
+        "shoot": _perform_shoot,
+        "move": _perform_move,
+        "fly": _perform_fly,
+        "use": _perform_use,
+        "path": _perform_path
+    }
+
+    # Допустимое число аргументов каждого действия, проверяется до вызова обработчика
+    _action_arguments = {
+        "attack": (1, 2),
+        "shoot": (1, 2),
+        "move": (2,),
+        "fly": (2,),
+        "use": (1,),
+        "path": (2,)
+    }
+
+    # Действия-запросы не изменяют игру и не попадают в историю действий
+    _query_actions = ("path",)
+
+    def perform_action(self, action, args):
+        """
+        Выполнение персонажем переданного действия\n
+        :param action: str, действие персонажа
+        :param args: list [], список аргументов функции действия
+        """
+
+        handler = self._action_handlers.get(action)
+        if handler is None:
             raise GameError("Передано неверное описание действия.")
 
-        if result:
+        if len(args) not in self._action_arguments[action]:
+            raise GameError("Неверное число аргументов.")
+
+        # Проверяем, являются ли переданные координаты корректными
+        if len(args) == 2:
+            self.check_is_valid_coords(*args)
+
+        result = handler(self, args)
+
+        if result and action not in self._query_actions:
             self.game_engine.add_player_action(self, action, args)
 
         return result
@@ -272,6 +335,8 @@ class PlayableCharacter(GameItem, Movable):
 class Warrior(PlayableCharacter):
     """Воин"""
 
+    __slots__ = ()
+
     default_health_multiplier = 1
     default_energy_multiplier = 0.5
     default_cca_multiplier = 1
@@ -287,6 +352,8 @@ class Warrior(PlayableCharacter):
 class Archer(PlayableCharacter):
     """Лучник"""
 
+    __slots__ = ()
+
     default_health_multiplier = 0.5
     default_energy_multiplier = 0.5
     default_cca_multiplier = 0.5
@@ -302,6 +369,8 @@ class Archer(PlayableCharacter):
 class Mage(PlayableCharacter):
     """Маг"""
 
+    __slots__ = ()
+
     default_health_multiplier = 0.5
     default_energy_multiplier = 2
     default_cca_multiplier = 0.2
@@ -317,6 +386,8 @@ class Mage(PlayableCharacter):
 class Fairy(PlayableCharacter, Flyable):
     """Фея"""
 
+    __slots__ = ()
+
     default_health_multiplier = 0.2
     default_energy_multiplier = 1
     default_cca_multiplier = 0
@@ -0,0 +1,95 @@
+from array import array
+
+from .helpers import iter_bits
+
+
+class ProtectionMap:
+    """
+    Защита ячеек игрового поля врагами.
+    Ячейки задаются индексами (y - 1) * ширина + (x - 1), наборы ячеек - битовыми масками индексов.
+    Для каждой ячейки хранятся количество защитников и битовая маска их id,
+    защищаемые врагом ячейки хранятся в маске protected_mask врага
+    """
+
+    __slots__ = ("counts", "protectors", "protected", "enemies", "_protectors_cache")
+
+    def __init__(self, size):
+        """
+        :param size: int, количество ячеек игрового поля
+        """
+
+        self.counts = array("H", [0]) * size
+        self.protectors = [0] * size
+        # Маска ячеек, у которых есть хотя бы один защитник
+        self.protected = 0
+        # Враги, защищающие хотя бы одну ячейку, по id
+        self.enemies = {}
+        # Кортежи защитников ячеек, собранные из масок. Сбрасываются при изменении защиты ячейки
+        self._protectors_cache = [()] * size
+
+    def protect(self, enemy, mask):
+        """
+        Добавляет врагу защиту ячеек из маски\n
+        :param enemy: Enemy, защищающий враг
+        :param mask: int, маска ячеек
+        :return: int, маска ячеек, которые враг еще не защищал
+        """
+
+        added = mask & ~enemy.protected_mask
+        if not added:
+            return 0
+
+        enemy.protected_mask |= added
+        self.enemies[enemy.id] = enemy
+
+        enemy_bit = 1 << enemy.id
+        for index in iter_bits(added):
+            self.counts[index] += 1
+            self.protectors[index] |= enemy_bit
+            self._protectors_cache[index] = None
+
+        self.protected |= added
+        return added
+
+    def release(self, enemy_id, mask=None):
+        """
+        Снимает защиту врага с ячеек маски\n
+        :param enemy_id: int, id врага
+        :param mask: int, маска ячеек. Если не передана, снимается защита со всех ячеек врага
+        :return: int, маска ячеек, потерявших защитника
+        """
+
+        enemy = self.enemies.get(enemy_id)
+        if enemy is None:
+            return 0
+
+        released = enemy.protected_mask if mask is None else enemy.protected_mask & mask
+        enemy.protected_mask &= ~released
+        if not enemy.protected_mask:
+            del self.enemies[enemy_id]
+
+        enemy_bit = ~(1 << enemy_id)
+        unprotected = 0
+        for index in iter_bits(released):
+            self.counts[index] -= 1
+            self.protectors[index] &= enemy_bit
+            self._protectors_cache[index] = None
+            if not self.counts[index]:
+                unprotected |= 1 << index
+
+        self.protected &= ~unprotected
+        return released
+
+    def is_protected(self, index):
+        """Возвращает True, если у ячейки есть защитник"""
+        return self.counts[index] > 0
+
+    def get_protectors(self, index):
+        """Возвращает кортеж врагов, защищающих ячейку, в порядке их создания"""
+
+        protectors = self._protectors_cache[index]
+        if protectors is None:
+            protectors = tuple(self.enemies[enemy_id] for enemy_id in iter_bits(self.protectors[index]))
+            self._protectors_cache[index] = protectors
+
+        return protectors
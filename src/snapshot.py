@@ -0,0 +1,286 @@
+import struct
+
+from .enemy_characters import Enemy
+from .errors import GameEngineError
+from .helpers import iter_bits
+from .inventory import Inventory
+from .items import TreasureChest
+
+# Компактный двоичный формат сохраненного состояния игрового движка.
+#
+# Формат (все числа little-endian):
+# * заголовок: сигнатура b"CDG", версия формата (B)
+# * движок: id игры (q), счет (i), сложность (H), флаги (B)
+# * версия состояния игры (Q), начиная с версии формата 2
+# * сундуки: количество (B), индексы ячеек (H)
+# * персонажи игрока: количество (B), для каждого - класс (B), координаты (BB), 7 характеристик (i)
+# * враги: количество (B), для каждого - id (I), флаги (B), раса (B), класс (B), координаты (BB),
+#   здоровье, атака в дальнем и ближнем бою (iii), количество защищаемых ячеек (B) и их индексы (H)
+# * рюкзак: количество предметов (B), коды предметов (B)
+# * история действий: количество (I), для каждого - персонаж (B), действие (B), количество аргументов (B),
+#   аргументы как строки UTF-8 с длиной (B)
+#
+# Индекс ячейки вычисляется как (y - 1) * ширина + (x - 1)
+
+SNAPSHOT_MAGIC = b"CDG"
+SNAPSHOT_VERSION = 2
+SUPPORTED_SNAPSHOT_VERSIONS = (1, 2)
+
+_header = struct.Struct("<3sB")
+_engine = struct.Struct("<qiHB")
+_state_version = struct.Struct("<Q")
+_count = struct.Struct("<B")
+_action_count = struct.Struct("<I")
+_cell = struct.Struct("<H")
+_character = struct.Struct("<BBB7i")
+_enemy = struct.Struct("<IBBBBBiiiB")
+_action = struct.Struct("<BBB")
+
+_FLAG_GAME_ON = 1
+_FLAG_BOSS = 1
+_NO_CLASS = 255
+
+# Порядок характеристик персонажей игрока
+_character_features = ["health", "energy", "range", "cca", "rca", "aec", "mec"]
+
+# Коды действий персонажей
+_actions = ["attack", "shoot", "move", "fly", "use"]
+
+# Коды рас, классов врагов и предметов
+_enemy_races = list(Enemy.enemy_races.keys())
+_boss_races = list(Enemy.boss_enemy_races.keys())
+_enemy_classes = list(Enemy.enemy_classes.keys())
+_treasures = list(TreasureChest.content_dict.keys())
+
+
+def _cell_index(engine, x, y):
+    return (y - 1) * engine.get_width() + (x - 1)
+
+
+def _cell_coords(engine, index):
+    return index % engine.get_width() + 1, index // engine.get_width() + 1
+
+
+def dump_engine(engine):
+    """
+    Сериализует состояние игрового движка\n
+    :param engine: GameEngine, игровой движок
+    :return: bytes, сохраненное состояние
+    """
+
+    character_tags = [key[0] for key in engine._friendly_classes.keys()]
+
+    parts = [_header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION),
+             _engine.pack(int(engine.game_id), engine.score, engine.difficulty,
+                          _FLAG_GAME_ON if engine.is_game_on else 0),
+             _state_version.pack(engine.state_version)]
+
+    _dump_position(engine, parts, character_tags)
+
+    actions = engine.get_player_actions()
+    parts.append(_action_count.pack(len(actions)))
+    for action in actions:
+        args = [str(arg).encode("utf-8") for arg in action["args"]]
+        parts.append(_action.pack(character_tags.index(action["subject"].get_tag()),
+                                  _actions.index(action["action"]), len(args)))
+        for arg in args:
+            parts.append(_count.pack(len(arg)))
+            parts.append(arg)
+
+    return b"".join(parts)
+
+
+def dump_position(engine):
+    """
+    Сериализует позицию игры: счет, признак продолжения игры, сундуки, персонажей, врагов и рюкзак,
+    без id игры, версии состояния и истории действий. Позиции, полученные разными последовательностями действий,
+    совпадают, поэтому результат используется как ключ при поиске одинаковых состояний\n
+    :param engine: GameEngine, игровой движок
+    :return: bytes
+    """
+
+    character_tags = [key[0] for key in engine._friendly_classes.keys()]
+    parts = [_engine.pack(0, engine.score, engine.difficulty, _FLAG_GAME_ON if engine.is_game_on else 0)]
+    _dump_position(engine, parts, character_tags)
+
+    return b"".join(parts)
+
+
+def _dump_position(engine, parts, character_tags):
+    """Добавляет в parts сундуки, персонажей, врагов и рюкзак"""
+
+    chests = []
+    characters = []
+    enemies = []
+
+    for row in engine.game_field:
+        for spot in row:
+            if not spot.get_spot_is_occupied():
+                continue
+
+            owner = spot.get_spot_owner()
+            if isinstance(owner, TreasureChest):
+                chests.append(_cell_index(engine, spot.x, spot.y))
+            elif isinstance(owner, Enemy):
+                enemies.append(owner)
+            else:
+                characters.append(owner)
+
+    parts.append(_count.pack(len(chests)))
+    parts.extend(_cell.pack(index) for index in chests)
+
+    parts.append(_count.pack(len(characters)))
+    for character in characters:
+        parts.append(_character.pack(character_tags.index(character.get_tag()), character.x, character.y,
+                                     *[int(getattr(character, feature)) for feature in _character_features]))
+
+    # Враги записываются в порядке создания, чтобы сохранить порядок защитников ячеек
+    enemies.sort(key=lambda item: item.id)
+
+    parts.append(_count.pack(len(enemies)))
+    for enemy in enemies:
+        races = _boss_races if enemy.is_boss else _enemy_races
+        enemy_class = _NO_CLASS if enemy.enemy_class is None else _enemy_classes.index(enemy.enemy_class)
+        protected = list(iter_bits(enemy.get_protected_mask()))
+
+        parts.append(_enemy.pack(enemy.id, _FLAG_BOSS if enemy.is_boss else 0, races.index(enemy.race),
+                                 enemy_class, enemy.x, enemy.y, int(enemy.health), int(enemy.rca), int(enemy.cca),
+                                 len(protected)))
+        parts.extend(_cell.pack(index) for index in protected)
+
+    items = engine.inventory._inventory if engine.inventory is not None else []
+    parts.append(_count.pack(len(items)))
+    parts.extend(_count.pack(_treasures.index(item.__class__.__name__)) for item in items)
+
+
+class _Reader:
+    """Последовательное чтение структур из буфера"""
+
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def read(self, structure):
+        values = structure.unpack_from(self.data, self.offset)
+        self.offset += structure.size
+        return values
+
+    def read_one(self, structure):
+        return self.read(structure)[0]
+
+    def read_bytes(self, size):
+        if self.offset + size > len(self.data):
+            raise struct.error("unexpected end of data")
+
+        value = self.data[self.offset: self.offset + size]
+        self.offset += size
+        return value
+
+
+def load_engine(engine, data):
+    """
+    Восстанавливает состояние игрового движка из сохраненного состояния.
+    Текущее состояние движка полностью заменяется\n
+    :param engine: GameEngine, игровой движок
+    :param data: bytes, состояние, полученное из dump_engine
+    """
+
+    try:
+        _load(engine, _Reader(data))
+    except (struct.error, IndexError, KeyError, UnicodeDecodeError) as err:
+        raise GameEngineError(f"Сохраненное состояние игры повреждено: {err}")
+
+
+def _load(engine, reader):
+    magic, version = reader.read(_header)
+    if magic != SNAPSHOT_MAGIC:
+        raise GameEngineError("Переданные данные не являются сохраненным состоянием игры.")
+    if version not in SUPPORTED_SNAPSHOT_VERSIONS:
+        raise GameEngineError(f"Неподдерживаемая версия формата сохраненного состояния: {version}.")
+
+    game_id, score, difficulty, flags = reader.read(_engine)
+
+    # В первой версии формата версия состояния не сохранялась.
+    # Состояние считается новым, чтобы клиенты запросили поле целиком
+    state_version = reader.read_one(_state_version) if version >= 2 else 1
+
+    engine.game_id = game_id
+    engine.score = score
+    engine.difficulty = difficulty
+    engine.is_game_on = bool(flags & _FLAG_GAME_ON)
+    engine.game_field = []
+    engine.field_tags = []
+    engine.friendly_tags = []
+    engine.items_dict = {}
+    engine.player_actions = []
+    engine._init_empty_game_field()
+
+    def spot_at(x, y):
+        return engine.game_field[y - 1][x - 1]
+
+    for _ in range(reader.read_one(_count)):
+        x, y = _cell_coords(engine, reader.read_one(_cell))
+        # Координаты сундука передаются в том же порядке, что и при создании игры, см. GameEngine._init_treasures
+        spot_at(x, y).set_spot_owner(TreasureChest(y, x))
+
+    character_codes = list(engine._friendly_classes.keys())
+
+    for _ in range(reader.read_one(_count)):
+        code, x, y, *features = reader.read(_character)
+        character = engine._friendly_classes[character_codes[code]](x, y, engine)
+        for feature, value in zip(_character_features, features):
+            setattr(character, feature, value)
+
+        spot_at(x, y).set_spot_owner(character)
+        engine.friendly_tags.append(character.get_tag())
+        engine.field_tags.append(character.get_tag())
+        engine.items_dict[character.get_tag()] = character
+
+    for _ in range(reader.read_one(_count)):
+        enemy_id, flags, race, enemy_class, x, y, health, rca, cca, protected_count = reader.read(_enemy)
+        is_boss = bool(flags & _FLAG_BOSS)
+        races = _boss_races if is_boss else _enemy_races
+
+        enemy = Enemy.restore(engine, enemy_id, is_boss, races[race],
+                              None if enemy_class == _NO_CLASS else _enemy_classes[enemy_class],
+                              x, y, health, rca, cca)
+
+        spot_at(x, y).set_spot_owner(enemy)
+        engine.field_tags.append(enemy.get_tag())
+        engine.items_dict[enemy.get_tag()] = enemy
+
+        protected_mask = 0
+        for _ in range(protected_count):
+            protected_mask |= 1 << reader.read_one(_cell)
+        engine.add_protection(enemy, protected_mask)
+
+    engine.inventory = Inventory()
+    for _ in range(reader.read_one(_count)):
+        engine.inventory.add_item(TreasureChest.content_dict[_treasures[reader.read_one(_count)]]())
+
+    # Персонажи, которые уже погибли, восстанавливаются вне игрового поля,
+    # чтобы история действий ссылалась на объекты персонажей
+    detached_characters = {}
+
+    for _ in range(reader.read_one(_action_count)):
+        code, action, args_count = reader.read(_action)
+        args = [reader.read_bytes(reader.read_one(_count)).decode("utf-8") for _ in range(args_count)]
+
+        tag = character_codes[code][0]
+        subject = engine.items_dict.get(tag)
+        if subject is None:
+            if tag not in detached_characters:
+                detached_characters[tag] = engine._friendly_classes[character_codes[code]](0, 0, engine)
+            subject = detached_characters[tag]
+
+        engine.player_actions.append({"subject": subject, "action": _actions[action], "args": args})
+
+    if reader.offset != len(reader.data):
+        raise GameEngineError("Сохраненное состояние игры содержит лишние данные.")
+
+    engine.enemies_count = max([enemy.id for enemy in engine.items_dict.values() if isinstance(enemy, Enemy)],
+                               default=0)
+
+    # Изменения по отдельным ячейкам не сохраняются, поэтому все ячейки отмечаются измененными в текущей версии
+    engine.state_version = state_version
+    engine._cell_versions = [state_version] * len(engine._cell_versions)
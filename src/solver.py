@@ -0,0 +1,292 @@
+import os
+import time
+import random
+import multiprocessing
+
+from .game_engine import GameEngine
+from . import game_controller
+from .enemy_characters import Enemy
+from .commands import parse_command
+
+
+# Поиск последовательности действий, максимизирующей итоговый счет игры
+#
+# Итоговый счет - счет игры за вычетом штрафа за каждое действие, см. GameEngine._calculate_final_score.
+# Поиск лучевой: на каждой глубине раскрываются все состояния луча, из их потомков в следующий луч
+# отбираются beam_width лучших по оценке. Одинаковые позиции, полученные разными последовательностями
+# действий, отбрасываются по таблице транспозиций, ключ которой - отпечаток состояния игры:
+# позиция раскрывается повторно, только если до нее дошли меньшим числом действий.
+# Состояния хранятся в виде сохраненных состояний игры (snapshot), каждый потомок восстанавливается
+# из состояния родителя и выполняет одно действие в тихом режиме.
+# Сундуки в копиях игры открываются генератором случайных чисел с фиксированным зерном,
+# поэтому результат поиска для одного состояния воспроизводим.
+
+
+class SolverResult:
+    """
+    Результат поиска\n
+    commands - лучшая найденная последовательность команд, score - итоговый счет после нее
+    (счет при завершении игры сразу после последней команды), nodes - число созданных состояний,
+    depth - достигнутая глубина, elapsed - время поиска в секундах,
+    stop_reason - "exhausted", "depth", "nodes" или "time"
+    """
+
+    __slots__ = ("commands", "score", "nodes", "depth", "elapsed", "stop_reason")
+
+    def __init__(self, commands, score, nodes, depth, elapsed, stop_reason):
+        self.commands = commands
+        self.score = score
+        self.nodes = nodes
+        self.depth = depth
+        self.elapsed = elapsed
+        self.stop_reason = stop_reason
+
+    def __repr__(self):
+        return (f"SolverResult(score={self.score}, commands={self.commands!r}, nodes={self.nodes}, "
+                f"depth={self.depth}, elapsed={self.elapsed:.3f}, stop_reason={self.stop_reason!r})")
+
+
+class _Node:
+    """Состояние поиска: сохраненное состояние игры, команды от корня, итоговый счет и оценка"""
+
+    __slots__ = ("snapshot", "commands", "score", "estimate", "is_final")
+
+    def __init__(self, snapshot, commands, score, estimate, is_final):
+        self.snapshot = snapshot
+        self.commands = commands
+        self.score = score
+        self.estimate = estimate
+        self.is_final = is_final
+
+
+def _engine_settings(engine):
+    """
+    Настройки игры, не входящие в сохраненное состояние: способ хранения поля и способ перемещения.
+    Копии игры создаются с настройками исходной игры, а не с настройками из переменных окружения
+    """
+    return engine.board_backend, engine.movement_mode
+
+
+def _restore(snapshot, settings):
+    engine = GameEngine(None, 0, None, quiet=True, rng=random.Random(0))
+    engine.board_backend, engine.movement_mode = settings
+    return engine.restore(snapshot)
+
+
+def _final_score(engine):
+    """Итоговый счет, если завершить игру в текущем состоянии. У завершенной игры штраф уже вычтен из счета"""
+    if not engine.is_game_on:
+        return engine.score
+    return engine.score - len(engine.player_actions) * engine.scores["action"]
+
+
+class Solver:
+    """
+    Поиск действий с наибольшим итоговым счетом для состояния игры.
+    Используется для подсказок игроку и как тяжелая вычислительная нагрузка для проверки производительности движка
+    """
+
+    def __init__(self, beam_width=2, max_depth=60, node_budget=20000, time_budget=None, processes=1,
+                 all_moves=False):
+        """
+        :param beam_width: int, число лучших состояний, раскрываемых на каждой глубине
+        :param max_depth: int, максимальная длина последовательности действий
+        :param node_budget: int, максимальное число создаваемых состояний
+        :param time_budget: float, максимальное время поиска в секундах, None - без ограничения
+        :param processes: int, число процессов. Потомки начального состояния делятся между процессами,
+        каждый процесс ведет собственный поиск со своей таблицей транспозиций и своей долей бюджета
+        :param all_moves: bool, False - рассматриваются только перемещения к врагам и сундукам, True - все
+        """
+
+        self.beam_width = beam_width
+        self.max_depth = max_depth
+        self.node_budget = node_budget
+        self.time_budget = time_budget
+        self.processes = processes
+        self.all_moves = all_moves
+
+    def _estimate(self, engine, score, initial_health):
+        """
+        Оценка состояния для отбора в луч: итоговый счет и половина награды за врагов,
+        пропорционально нанесенному им урону
+        """
+
+        estimate = score
+        for tag, health in initial_health.items():
+            enemy = engine.items_dict.get(tag)
+            if enemy is not None and health > 0:
+                reward = engine.scores["boss"] if enemy.is_boss else engine.scores["enemy"]
+                estimate += reward * 0.5 * max(0, health - enemy.health) / health
+
+        return estimate
+
+    def _useful_cells(self, engine):
+        """Маска ячеек, перемещение в которые имеет смысл: соседние с врагами и с незащищенными сундуками"""
+
+        mask = 0
+        for item in engine.items_dict.values():
+            if isinstance(item, Enemy):
+                index = (item.y - 1) * engine.get_width() + item.x - 1
+                mask |= engine.action_maps.get_threat(item.get_tag(), index)
+
+        enterable = engine.action_maps.get_enterable()
+        return mask | (enterable & ~engine.distance_maps.get_passable())
+
+    def _candidate_commands(self, engine):
+        commands = []
+        useful = None if self.all_moves else self._useful_cells(engine)
+
+        for tag in list(engine.friendly_tags):
+            for command in engine.legal_actions(tag):
+                if useful is not None:
+                    parsed = parse_command(command)
+                    if parsed.action in ("move", "fly"):
+                        x, y = int(parsed.args[0]), int(parsed.args[1])
+                        if not useful >> ((y - 1) * engine.get_width() + x - 1) & 1:
+                            continue
+                commands.append(command)
+
+        return commands
+
+    def _expand(self, node, settings, initial_health, transpositions):
+        """
+        Возвращает потомков состояния, по одному на каждую допустимую команду, и число выполненных команд.
+        Потомки, позиции которых уже достигнуты не большим числом действий, не возвращаются
+        """
+
+        engine = _restore(node.snapshot, settings)
+        actions = len(node.commands) + 1
+        children = []
+        performed = 0
+
+        for command in self._candidate_commands(engine):
+            child = _restore(node.snapshot, settings)
+            result = game_controller.GameController(child).listen_command(command)
+            if not result["ok"]:
+                continue
+
+            performed += 1
+            fingerprint = child.get_fingerprint()
+            if transpositions.get(fingerprint, actions + 1) <= actions:
+                continue
+            transpositions[fingerprint] = actions
+
+            score = _final_score(child)
+            children.append(_Node(child.snapshot(), node.commands + [command], score,
+                                  self._estimate(child, score, initial_health), not child.is_game_on))
+
+        return children, performed
+
+    def _search(self, roots, settings, initial_health, node_budget, deadline):
+        """Лучевой поиск от переданных состояний. Возвращает лучшее состояние, число состояний, глубину и причину"""
+
+        best = max(roots, key=lambda item: item.score)
+        beam = [node for node in roots if not node.is_final]
+        transpositions = {}
+        nodes = 0
+        depth = 0
+        stop_reason = "exhausted"
+
+        while beam:
+            if depth >= self.max_depth:
+                stop_reason = "depth"
+                break
+
+            candidates = []
+            for node in beam:
+                if nodes >= node_budget:
+                    stop_reason = "nodes"
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    stop_reason = "time"
+                    break
+
+                children, performed = self._expand(node, settings, initial_health, transpositions)
+                nodes += performed
+
+                for child in children:
+                    if child.score > best.score:
+                        best = child
+                    if not child.is_final:
+                        candidates.append(child)
+
+            if stop_reason != "exhausted":
+                break
+
+            depth += 1
+            candidates.sort(key=lambda item: item.estimate, reverse=True)
+            beam = candidates[:self.beam_width]
+
+        return best, nodes, depth, stop_reason
+
+    def solve(self, engine):
+        """
+        Ищет лучшую последовательность действий для состояния игры. Переданная игра не изменяется\n
+        :param engine: GameEngine, игровой движок
+        :return: SolverResult
+        """
+
+        started = time.perf_counter()
+        deadline = None if self.time_budget is None else started + self.time_budget
+
+        snapshot = engine.snapshot()
+        settings = _engine_settings(engine)
+        root_engine = _restore(snapshot, settings)
+        initial_health = {item.get_tag(): item.health for item in root_engine.items_dict.values()
+                          if isinstance(item, Enemy)}
+        root_score = _final_score(root_engine)
+        root = _Node(snapshot, [], root_score, self._estimate(root_engine, root_score, initial_health),
+                     not root_engine.is_game_on)
+
+        if self.processes == 1 or root.is_final:
+            best, nodes, depth, stop_reason = self._search([root], settings, initial_health, self.node_budget, deadline)
+            return SolverResult(best.commands, best.score, nodes, depth, time.perf_counter() - started, stop_reason)
+
+        # Потомки начального состояния распределяются между процессами по кругу в порядке оценки
+        children, performed = self._expand(root, settings, initial_health, {})
+        children.sort(key=lambda item: item.estimate, reverse=True)
+
+        processes = self.processes or os.cpu_count() or 1
+        groups = [children[index::processes] for index in range(processes) if children[index::processes]]
+        tasks = [(self, group, settings, initial_health, max(1, (self.node_budget - performed) // len(groups)), deadline)
+                 for group in groups]
+
+        best, nodes, depth, stop_reason = root, performed, 0, "exhausted"
+        if not tasks:
+            return SolverResult(best.commands, best.score, nodes, depth, time.perf_counter() - started, stop_reason)
+
+        with multiprocessing.Pool(len(tasks)) as pool:
+            for group_best, group_nodes, group_depth, group_stop_reason in pool.starmap(_search_group, tasks):
+                nodes += group_nodes
+                depth = max(depth, group_depth + 1)
+                if group_stop_reason != "exhausted":
+                    stop_reason = group_stop_reason
+                if group_best.score > best.score:
+                    best = group_best
+
+        return SolverResult(best.commands, best.score, nodes, depth, time.perf_counter() - started, stop_reason)
+
+
+def _search_group(solver, roots, settings, initial_health, node_budget, deadline):
+    """Поиск от группы состояний в процессе пула"""
+    return solver._search(roots, settings, initial_health, node_budget, deadline)
+
+
+def get_hint(engine, time_budget=None, node_budget=None):
+    """
+    Возвращает подсказку для игрока: лучшую следующую команду и ожидаемый итоговый счет\n
+    :param engine: GameEngine, игровой движок
+    :param time_budget: float, время поиска в секундах. По умолчанию - переменная окружения HINT_TIME_BUDGET или 1
+    :param node_budget: int, число состояний поиска. По умолчанию - переменная окружения HINT_NODE_BUDGET или 3000
+    :return: str
+    """
+
+    solver = Solver(time_budget=time_budget if time_budget is not None else float(os.getenv("HINT_TIME_BUDGET", 1)),
+                    node_budget=node_budget if node_budget is not None else int(os.getenv("HINT_NODE_BUDGET", 3000)))
+    result = solver.solve(engine)
+
+    if not result.commands:
+        return f"Подходящих действий не найдено: любые действия только уменьшат итоговый счет ({result.score})."
+
+    return (f"Совет: {result.commands[0]}. Ожидаемый итоговый счет {result.score} "
+            f"после {len(result.commands)} действий: {', '.join(result.commands)}.")
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from src.headless import HeadlessGame
+
+
+def _new_game(seed, board_backend="objects", movement_mode="manhattan", difficulty=1):
+    game = HeadlessGame(seed=seed, game_id=seed, difficulty=difficulty)
+    game.game_engine.board_backend = board_backend
+    game.game_engine.movement_mode = movement_mode
+    return game.start()
+
+
+def _playout(game, seed, max_commands=200):
+    """Выполняет в игре случайные допустимые команды и возвращает их по одной вместе с результатами"""
+    rng = random.Random(seed)
+    engine = game.game_engine
+
+    for _ in range(max_commands):
+        if not engine.is_game_on:
+            return
+
+        commands = [command for tag in list(engine.friendly_tags) for command in engine.legal_actions(tag)]
+        if not commands:
+            return
+
+        command = rng.choice(commands)
+        yield command, game.perform(command)
+
+
+@pytest.fixture
+def new_game():
+    """Создает и запускает игру без ввода-вывода с заданным способом хранения поля и перемещения"""
+    return _new_game
+
+
+@pytest.fixture
+def playout():
+    """Генератор случайных допустимых команд игры, см. _playout"""
+    return _playout
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: замеры производительности, результаты выводятся при запуске с -s")
@@ -0,0 +1,67 @@
+import pytest
+
+from src.action_maps import ActionMaps
+
+
+def test_square_is_clipped_by_field_borders():
+    maps = ActionMaps(4, 3, lambda: 0)
+
+    assert maps.get_square(0, 1) == 0b0011_0011
+    assert maps.get_square(5, 1) == 0b0111_0111_0111
+    assert maps.get_square(11, 2) == 0b1110_1110_1110
+
+
+def test_reach_is_rebuilt_after_move():
+    maps = ActionMaps(4, 3, lambda: 0)
+
+    reach = maps.get_reach("a", 0, 1)
+    assert maps.get_reach("a", 0, 1) is reach
+    # После перемещения или изменения дальности атаки карта пересчитывается
+    assert maps.get_reach("a", 11, 1) == 0b1100_1100_0000
+    assert maps.get_reach("a", 11, 2) == 0b1110_1110_1110
+
+    assert maps.get_threat("e1", 5) == 0b0111_0101_0111
+    maps.remove("a")
+    maps.remove("e1")
+    assert maps.reach == {} and maps.threats == {}
+
+
+def _candidates(engine, tag):
+    """Все команды персонажа с существующими действиями и аргументами в пределах поля"""
+    commands = [f"{tag}.{action}({target})" for action in ("attack", "shoot") for target in engine.get_tags()]
+    commands += [f"{tag}.{action}({x}, {y})" for action in ("move", "fly")
+                 for y in range(1, engine.get_length() + 1) for x in range(1, engine.get_width() + 1)]
+    commands += [f"{tag}.use({potion_name})" for potion_name in ("health", "energy")]
+    return commands
+
+
+def _check_legal_actions(game):
+    """Команды legal_actions выполняются без ошибок, остальные команды персонажей отклоняются движком"""
+    engine = game.game_engine
+    before = engine.snapshot()
+
+    for tag in list(engine.friendly_tags):
+        legal = engine.legal_actions(tag)
+        assert len(legal) == len(set(legal))
+
+        accepted = []
+        for command in _candidates(engine, tag):
+            if game.perform(command)["ok"]:
+                accepted.append(command)
+            engine.restore(before)
+
+        assert sorted(accepted) == sorted(legal), tag
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+@pytest.mark.parametrize("movement_mode", ["manhattan", "path"])
+@pytest.mark.parametrize("seed", range(2))
+def test_legal_actions_match_accepted_commands(new_game, playout, board_backend, movement_mode, seed):
+    game = new_game(seed, board_backend=board_backend, movement_mode=movement_mode)
+    _check_legal_actions(game)
+
+    # Действия проверяются и после перемещений, атак, открытия сундуков и гибели персонажей
+    for step, (command, result) in enumerate(playout(game, seed, max_commands=40)):
+        assert result["ok"], command
+        if step % 8 == 7 and game.is_on:
+            _check_legal_actions(game)
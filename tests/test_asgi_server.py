@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+
+from server.asgi_server import AsgiApp
+from server.server import App
+
+
+async def _call(app, method, path, payload=None):
+    messages = [{"type": "http.request", "body": json.dumps(payload or {}).encode(), "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path,
+               "headers": [(b"content-type", b"application/json")]}, receive, send)
+
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv("SESSION_STORE", "memory")
+    monkeypatch.setenv("GAME_POOL_SIZE", "0")
+    return App(io_stream="web")
+
+
+def test_perform(app):
+    asgi = AsgiApp(app)
+    payload, status = app.handle_init(1)
+    assert status == 200
+
+    status, payload = asyncio.run(_call(asgi, "POST", "/perform", {"game_id": 1, "command": "print_field"}))
+    assert status == 200
+    assert payload["is_on"] is True
+
+
+def test_slow_command_does_not_block_event_loop(app, monkeypatch):
+    # Пока одна команда выполняется, цикл событий продолжает отвечать на другие запросы
+    release = threading.Event()
+
+    def slow_perform(data):
+        release.wait(5)
+        return {"game_id": data["game_id"]}, 200
+
+    monkeypatch.setattr(app, "handle_perform", slow_perform)
+    asgi = AsgiApp(app)
+
+    async def scenario():
+        perform = asyncio.ensure_future(_call(asgi, "POST", "/perform", {"game_id": 1, "command": "hint"}))
+        started = time.monotonic()
+        status, _ = await _call(asgi, "GET", "/stats")
+        elapsed = time.monotonic() - started
+
+        assert not perform.done()
+        release.set()
+        await perform
+
+        return status, elapsed
+
+    status, elapsed = asyncio.run(scenario())
+    assert status == 200
+    assert elapsed < 1
+
+
+@pytest.mark.parametrize("path", ["/perform", "/end", "/field"])
+def test_invalid_json_is_rejected(app, path):
+    asgi = AsgiApp(app)
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"{not json", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi({"type": "http", "method": "POST", "path": path,
+                      "headers": [(b"content-type", b"application/json")]}, receive, send))
+
+    assert sent[0]["status"] == 400
+    assert "error" in json.loads(sent[1]["body"])
+
+
+def test_executor_size(app, monkeypatch):
+    monkeypatch.setenv("ASGI_THREADS", "4")
+
+    assert AsgiApp(app).executor._max_workers == 4
+    assert AsgiApp(app, threads=2).executor._max_workers == 2
@@ -0,0 +1,53 @@
+from src.balance import BalanceReport, Distribution, evaluate, greedy_policy, play_game, random_policy
+
+
+def test_play_game_is_deterministic():
+    for policy in (greedy_policy, random_policy):
+        for seed in range(3):
+            assert play_game(seed, 1, policy, max_commands=200) == play_game(seed, 1, policy, max_commands=200)
+
+
+def test_greedy_policy_wins_games():
+    outcomes = [play_game(seed, 1, greedy_policy)["outcome"] for seed in range(20)]
+
+    assert "success" in outcomes
+    assert "limit" not in outcomes
+
+
+def test_percentiles():
+    distribution = Distribution()
+    for value in range(1, 101):
+        distribution.add(value)
+
+    assert distribution.percentiles() == {5: 5, 25: 25, 50: 50, 75: 75, 95: 95}
+    assert distribution.mean() == 50.5
+
+    # Ближайший ранг: процентиль - наименьшее значение, не меньше которого заданная доля значений
+    skewed = Distribution()
+    for value in (1, 1, 1, 10):
+        skewed.add(value)
+    assert skewed.percentiles((50, 75, 76, 100)) == {50: 1, 75: 1, 76: 10, 100: 10}
+
+    assert Distribution().percentiles((50,)) == {50: None}
+
+
+def test_merged_reports_match_single_report():
+    records = [(difficulty, play_game(seed, difficulty, greedy_policy, max_commands=100))
+               for difficulty in (1, 2) for seed in range(4)]
+
+    single = BalanceReport()
+    for difficulty, record in records:
+        single.add_game(difficulty, record)
+
+    first, second = BalanceReport(), BalanceReport()
+    for number, (difficulty, record) in enumerate(records):
+        (first if number % 2 else second).add_game(difficulty, record)
+
+    assert BalanceReport().merge(first).merge(second).summary() == single.summary()
+    assert sum(single.difficulties[1].outcomes.values()) == 4
+
+
+def test_evaluate_without_pool_matches_pool():
+    arguments = dict(games=6, difficulties=(1, 2), seed=3, chunk_size=2, max_commands=100)
+
+    assert evaluate(processes=1, **arguments).summary() == evaluate(processes=2, **arguments).summary()
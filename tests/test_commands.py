@@ -0,0 +1,140 @@
+import random
+import timeit
+
+import pytest
+
+from src.commands import parse_command
+from src.errors import GameError
+from src.game_controller import GameController
+from src.game_engine import GameEngine
+
+
+@pytest.mark.parametrize("text, kind, tag, action, args", [
+    ("help", "help", None, None, ()),
+    ("help()", "help", None, None, ()),
+    ("print_field", "print_field", None, None, ()),
+    ("end_game", "end_game", None, None, ()),
+    ("repeat()", "repeat", None, None, ()),
+    ("hint", "hint", None, None, ()),
+    ("info(w)", "info", None, None, ("w",)),
+    ("info(inv)", "info", None, None, ("inv",)),
+    ("info( 3 , 4 )", "info", None, None, ("3", "4")),
+    ("actions(w)", "actions", None, None, ("w",)),
+    ("w.move(2,3)", "action", "w", "move", ("2", "3")),
+    ("w . move ( 2 , 3 )", "action", "w", "move", ("2", "3")),
+    ("e1.attack(w)", "action", "e1", "attack", ("w",)),
+    ("m.use(energy)", "action", "m", "use", ("energy",)),
+    ("a.shoot(e12)  ", "action", "a", "shoot", ("e12",)),
+    ("w.wait()", "action", "w", "wait", ()),
+])
+def test_parse(text, kind, tag, action, args):
+    command = parse_command(text)
+
+    assert (command.kind, command.tag, command.action, command.args) == (kind, tag, action, args)
+
+
+@pytest.mark.parametrize("text, position", [
+    ("", 1),
+    ("w.move", 7),
+    ("w.move(1,)", 10),
+    ("w.move(1, 1) extra", 14),
+    ("w.move(1 1)", 10),
+    ("w.(1,1)", 3),
+    ("info", 5),
+    ("info(3,4", 9),
+    ("w.move(-1,2)", 8),
+    ("5.move(1,1)", 1),
+])
+def test_syntax_error_position(text, position):
+    with pytest.raises(GameError, match=rf"\(позиция {position}\)"):
+        parse_command(text)
+
+
+@pytest.mark.parametrize("text", ["helpme", "x", "help(1)", "repeat(w)"])
+def test_unknown_or_invalid_command(text):
+    with pytest.raises(GameError):
+        parse_command(text)
+
+
+def test_results_are_cached():
+    parse_command.cache_clear()
+
+    assert parse_command("w.move(1,1)") is parse_command("w.move(1,1)")
+    assert parse_command.cache_info().hits == 1
+
+
+def _controller(seed=1):
+    engine = GameEngine(None, seed, None, rng=random.Random(seed))
+    engine.start_game()
+    return GameController(engine)
+
+
+@pytest.mark.parametrize("text", ["helpme", "w.move", "w.move(1,)", "x.move(1,1)", "w.jump(1,1)", "info(9,9)",
+                                  "info(1,2,3)", "w.move(1, 1) extra"])
+def test_controller_rejects_invalid_commands(text):
+    controller = _controller()
+    before = controller.game_engine.snapshot()
+
+    result = controller.listen_command(text)
+
+    assert controller.last_command_failed
+    assert result.startswith("Операция не может быть выполнена.")
+    assert controller.game_engine.snapshot() == before
+
+
+@pytest.mark.parametrize("text", ["w.use()", "w.use(health, 1)", "f.fly(1)", "f.fly()", "w.move(1)",
+                                  "w.attack()", "a.shoot(1, 2, 3)", "w.path(1)"])
+def test_controller_rejects_wrong_number_of_arguments(text):
+    controller = _controller()
+    before = controller.game_engine.snapshot()
+
+    result = controller.listen_command(text)
+
+    assert controller.last_command_failed
+    assert result == "Операция не может быть выполнена. Неверное число аргументов.\n"
+    assert controller.game_engine.snapshot() == before
+
+
+def test_controller_accepts_spaces_and_case():
+    controller = _controller()
+
+    assert controller.listen_command("INFO( W )") == controller.listen_command("info(w)")
+    assert not controller.last_command_failed
+
+
+def _split_command(text):
+    """Разбор команды срезами строки, как до введения грамматики команд, для сравнения в замерах"""
+
+    if "." not in text:
+        if "(" not in text:
+            return text, None, None, []
+        return text[:text.index("(")], None, None, [arg.strip() for arg in text[text.index("(") + 1: -1].split(",")]
+
+    tag = text[:text.index(".")]
+    action = text[text.index(".") + 1: text.index("(")]
+    return "action", tag, action, [arg.strip() for arg in text[text.index("(") + 1: -1].split(",")]
+
+
+@pytest.mark.benchmark
+def test_benchmark_parse():
+    commands = ["info(w)", "info(3,4)", "info(inv)", "w.move(9,9)", "x.attack(e3)", "w.attack(e7)", "a.shoot(e1)",
+                "m.use(energy)"]
+    number = 20000
+
+    def best(function):
+        return min(timeit.repeat(lambda: [function(text) for text in commands], number=number, repeat=3)) \
+            / number / len(commands)
+
+    controller = _controller()
+    results = {
+        "срезы строки": best(_split_command),
+        "parse_command без кэша": best(parse_command.__wrapped__),
+        "parse_command": best(parse_command),
+        "listen_command": best(controller.listen_command),
+    }
+
+    for name, seconds in results.items():
+        print(f"\n{name}: {seconds * 1e6:.2f} мкс/команда", end="")
+    print()
+
+    assert results["parse_command"] < results["parse_command без кэша"]
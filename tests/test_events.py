@@ -0,0 +1,56 @@
+from server.events import EventBroker
+from server.expiry import GameReaper
+from server.session_store import MemorySessionStore, SqliteSessionStore
+from src.headless import HeadlessGame
+
+
+def test_events_are_delivered_to_subscribers():
+    broker = EventBroker()
+    subscription = broker.subscribe(1)
+
+    broker.publish_many(1, [{"type": "move", "tag": "w"}, {"type": "game_end", "score": 10}])
+    frames = list(subscription.frames(heartbeat_interval=0.5))
+
+    assert [frame.split("\n")[0] for frame in frames] == ["event: move", "event: game_end"]
+    assert subscription.closed
+    assert broker.connections_count() == 0
+
+
+def test_removed_game_closes_stream():
+    store = MemorySessionStore()
+    broker = EventBroker(store=store)
+    reaper = GameReaper(store, 100, on_evict=broker.close_game)
+    reaper._now = lambda: 1000
+
+    store.add(HeadlessGame(seed=1, game_id=1).start())
+    store._games["1"]["is_on"] = False
+    reaper.expire_now(1)
+    subscription = broker.subscribe(1)
+
+    assert reaper.run_once() == 1
+    frames = list(subscription.frames(heartbeat_interval=0.5))
+    assert frames == ["event: game_removed\ndata: {\"type\": \"game_removed\"}\n\n"]
+
+
+def test_shared_store_relays_events_between_workers(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    # Два брокера на одном файле моделируют два воркера. Журнал читается вручную, фоновый поток ждет
+    publisher = EventBroker(store=SqliteSessionStore(path), poll_interval=3600)
+    viewer = EventBroker(store=SqliteSessionStore(path), poll_interval=3600)
+
+    publisher.publish(1, {"type": "score", "score": 5})
+    subscription = viewer.subscribe(1)
+
+    # События, записанные до подписки, и события других игр зрителю не передаются
+    publisher.publish_many(1, [{"type": "move", "tag": "w"}, {"type": "damage", "tag": "e1"}])
+    publisher.publish(2, {"type": "move", "tag": "a"})
+    publisher.close_game(1)
+    viewer.poll_once()
+
+    frames = list(subscription.frames(heartbeat_interval=0.5))
+    assert [frame.split("\n")[0] for frame in frames] == ["event: move", "event: damage", "event: game_removed"]
+    assert viewer.stats()["delivered"] == 3
+
+    # Старые события удаляются из журнала
+    viewer.store.delete_events_before(float("inf"))
+    assert viewer.store.read_events(0, [1, 2]) == []
@@ -0,0 +1,150 @@
+import os
+import threading
+
+from server.expiry import GameReaper
+from server.locks import GameLockTable
+from server.session_store import MemorySessionStore
+from src.headless import HeadlessGame
+
+
+class _Clock:
+    """Управляемое время для прохода удаления игр"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _reaper(store, expiration=100):
+    reaper = GameReaper(store, expiration)
+    reaper._now = clock = _Clock(1000)
+    return reaper, clock
+
+
+def _add_game(store, reaper, game_id, clock):
+    store.add(HeadlessGame(seed=game_id, game_id=game_id).start())
+    store._games[str(game_id)]["last_activity"] = clock.now
+    reaper.touch(game_id)
+
+
+def test_inactive_game_is_evicted():
+    store = MemorySessionStore()
+    reaper, clock = _reaper(store)
+    _add_game(store, reaper, 1, clock)
+
+    clock.now += 50
+    assert reaper.run_once() == 0
+    assert store.get_meta(1) is not None
+
+    clock.now += 51
+    assert reaper.run_once() == 1
+    assert store.get_meta(1) is None
+    assert reaper.tracked_count() == 0
+
+
+def test_finished_game_is_evicted():
+    store = MemorySessionStore()
+    reaper, clock = _reaper(store)
+    _add_game(store, reaper, 1, clock)
+
+    store._games["1"]["is_on"] = False
+    reaper.expire_now(1)
+
+    assert reaper.run_once() == 1
+    assert store.get_meta(1) is None
+
+
+def test_game_extended_by_another_worker():
+    # Активность в игре отмечена другим воркером: срок в куче этого воркера устарел,
+    # а время последней активности в общем хранилище новее
+    store = MemorySessionStore()
+    reaper, clock = _reaper(store)
+    _add_game(store, reaper, 1, clock)
+
+    clock.now += 90
+    store._games["1"]["last_activity"] = clock.now
+
+    clock.now += 20
+    assert reaper.run_once() == 0
+    assert store.get_meta(1) is not None
+    assert reaper.tracked_count() == 1
+
+    # Игра должна остаться в куче и быть удалена после истечения продленного срока
+    clock.now += 81
+    assert reaper.run_once() == 1
+    assert store.get_meta(1) is None
+    assert reaper.tracked_count() == 0
+    assert reaper._heap == []
+
+
+def test_touch_while_entry_is_popped():
+    store = MemorySessionStore()
+    reaper, clock = _reaper(store)
+    _add_game(store, reaper, 1, clock)
+
+    # Запись извлечена из кучи проходом, в это время игра продлевается в текущем воркере
+    reaper._heap.clear()
+    reaper.touch(1)
+    reaper._reschedule("1", clock.now + 50)
+
+    assert reaper._heap == [(clock.now + 100, "1")]
+
+
+def test_game_continued_during_pass_is_not_evicted():
+    store = MemorySessionStore()
+    reaper, clock = _reaper(store)
+    _add_game(store, reaper, 1, clock)
+    clock.now += 101
+
+    # Другой воркер продолжает игру после того, как проход прочитал ее метаданные
+    get_meta = store.get_meta
+
+    def get_meta_and_touch(game_id):
+        meta = get_meta(game_id)
+        store._games[str(game_id)]["last_activity"] = clock.now
+        return meta
+
+    store.get_meta = get_meta_and_touch
+
+    assert reaper.run_once() == 0
+    assert get_meta(1) is not None
+    assert reaper.tracked_count() == 1
+
+
+def test_game_is_evicted_under_game_lock():
+    store = MemorySessionStore()
+    locks = GameLockTable()
+    reaper = GameReaper(store, 100, locks=locks)
+    reaper._now = clock = _Clock(1000)
+    _add_game(store, reaper, 1, clock)
+    clock.now += 101
+
+    with locks.hold(1):
+        thread = threading.Thread(target=reaper.run_once)
+        thread.start()
+        thread.join(0.1)
+        # Пока в игре выполняется команда, проход ожидает блокировку игры
+        assert thread.is_alive()
+        assert store.get_meta(1) is not None
+
+    thread.join()
+    assert store.get_meta(1) is None
+
+
+def test_thread_is_started_in_each_process():
+    reaper = GameReaper(MemorySessionStore(), 100, interval=3600)
+    try:
+        reaper.start()
+        first = reaper._thread
+        reaper.start()
+        assert reaper._thread is first
+
+        # Процесс воркера, созданный из главного процесса, запускает собственный поток
+        reaper._pid = -1
+        reaper.start()
+        assert reaper._thread is not first
+        assert reaper._pid == os.getpid()
+    finally:
+        reaper.stop()
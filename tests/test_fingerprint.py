@@ -0,0 +1,38 @@
+import pytest
+
+from src.fingerprint import compute_fingerprint
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_fingerprint_matches_full_computation(new_game, playout, seed, board_backend):
+    game = new_game(seed, board_backend)
+    engine = game.game_engine
+
+    for _ in playout(game, seed):
+        assert engine.fingerprint == compute_fingerprint(engine)[0]
+
+
+def test_update_features_restores_fingerprint_on_error(new_game):
+    engine = new_game(1).game_engine
+    character = engine.items_dict["w"]
+
+    with pytest.raises(RuntimeError):
+        with engine.update_features(character):
+            character.health -= 10
+            raise RuntimeError
+
+    assert engine.fingerprint == compute_fingerprint(engine)[0]
+
+
+def test_same_state_has_same_fingerprint(new_game):
+    first = new_game(1).game_engine
+    second = new_game(1).game_engine
+    character = first.items_dict["w"]
+
+    with first.update_features(character):
+        character.health -= 10
+    with first.update_features(character):
+        character.health += 10
+
+    assert first.fingerprint == second.fingerprint
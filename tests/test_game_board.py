@@ -0,0 +1,118 @@
+import pickle
+import random
+
+import pytest
+
+from src.game_board import ArrayGameBoard
+from src.game_controller import GameController
+from src.game_engine import GameEngine
+from src.protection import ProtectionMap
+
+
+class _Owner:
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    def get_tag(self):
+        return self.tag
+
+
+def _narrated_game(seed, board_backend):
+    engine = GameEngine(None, seed, None, rng=random.Random(seed))
+    engine.board_backend = board_backend
+    engine.start_game()
+    return engine, GameController(engine)
+
+
+def _board_state(engine):
+    return {
+        "field": engine.get_current_field_view(),
+        "spots": [(spot.info(), spot.request_occupation_tag(), spot.get_is_spot_free(),
+                   spot.get_spot_is_protected()) for row in engine.game_field for spot in row],
+        "items": {tag: item.info() for tag, item in engine.items_dict.items()},
+        "tags": (list(engine.field_tags), list(engine.friendly_tags)),
+        "score": engine.score,
+        "fingerprint": engine.get_fingerprint(),
+    }
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_backends_play_identically(new_game, playout, seed):
+    # Команды выбираются по игре с объектами ячеек и повторяются в игре с плоскими массивами
+    commands = [command for command, _ in playout(new_game(seed, "objects"), seed)]
+
+    objects_engine, objects_controller = _narrated_game(seed, "objects")
+    array_engine, array_controller = _narrated_game(seed, "array")
+    assert _board_state(array_engine) == _board_state(objects_engine)
+
+    for command in commands + ["info(1, 1)", "info(inv)", "repeat"]:
+        assert array_controller.listen_command(command) == objects_controller.listen_command(command), command
+        assert _board_state(array_engine) == _board_state(objects_engine), command
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_backends_play_identically_after_pickling(new_game, playout, seed):
+    # Хранилище sqlite сериализует игру между запросами, поэтому игра загружается заново перед каждой командой
+    commands = [command for command, _ in playout(new_game(seed, "objects"), seed)]
+
+    controllers = {backend: _narrated_game(seed, backend)[1] for backend in ("objects", "array")}
+
+    for command in commands:
+        results = {}
+        for backend, controller in controllers.items():
+            controller = controllers[backend] = pickle.loads(pickle.dumps(controller))
+            results[backend] = controller.listen_command(command)
+
+        assert results["array"] == results["objects"], command
+        assert _board_state(controllers["array"].game_engine) == _board_state(controllers["objects"].game_engine)
+
+
+def test_owner_slots_are_rebuilt_after_pickling():
+    board = ArrayGameBoard(8, 8, ProtectionMap(64))
+    first, second = _Owner("w"), _Owner("a")
+    board.spots[0].set_spot_owner(first)
+    board.spots[1].set_spot_owner(second)
+
+    board = pickle.loads(pickle.dumps(board))
+    first, second = board.spots[0].get_spot_owner(), board.spots[1].get_spot_owner()
+
+    assert board._owner_slots == {id(first): board.owner_index[0], id(second): board.owner_index[1]}
+
+    # Новый владелец не получает индекс другого объекта, даже если его id совпадет с id объекта до сериализации
+    third = _Owner("m")
+    board.spots[2].set_spot_owner(third)
+    assert [spot.get_spot_owner() for spot in board.spots[:3]] == [first, second, third]
+
+
+def test_owner_slots_are_reused():
+    board = ArrayGameBoard(8, 8, ProtectionMap(64))
+    spots = board.spots
+
+    for step in range(1000):
+        owner = _Owner(f"e{step}")
+        spots[step % 3].set_spot_owner(owner)
+        assert spots[step % 3].get_spot_owner() is owner
+
+    # Ссылки остаются только у последних владельцев трех ячеек
+    assert len(board.owners) <= 4
+    assert len(board._owner_slots) == 3
+
+
+def test_owner_slot_is_kept_while_referenced():
+    board = ArrayGameBoard(8, 8, ProtectionMap(64))
+    spots = board.spots
+    first, second = _Owner("w"), _Owner("a")
+
+    spots[0].set_spot_owner(first)
+    spots[1].set_spot_owner(first)
+    spots[0].set_spot_owner(second)
+
+    assert spots[1].get_spot_owner() is first
+    assert board.owner_slot(first) == board.owner_index[1]
+
+    # Освобожденная ячейка, как и GameSpot, сохраняет прежнего владельца
+    spots[1].set_spot_owner(None)
+    assert not spots[1].get_spot_is_occupied()
+    assert spots[1].get_spot_owner() is first
+    assert board.tags(0, 2) == ["a", "*"]
@@ -0,0 +1,55 @@
+import pytest
+
+
+def _field_tags(engine):
+    return {(spot.x, spot.y): spot.request_occupation_tag() for row in engine.game_field for spot in row}
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+def test_field_delta_without_version_returns_whole_field(new_game, board_backend):
+    engine = new_game(1, board_backend).game_engine
+    delta = engine.get_field_delta()
+
+    assert delta["version"] == engine.state_version
+    assert not delta["not_modified"]
+    assert {(cell["x"], cell["y"]): cell["tag"] for cell in delta["cells"]} == _field_tags(engine)
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+def test_field_delta_after_move(new_game, board_backend):
+    game = new_game(1, board_backend)
+    engine = game.game_engine
+    version = engine.state_version
+    character = engine.items_dict["w"]
+    x_from, y_from = character.x, character.y
+
+    command = next(command for command in engine.legal_actions("w") if command.startswith("w.move"))
+    assert game.perform(command)["ok"]
+
+    delta = engine.get_field_delta(version)
+    cells = {(cell["x"], cell["y"]): cell["tag"] for cell in delta["cells"]}
+
+    assert delta["version"] == engine.state_version > version
+    assert not delta["not_modified"]
+    assert cells[(x_from, y_from)] == _field_tags(engine)[(x_from, y_from)]
+    assert cells[(character.x, character.y)] == "w"
+    # Возвращаются только изменившиеся ячейки, и их состояние совпадает с полем
+    assert len(cells) < len(_field_tags(engine))
+    assert all(_field_tags(engine)[position] == tag for position, tag in cells.items())
+
+
+def test_field_delta_not_modified(new_game):
+    engine = new_game(1).game_engine
+    delta = engine.get_field_delta(engine.state_version)
+
+    assert delta == {"version": engine.state_version, "not_modified": True, "cells": []}
+
+
+@pytest.mark.parametrize("shift", [1, 100])
+def test_field_delta_with_unknown_version_returns_whole_field(new_game, shift):
+    engine = new_game(1).game_engine
+    whole = engine.get_field_delta()
+
+    # Версия из будущего, например от другой игры, и отрицательная версия считаются неизвестными
+    assert engine.get_field_delta(engine.state_version + shift) == whole
+    assert engine.get_field_delta(-shift) == whole
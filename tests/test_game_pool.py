@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from server.game_pool import GamePool
+
+
+def _pool(size):
+    pool = GamePool(size)
+    prepared = iter(range(1000))
+    pool._prepare = lambda: (next(prepared), "")
+    return pool
+
+
+def _wait_ready(pool, count):
+    deadline = time.monotonic() + 5
+    while pool.stats()["ready"] < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_refill_starts_on_first_take():
+    pool = _pool(3)
+
+    # Пока игры не запрашиваются, пул не пополняется
+    time.sleep(0.05)
+    assert pool.stats()["ready"] == 0
+
+    assert pool.take() is None
+    assert pool.stats()["misses"] == 1
+
+    _wait_ready(pool, 3)
+    assert pool.stats()["ready"] == 3
+    assert pool.take() == (0, "")
+    assert pool.stats()["hits"] == 1
+
+    _wait_ready(pool, 3)
+    assert pool.stats()["ready"] == 3
+
+
+def test_refill_restarts_in_forked_worker():
+    pool = _pool(2)
+    pool.take()
+
+    # В воркере, созданном после запуска потока, id процесса другой и поток запускается заново
+    pool._pid = -1
+    started = []
+    pool._run = lambda: started.append(True)
+
+    pool.take()
+    deadline = time.monotonic() + 5
+    while not started and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert started
+
+
+def test_failures_are_retried_with_backoff():
+    pool = GamePool(2)
+    pool._min_retry_delay = 0.05
+    attempts = []
+
+    def fail():
+        attempts.append(time.monotonic())
+        raise RuntimeError("API базы данных недоступно")
+
+    pool._prepare = fail
+    pool.take()
+    time.sleep(0.5)
+
+    # Интервалы 0.05, 0.1, 0.2 с: за 0.5 с не больше пяти попыток вместо непрерывного цикла
+    assert 3 <= len(attempts) <= 5
+    assert attempts[2] - attempts[1] > attempts[1] - attempts[0]
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils import helpers
+from utils.helpers import GameIdAllocator
+
+
+class _CountingAllocator(GameIdAllocator):
+    """Выдача id из счетчика в памяти с замером одновременных аренд"""
+
+    def __init__(self, block_size, low_watermark=None, delay=0.01):
+        GameIdAllocator.__init__(self, "web", block_size, low_watermark)
+        self.delay = delay
+        self.next_first_id = 1
+        self.leases = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lease_under_lock = False
+        self._counter_lock = threading.Lock()
+
+    def _lease(self):
+        # Аренда не должна выполняться под блокировкой выдачи id
+        if self._condition._is_owned():
+            self.lease_under_lock = True
+
+        with self._counter_lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(self.delay)
+
+        with self._counter_lock:
+            self.in_flight -= 1
+            self.leases += 1
+            first_id = self.next_first_id
+            self.next_first_id += self.block_size
+
+        return [first_id, first_id + self.block_size]
+
+
+@pytest.mark.parametrize("block_size", [1, 10, 100])
+def test_ids_are_unique_and_leases_do_not_overlap(block_size):
+    allocator = _CountingAllocator(block_size, delay=0.001)
+    ids = []
+    lock = threading.Lock()
+
+    def allocate():
+        for _ in range(50):
+            game_id = allocator.next_id()
+            with lock:
+                ids.append(game_id)
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(ids) == len(set(ids)) == 400
+    assert allocator.max_in_flight == 1
+    assert not allocator.lease_under_lock
+
+
+def test_ids_are_served_during_background_lease():
+    allocator = _CountingAllocator(10, low_watermark=5, delay=0.5)
+    allocator._ranges.append([1, 10])
+    allocator.next_first_id = 10
+
+    started = time.monotonic()
+    ids = [allocator.next_id() for _ in range(8)]
+
+    assert ids == list(range(1, 9))
+    assert time.monotonic() - started < 0.3
+    assert allocator._leasing
+
+
+def test_failed_lease_is_retried():
+    allocator = _CountingAllocator(10)
+    failures = [RuntimeError("API недоступно")]
+    lease = allocator._lease
+
+    def flaky_lease():
+        if failures:
+            raise failures.pop()
+        return lease()
+
+    allocator._lease = flaky_lease
+
+    with pytest.raises(RuntimeError):
+        allocator.next_id()
+    assert allocator.next_id() == 1
+
+
+class _Response:
+    status_code = 200
+
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def test_api_without_count_disables_block_leasing(monkeypatch):
+    responses = iter([{"game_id": 7}, {"game_id": 8}])
+    monkeypatch.setattr(helpers.requests, "get", lambda *args, **kwargs: _Response(next(responses)))
+
+    allocator = GameIdAllocator("web", 1000)
+
+    assert allocator.next_id() == 7
+    assert allocator.block_size == 1
+    assert not allocator._leasing
+    assert allocator.next_id() == 8
+
+
+def test_api_with_count(monkeypatch):
+    monkeypatch.setattr(helpers.requests, "get", lambda *args, **kwargs: _Response({"game_id": 100, "count": 50}))
+
+    allocator = GameIdAllocator("web", 50, low_watermark=0)
+
+    assert [allocator.next_id() for _ in range(3)] == [100, 101, 102]
+    assert allocator._ranges == [[103, 150]]
+
+
+def test_api_with_invalid_count(monkeypatch):
+    monkeypatch.setattr(helpers.requests, "get", lambda *args, **kwargs: _Response({"game_id": 100, "count": 0}))
+
+    with pytest.raises(RuntimeError):
+        GameIdAllocator("web", 50).next_id()
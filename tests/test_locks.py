@@ -0,0 +1,56 @@
+import threading
+import time
+
+from server.locks import GameLockTable
+
+
+def test_commands_of_one_game_are_serialized():
+    table = GameLockTable()
+    counter = {"value": 0}
+
+    def increment():
+        for _ in range(200):
+            with table.hold(1):
+                value = counter["value"]
+                time.sleep(0)
+                counter["value"] = value + 1
+
+    threads = [threading.Thread(target=increment) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter["value"] == 1600
+    assert len(table) == 0
+
+
+def test_different_games_run_in_parallel():
+    table = GameLockTable()
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold_first_game():
+        with table.hold(1):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold_first_game)
+    thread.start()
+    held.wait(5)
+
+    # Блокировка другой игры захватывается, пока первая игра занята
+    acquired = threading.Event()
+
+    def hold_second_game():
+        with table.hold(2):
+            acquired.set()
+
+    other = threading.Thread(target=hold_second_game)
+    other.start()
+    other.join(1)
+
+    assert acquired.is_set()
+    release.set()
+    thread.join()
+    assert len(table) == 0
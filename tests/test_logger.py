@@ -0,0 +1,179 @@
+import csv
+import gzip
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils.logger import CsvLogWriter, LogShipper
+
+
+class _Response:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class _Session:
+    """Сессия, отвечающая статусом в зависимости от вида отправленных данных"""
+
+    def __init__(self, list_status=200, object_status=200):
+        self.list_status = list_status
+        self.object_status = object_status
+        self.payloads = []
+
+    def post(self, url, json, timeout):
+        self.payloads.append(json)
+        return _Response(self.list_status if isinstance(json, list) else self.object_status)
+
+
+def _shipper(session, tmp_path=None):
+    shipper = LogShipper("http://log", flush_interval=0.01, max_retries=1,
+                         spill_path=str(tmp_path / "spill.jsonl") if tmp_path else None)
+    shipper._stop.set()
+    shipper._thread.join()
+    shipper._session = session
+    return shipper
+
+
+def _events(count):
+    return [{"game_id": 1, "game_event": "event", "message": str(index)} for index in range(count)]
+
+
+def test_batch_is_sent_as_list():
+    session = _Session()
+    shipper = _shipper(session)
+
+    shipper._send(_events(3))
+
+    assert session.payloads == [_events(3)]
+    assert shipper.sent == 3
+
+
+def test_rejected_list_falls_back_to_single_events():
+    session = _Session(list_status=400)
+    shipper = _shipper(session)
+
+    shipper._send(_events(2))
+    shipper._send(_events(1))
+
+    assert session.payloads == [_events(2), *_events(2), *_events(1)]
+    assert shipper.sent == 3
+    assert shipper.stats()["batched"] is False
+
+
+def test_rejected_events_are_not_counted_as_sent(tmp_path):
+    session = _Session(list_status=422, object_status=422)
+    shipper = _shipper(session, tmp_path)
+
+    shipper._send(_events(2))
+
+    assert shipper.sent == 0
+    assert shipper.rejected == 2
+    assert shipper.spilled == 2
+    assert len((tmp_path / "spill.jsonl").read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_unavailable_api_is_retried(tmp_path):
+    session = _Session(list_status=503)
+    shipper = _shipper(session, tmp_path)
+    shipper._stop.clear()
+    shipper._stop.wait = lambda delay: False
+
+    shipper._send(_events(2))
+
+    assert len(session.payloads) == 2
+    assert shipper.retries == 1
+    assert shipper.sent == 0
+    assert shipper.rejected == 0
+    assert shipper.spilled == 2
+
+
+def _read_rows(path):
+    with open(path, encoding="utf-8", newline="") as file:
+        return list(csv.reader(file))
+
+
+def test_csv_rows_are_flushed_by_count(tmp_path):
+    path = str(tmp_path / "logs.csv")
+    writer = CsvLogWriter(path, flush_every=2, flush_interval=60)
+
+    writer.write([1, "event", "first"])
+    assert _read_rows(path) == [CsvLogWriter.header]
+
+    writer.write([1, "event", "second"])
+    assert len(_read_rows(path)) == 3
+    writer.close()
+
+
+def test_csv_idle_writer_is_flushed_by_timer(tmp_path):
+    path = str(tmp_path / "logs.csv")
+    writer = CsvLogWriter(path, flush_every=1000, flush_interval=0.05)
+
+    writer.write([1, "event", "message"])
+    deadline = time.monotonic() + 2
+    while len(_read_rows(path)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert _read_rows(path) == [CsvLogWriter.header, ["1", "event", "message"]]
+    writer.close()
+
+
+def test_csv_rotation_by_size(tmp_path):
+    path = str(tmp_path / "logs.csv")
+    writer = CsvLogWriter(path, flush_every=1, flush_interval=0, max_bytes=200)
+
+    for index in range(50):
+        writer.write([1, "event", f"message {index}"])
+    writer.close()
+
+    rotated = sorted(tmp_path.glob("logs.*.csv.gz"))
+    assert rotated
+
+    rows = []
+    for rotated_path in rotated:
+        with gzip.open(rotated_path, "rt", encoding="utf-8", newline="") as file:
+            rows += list(csv.reader(file))[1:]
+    rows += _read_rows(path)[1:]
+
+    assert [row[2] for row in rows] == [f"message {index}" for index in range(50)]
+
+
+def test_csv_unknown_fsync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        CsvLogWriter(str(tmp_path / "logs.csv"), fsync_policy="never")
+
+
+def _write_reopening(path, row):
+    # Запись события до буферизации журнала: файл открывается и закрывается для каждого события
+    with open(path, "a", encoding="utf-8", newline="") as file:
+        csv.writer(file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL).writerow(row)
+
+
+@pytest.mark.benchmark
+def test_benchmark_csv_writer(tmp_path):
+    events = 5000
+    row = [1, "Перемещение", "Персонаж переместился в клетку (3, 4)"]
+    results = {}
+
+    path = str(tmp_path / "reopening.csv")
+    started = time.perf_counter()
+    for _ in range(events):
+        _write_reopening(path, row)
+    results["открытие файла на каждое событие"] = events / (time.perf_counter() - started)
+
+    for policy in CsvLogWriter.fsync_policies:
+        writer = CsvLogWriter(str(tmp_path / f"{policy}.csv"), fsync_policy=policy, fsync_every=100)
+        count = events // 10 if policy == "always" else events
+        started = time.perf_counter()
+        for _ in range(count):
+            writer.write(row)
+        writer.close()
+        results[f"буферизованная запись, fsync {policy}"] = count / (time.perf_counter() - started)
+
+    print()
+    for name, rate in results.items():
+        print(f"{name}: {rate:.0f} событий/с")
+
+    assert results["буферизованная запись, fsync exit"] > results["открытие файла на каждое событие"]
@@ -0,0 +1,130 @@
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+import pytest
+
+from src import commands, fingerprint
+from src.game_controller import GameController
+from src.game_engine import GameEngine
+from src.inventory import Inventory
+
+_commands = ("f.move(1, 3)", "a.shoot(e3)", "repeat", "info(inv)", "w.move(3, 3)", "m.use(health)", "print_field")
+
+
+def _play(game_id):
+    engine = GameEngine(None, game_id, None)
+    engine.start_game()
+    controller = GameController(engine)
+    for command in _commands:
+        controller.listen_command(command)
+
+    return engine
+
+
+def _clear_bounded_caches():
+    # Кэши ключей отпечатка и разобранных команд ограничены по размеру и заполняются в первых играх
+    fingerprint.component_key.cache_clear()
+    fingerprint._features_key.cache_clear()
+    commands.parse_command.cache_clear()
+    gc.collect()
+
+
+def test_game_state_is_per_instance():
+    first, second = _play(1), _play(2)
+
+    for name in ("field_tags", "friendly_tags", "items_dict", "player_actions", "game_field"):
+        assert getattr(first, name) is not getattr(second, name)
+        assert name not in vars(GameEngine) or not getattr(GameEngine, name)
+
+    assert first.inventory._counts is not second.inventory._counts
+    assert not isinstance(vars(Inventory).get("_inventory"), list)
+    assert len(second.player_actions) <= len(_commands)
+
+
+def test_memory_footprint_does_not_depend_on_other_games():
+    footprint = _play(1).get_memory_footprint()
+    for game_id in range(2, 50):
+        _play(game_id)
+
+    assert footprint > 0
+    assert abs(_play(50).get_memory_footprint() - footprint) < footprint * 0.2
+
+
+def test_memory_is_flat_across_sequential_games():
+    games = int(os.getenv("SOAK_GAMES", 300))
+    random.seed(0)
+
+    tracemalloc.start()
+    try:
+        for game_id in range(50):
+            _play(game_id)
+        _clear_bounded_caches()
+        warmed_up = tracemalloc.get_traced_memory()[0]
+
+        for game_id in range(50, 50 + games):
+            _play(game_id)
+        _clear_bounded_caches()
+        finished = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    assert finished - warmed_up < 16 * 1024
+
+
+class _Plain:
+    """Объект с атрибутами в словаре экземпляра для сравнения с классами на __slots__"""
+
+
+def _slot_names(obj):
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        yield from (slots,) if isinstance(slots, str) else slots
+
+
+def _game_objects(engine):
+    """Ячейки поля, персонажи, враги, сундуки и предметы рюкзака игры"""
+    spots = [spot for row in engine.game_field for spot in row]
+    owners = {id(spot.get_spot_owner()): spot.get_spot_owner() for spot in spots if spot.get_spot_is_occupied()}
+    return spots + list(owners.values()) + list(engine.inventory._inventory)
+
+
+def test_board_entities_have_no_instance_dict(new_game):
+    for board_backend in ("objects", "array"):
+        engine = new_game(1, board_backend).game_engine
+
+        for obj in _game_objects(engine):
+            assert not hasattr(obj, "__dict__"), type(obj).__name__
+
+
+@pytest.mark.benchmark
+def test_benchmark_bytes_per_game(new_game):
+    games = 500
+    print()
+
+    for board_backend in ("objects", "array"):
+        gc.collect()
+        tracemalloc.start()
+        started = tracemalloc.get_traced_memory()[0]
+        live = [new_game(seed, board_backend) for seed in range(games)]
+        gc.collect()
+        per_game = (tracemalloc.get_traced_memory()[0] - started) / games
+        tracemalloc.stop()
+
+        engine = live[0].game_engine
+        slotted = dict_layout = 0
+        for obj in _game_objects(engine):
+            plain = _Plain()
+            for name in _slot_names(obj):
+                if hasattr(obj, name):
+                    setattr(plain, name, getattr(obj, name))
+            slotted += sys.getsizeof(obj)
+            dict_layout += sys.getsizeof(plain) + sys.getsizeof(plain.__dict__)
+
+        print(f"{board_backend}: {per_game:.0f} байт на игру (tracemalloc), "
+              f"{engine.get_memory_footprint()} байт на игру (get_memory_footprint); "
+              f"ячейки и объекты: {slotted} байт на __slots__, {dict_layout} байт со словарями экземпляров")
+
+        assert slotted < dict_layout
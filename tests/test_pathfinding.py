@@ -0,0 +1,111 @@
+from collections import deque
+
+import pytest
+
+from src.pathfinding import DistanceMaps
+
+
+def _mask(rows):
+    """Маска проходимых ячеек по строкам поля: "." - проходимая ячейка, "#" - препятствие"""
+    return sum(1 << (y * len(line) + x) for y, line in enumerate(rows) for x, cell in enumerate(line) if cell == ".")
+
+
+def test_distances_around_obstacles():
+    rows = ["...",
+            "##.",
+            "..."]
+    maps = DistanceMaps(3, 3, lambda: _mask(rows))
+
+    assert list(maps.get_distances(0)) == [0, 1, 2,
+                                           -1, -1, 3,
+                                           6, 5, 4]
+    assert maps.find_path(0, 6) == [0, 1, 2, 5, 8, 7, 6]
+    # В непроходимую ячейку можно войти только из соседней достижимой ячейки
+    assert maps.find_path(0, 4) == [0, 1, 4]
+    assert maps.find_path(0, 4, target_is_enterable=False) is None
+
+
+def test_invalidate_reloads_passable_cells():
+    rows = ["...",
+            ".#.",
+            "..."]
+    maps = DistanceMaps(3, 3, lambda: _mask(rows))
+    assert maps.get_distances(0)[8] == 4
+
+    rows[0] = ".#."
+    rows[2] = "..#"
+    # Без сброса карты остаются прежними, после сброса маска запрашивается заново
+    assert maps.get_distances(0)[8] == 4
+    maps.invalidate()
+    assert maps.get_distances(0)[8] == -1
+    assert maps.find_path(0, 2) is None
+
+
+def _reference_distances(engine, source):
+    """Расстояния от ячейки до всех ячеек поиском в ширину по свободным ячейкам поля, -1 - ячейка недостижима"""
+    width, length = engine.get_width(), engine.get_length()
+    distances = [-1] * (width * length)
+    distances[source] = 0
+    queue = deque([source])
+
+    while queue:
+        index = queue.popleft()
+        x, y = index % width, index // width
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            neighbour = ny * width + nx
+            if 0 <= nx < width and 0 <= ny < length and distances[neighbour] < 0 \
+                    and engine.get_spot_by_index(neighbour).get_is_spot_free():
+                distances[neighbour] = distances[index] + 1
+                queue.append(neighbour)
+
+    return distances
+
+
+def _check_paths(engine, tag):
+    """Карта расстояний персонажа и пути find_path совпадают с поиском в ширину по свободным ячейкам"""
+    width = engine.get_width()
+    character = engine.items_dict[tag]
+    source = (character.y - 1) * width + character.x - 1
+    expected = _reference_distances(engine, source)
+
+    assert list(engine.distance_maps.get_distances(source)) == expected
+
+    for target, distance in enumerate(expected):
+        x, y = target % width + 1, target // width + 1
+        path = engine.find_path(character.x, character.y, x, y)
+
+        spot = engine.get_spot_by_index(target)
+        if distance < 0 and spot.request_occupation_tag() == "t" and not spot.get_spot_is_protected():
+            # Путь к сундуку заканчивается входом в него из ближайшей достижимой соседней ячейки
+            neighbours = [(ny - 1) * width + nx - 1 for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                          if 1 <= nx <= width and 1 <= ny <= engine.get_length()]
+            entries = [expected[index] for index in neighbours if expected[index] >= 0]
+            distance = min(entries) + 1 if entries else -1
+
+        if distance < 0:
+            assert path is None
+            continue
+
+        assert len(path) == distance + 1
+        assert path[0] == (character.x, character.y) and path[-1] == (x, y)
+        for (x1, y1), (x2, y2) in zip(path, path[1:]):
+            assert abs(x1 - x2) + abs(y1 - y2) == 1
+        for px, py in path[1:-1]:
+            assert engine.get_spot_by_index((py - 1) * width + px - 1).get_is_spot_free()
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+@pytest.mark.parametrize("seed", range(3))
+def test_distances_match_find_path(new_game, playout, board_backend, seed):
+    game = new_game(seed, board_backend=board_backend, movement_mode="path")
+    engine = game.game_engine
+
+    for tag in engine.friendly_tags:
+        _check_paths(engine, tag)
+
+    # Карты расстояний сбрасываются после перемещений, гибели персонажей и открытия сундуков
+    for step, (command, result) in enumerate(playout(game, seed, max_commands=60)):
+        assert result["ok"], command
+        if step % 5 == 0:
+            for tag in list(engine.friendly_tags):
+                _check_paths(engine, tag)
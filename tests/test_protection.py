@@ -0,0 +1,78 @@
+import pytest
+
+from src.enemy_characters import Enemy
+from src.protection import ProtectionMap
+
+
+class _Enemy:
+
+    def __init__(self, enemy_id):
+        self.id = enemy_id
+        self.protected_mask = 0
+
+
+def test_overlapping_protection():
+    protection = ProtectionMap(8)
+    first, second = _Enemy(0), _Enemy(1)
+
+    assert protection.protect(first, 0b0011) == 0b0011
+    assert protection.protect(second, 0b0110) == 0b0110
+    # Повторная защита тех же ячеек ничего не добавляет
+    assert protection.protect(first, 0b0001) == 0
+
+    assert list(protection.counts[:4]) == [1, 2, 1, 0]
+    assert protection.get_protectors(1) == (first, second)
+    assert protection.protected == 0b0111
+
+    assert protection.release(first.id) == 0b0011
+    assert list(protection.counts[:4]) == [0, 1, 1, 0]
+    assert protection.get_protectors(1) == (second,)
+    assert protection.protected == 0b0110
+    assert first.id not in protection.enemies
+
+    protection.release(second.id, 0b0010)
+    assert second.protected_mask == 0b0100
+    assert protection.protected == 0b0100
+    assert protection.get_protectors(1) == ()
+
+    # Снятие защиты врага, который ничего не защищает, ничего не меняет
+    assert protection.release(first.id) == 0
+
+
+def _enemies(engine):
+    return [item for item in engine.items_dict.values() if isinstance(item, Enemy)]
+
+
+def _check_protection(engine):
+    """Защита ячеек поля совпадает с защитой, вычисленной по маскам живых врагов"""
+    enemies = _enemies(engine)
+
+    for index in range(engine.get_width() * engine.get_length()):
+        protectors = [enemy for enemy in enemies if enemy.protected_mask >> index & 1]
+        spot = engine.get_spot_by_index(index)
+
+        assert engine.protection.counts[index] == len(protectors)
+        assert spot.get_spot_is_protected() == bool(protectors)
+        assert list(spot.get_spot_protectors()) == protectors
+        assert spot.get_is_spot_free() == (not protectors and not spot.get_spot_is_occupied())
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+@pytest.mark.parametrize("seed", range(5))
+def test_protection_is_cleared_after_guard_dies(new_game, seed, board_backend):
+    engine = new_game(seed, board_backend).game_engine
+    _check_protection(engine)
+
+    for enemy in _enemies(engine):
+        guarded = enemy.protected_mask
+        enemy.decrease_health(enemy.health)
+
+        assert enemy.get_tag() not in engine.items_dict
+        assert enemy.protected_mask == 0
+        assert enemy.id not in engine.protection.enemies
+        for index in range(engine.get_width() * engine.get_length()):
+            if guarded >> index & 1:
+                assert enemy not in engine.get_spot_by_index(index).get_spot_protectors()
+        _check_protection(engine)
+
+    assert engine.protection.protected == 0
@@ -0,0 +1,55 @@
+import pickle
+
+import pytest
+
+
+def _fresh_view(engine):
+    """Изображение поля, построенное без кэша строк"""
+    rows, dirty = engine._render_rows, engine._dirty_rows
+    engine._render_rows = engine._dirty_rows = None
+    try:
+        return engine.get_current_field_view(), engine.get_current_field_raw()
+    finally:
+        engine._render_rows, engine._dirty_rows = rows, dirty
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+@pytest.mark.parametrize("seed", range(5))
+def test_cached_view_matches_fresh_render(new_game, playout, seed, board_backend):
+    game = new_game(seed, board_backend)
+    engine = game.game_engine
+
+    for _ in playout(game, seed):
+        assert (engine.get_current_field_view(), engine.get_current_field_raw()) == _fresh_view(engine)
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+def test_move_invalidates_only_changed_rows(new_game, board_backend):
+    game = new_game(1, board_backend)
+    engine = game.game_engine
+    before = engine.get_current_field_view()
+    assert not any(engine._dirty_rows)
+
+    character = engine.items_dict["w"]
+    y_from = character.y
+    command = next(command for command in engine.legal_actions("w")
+                   if command.startswith("w.move") and not command.endswith(f", {y_from})"))
+    assert game.perform(command)["ok"]
+
+    # Отмечены строки, из которой и в которую переместился персонаж
+    assert {row + 1 for row, dirty in enumerate(engine._dirty_rows) if dirty} == {y_from, character.y}
+
+    after = engine.get_current_field_view()
+    assert after != before
+    assert not any(engine._dirty_rows)
+    assert (after, engine.get_current_field_raw()) == _fresh_view(engine)
+
+
+def test_cache_is_not_pickled(new_game):
+    engine = new_game(1).game_engine
+    view = engine.get_current_field_view()
+
+    restored = pickle.loads(pickle.dumps(engine))
+
+    assert restored._render_rows is None
+    assert restored.get_current_field_view() == view
@@ -0,0 +1,199 @@
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+
+from server.server import App
+from src.fingerprint import compute_fingerprint
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv("SESSION_STORE", "memory")
+    monkeypatch.setenv("GAME_POOL_SIZE", "0")
+    return App(io_stream="web")
+
+
+def _play_concurrently(app, game_ids, threads_per_game, commands_per_thread):
+    """
+    Выполняет команды в играх несколькими потоками на каждую игру.
+    Возвращает количество успешных команд каждой игры и время выполнения
+    """
+
+    succeeded = {game_id: 0 for game_id in game_ids}
+    lock = threading.Lock()
+
+    def play(game_id):
+        for step in range(commands_per_thread):
+            command = "f.move(1, 3)" if step % 2 == 0 else "f.move(1, 1)"
+            payload, status = app.handle_perform({"game_id": game_id, "commands": [command]})
+            assert status == 200
+            if not payload["results"][0]["is_error"]:
+                with lock:
+                    succeeded[game_id] += 1
+
+    threads = [threading.Thread(target=play, args=(game_id,))
+               for game_id in game_ids for _ in range(threads_per_game)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return succeeded, time.perf_counter() - started
+
+
+def test_concurrent_commands_are_not_lost(app):
+    # Частое переключение потоков повышает вероятность гонок без блокировки игры
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    try:
+        game_ids = [app.handle_init(game_id)[0]["game_id"] for game_id in range(1, 5)]
+        succeeded, _ = _play_concurrently(app, game_ids, threads_per_game=4, commands_per_thread=30)
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    for game_id in game_ids:
+        engine = app._get_game_by_id(game_id).game_engine
+        assert len(engine.player_actions) == succeeded[game_id]
+        assert sum(row.count("f") for row in engine.get_current_field_raw()) == 1
+        assert engine.fingerprint == compute_fingerprint(engine)[0]
+
+    assert len(app.game_locks) == 0
+
+
+@pytest.mark.benchmark
+def test_benchmark_threads(app):
+    for threads_per_game in (1, 4):
+        game_ids = [app.handle_init(threads_per_game * 100 + game_id)[0]["game_id"] for game_id in range(8)]
+        succeeded, elapsed = _play_concurrently(app, game_ids, threads_per_game, commands_per_thread=40)
+        commands = len(game_ids) * threads_per_game * 40
+
+        print(f"\n{threads_per_game} потоков на игру: {commands / elapsed:.0f} команд/с, "
+              f"успешных команд {sum(succeeded.values())}")
+
+
+@pytest.mark.parametrize("data", [
+    {"game_id": 1, "commands": [1]},
+    {"game_id": 1, "commands": ["print_field", ""]},
+    {"game_id": 1, "commands": "print_field"},
+    {"game_id": 1, "command": 1},
+    {"game_id": 1, "commands": ["print_field"], "stop_on_error": "false"},
+    {"game_id": 1, "commands": ["print_field"], "stop_on_error": 0},
+    ["print_field"],
+    None,
+])
+def test_perform_rejects_malformed_body(app, data):
+    app.handle_init(1)
+
+    payload, status = app.handle_perform(data)
+    assert status == 400
+    assert payload["error"]
+
+
+def test_perform_stop_on_error(app):
+    app.handle_init(1)
+    commands = ["w.attack(e100)", "print_field"]
+
+    payload, status = app.handle_perform({"game_id": 1, "commands": commands})
+    assert status == 200
+    assert [result["is_error"] for result in payload["results"]] == [True]
+
+    payload, status = app.handle_perform({"game_id": 1, "commands": commands, "stop_on_error": False})
+    assert status == 200
+    assert [result["is_error"] for result in payload["results"]] == [True, False]
+
+
+@pytest.mark.parametrize("game_id", ["abc", "", None, "1.5"])
+def test_end_rejects_invalid_id(app, game_id):
+    payload, status = app.handle_end(game_id)
+    assert status == 403
+
+
+def test_end(app):
+    app.handle_init(1)
+
+    payload, status = app.handle_end("1")
+    assert status == 200
+    assert payload["is_on"] is False
+
+
+def test_hint_is_limited_on_server(app):
+    game_id = app.handle_init(1)[0]["game_id"]
+
+    started = time.perf_counter()
+    payload, status = app.handle_perform({"game_id": game_id, "command": "hint"})
+
+    assert status == 200
+    assert time.perf_counter() - started < 0.5
+
+
+def test_sqlite_workers_do_not_lose_commands(monkeypatch, tmp_path):
+    monkeypatch.setenv("SESSION_STORE", "sqlite")
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setenv("GAME_POOL_SIZE", "0")
+
+    workers = [App(io_stream="web"), App(io_stream="web")]
+    game_id = workers[0].handle_init(1)[0]["game_id"]
+    succeeded = []
+
+    def play(app):
+        for step in range(20):
+            command = "f.move(1, 3)" if step % 2 == 0 else "f.move(1, 1)"
+            payload, status = app.handle_perform({"game_id": game_id, "commands": [command]})
+            assert status == 200
+            if not payload["results"][0]["is_error"]:
+                succeeded.append(command)
+
+    threads = [threading.Thread(target=play, args=(app,)) for app in workers for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    game = workers[1].active_games.get(game_id)
+    assert len(game.game_engine.player_actions) == len(succeeded)
+
+
+def test_events_are_published_after_changes_are_saved(app):
+    game_id = app.handle_init(1)[0]["game_id"]
+    subscription = app.events.subscribe(game_id)
+
+    def fail(game):
+        game.game_engine.emit_event("score", score=1)
+        raise RuntimeError("ошибка команды")
+
+    with pytest.raises(RuntimeError):
+        app._edit_game(game_id, fail)
+    assert app.events.published == 0
+
+    app._edit_game(game_id, lambda game: game.game_engine.emit_event("score", score=2))
+    assert app.events.published == 1
+    subscription.close()
+
+
+@pytest.mark.parametrize("data", [None, [], "field", 5, {"game_id": 1, "since": "3"}, {"game_id": 1, "since": True}])
+def test_field_rejects_malformed_body(app, data):
+    app.handle_init(1)
+    payload, status = app.handle_field(data)
+
+    assert status == 400
+    assert "error" in payload
+
+
+def test_field(app):
+    game_id = app.handle_init(1)[0]["game_id"]
+
+    payload, status = app.handle_field({"game_id": game_id})
+    assert status == 200
+    assert len(payload["cells"]) == 64
+
+    payload, status = app.handle_field({"game_id": game_id, "since": payload["version"]})
+    assert status == 200
+    assert payload["not_modified"] is True
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from server.session_store import MemorySessionStore, SessionConflict, SqliteSessionStore
+from src.headless import HeadlessGame
+
+
+def _new_game(game_id):
+    return HeadlessGame(seed=game_id, game_id=game_id).start()
+
+
+def _row_version(store, game_id):
+    return store._connection().execute("SELECT version FROM games WHERE game_id = ?", (str(game_id),)).fetchone()[0]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return SqliteSessionStore(str(tmp_path / "sessions.sqlite3"))
+
+
+def test_edit_saves_changes(store):
+    store.add(_new_game(1))
+
+    with store.edit(1) as game:
+        game.game_engine.add_score(7)
+        game.game_engine.end_game()
+
+    assert store.get(1).game_engine.score == game.game_engine.score
+    assert store.get_meta(1)["is_on"] is False
+
+
+def test_edit_unknown_game(store):
+    with pytest.raises(KeyError):
+        with store.edit(404):
+            pass
+
+
+def test_sqlite_read_only_command_keeps_version(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    store.add(_new_game(1))
+
+    with store.edit(1) as game:
+        assert game.perform("print_field")["ok"]
+    assert _row_version(store, 1) == 1
+
+    with store.edit(1) as game:
+        game.game_engine.add_score(1)
+    assert _row_version(store, 1) == 2
+
+
+def test_sqlite_failed_command_is_discarded(tmp_path):
+    store = SqliteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    store.add(_new_game(1))
+
+    with pytest.raises(RuntimeError):
+        with store.edit(1) as game:
+            game.game_engine.add_score(100)
+            raise RuntimeError("ошибка команды")
+
+    assert store.get(1).game_engine.score == 0
+    assert _row_version(store, 1) == 1
+
+
+def test_sqlite_workers_do_not_lose_updates(tmp_path):
+    # Два хранилища на одном файле моделируют два воркера, каждый обслуживает игру несколькими потоками
+    path = str(tmp_path / "sessions.sqlite3")
+    workers = [SqliteSessionStore(path), SqliteSessionStore(path)]
+    workers[0].add(_new_game(1))
+
+    threads_per_worker, commands_per_thread = 4, 25
+    errors = []
+
+    conflicts = []
+
+    # Как и сервер, каждый воркер выполняет команды одной игры по очереди и повторяет команду при конфликте
+    def play(store, lock):
+        try:
+            for _ in range(commands_per_thread):
+                while True:
+                    try:
+                        with lock, store.edit(1) as game:
+                            game.game_engine.add_score(1)
+                        break
+                    except SessionConflict:
+                        conflicts.append(1)
+        except Exception as err:
+            errors.append(err)
+
+    locks = {store: threading.Lock() for store in workers}
+    threads = [threading.Thread(target=play, args=(store, locks[store]))
+               for store in workers for _ in range(threads_per_worker)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = len(workers) * threads_per_worker * commands_per_thread
+    assert errors == []
+    assert workers[0].get(1).game_engine.score == total
+    assert workers[1].get(1).game_engine.score == total
+    assert _row_version(workers[0], 1) == total + 1
+
+
+def test_sqlite_conflicting_edit_is_rejected(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first, second = SqliteSessionStore(path), SqliteSessionStore(path)
+    first.add(_new_game(1))
+
+    with pytest.raises(SessionConflict):
+        with first.edit(1) as game:
+            game.game_engine.add_score(1)
+
+            # Другой воркер изменяет игру, пока выполняется команда первого
+            with second.edit(1) as other:
+                other.game_engine.add_score(10)
+
+    assert first.get(1).game_engine.score == 10
+    assert _row_version(first, 1) == 2
+
+
+def test_sqlite_edit_does_not_block_other_games(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first, second = SqliteSessionStore(path), SqliteSessionStore(path)
+    first.add(_new_game(1))
+    first.add(_new_game(2))
+
+    # База данных не блокируется на время выполнения команды, поэтому команда другой игры сохраняется сразу
+    with first.edit(1) as game:
+        game.game_engine.add_score(1)
+        with second.edit(2) as other:
+            other.game_engine.add_score(2)
+        assert _row_version(second, 2) == 2
+
+    assert first.get(1).game_engine.score == 1
+    assert first.get(2).game_engine.score == 2
+
+
+def test_delete_if_inactive(store):
+    store.add(_new_game(1))
+    last_activity = store.get_meta(1)["last_activity"]
+
+    assert not store.delete_if_inactive(1, last_activity - 1)
+    assert store.get_meta(1) is not None
+
+    assert store.delete_if_inactive(1, last_activity)
+    assert store.get_meta(1) is None
+    assert not store.delete_if_inactive(1, last_activity)
@@ -0,0 +1,120 @@
+import pickle
+import random
+import struct
+import timeit
+
+import pytest
+
+from src.errors import GameEngineError
+from src.game_engine import GameEngine
+from src.headless import HeadlessGame
+from src.snapshot import SNAPSHOT_MAGIC
+
+
+def _restore(data, board_backend="objects"):
+    engine = GameEngine(None, 0, None, quiet=True, rng=random.Random(0))
+    engine.board_backend = board_backend
+    return engine.restore(data)
+
+
+def _state(engine):
+    """Наблюдаемое состояние игры для сравнения исходной и восстановленной игры"""
+    return {
+        "game_id": engine.game_id,
+        "score": engine.score,
+        "is_game_on": engine.is_game_on,
+        "state_version": engine.state_version,
+        "field": engine.get_current_field_view(),
+        "spots": [spot.info() for row in engine.game_field for spot in row],
+        "items": {tag: item.info() for tag, item in engine.items_dict.items()},
+        "field_tags": sorted(engine.field_tags),
+        "friendly_tags": sorted(engine.friendly_tags),
+        "inventory": {name: count for name, count in engine.inventory.get_counts().items() if count},
+        "actions": [(action["subject"].get_tag(), action["action"], action["args"])
+                    for action in engine.player_actions],
+        "fingerprint": engine.get_fingerprint(),
+    }
+
+
+@pytest.mark.parametrize("board_backend", ["objects", "array"])
+@pytest.mark.parametrize("seed", range(10))
+def test_round_trip(new_game, playout, seed, board_backend):
+    game = new_game(seed, board_backend)
+    data = game.game_engine.snapshot()
+    assert _state(_restore(data, board_backend)) == _state(game.game_engine)
+
+    for _ in playout(game, seed):
+        data = game.game_engine.snapshot()
+        restored = _restore(data, board_backend)
+
+        assert _state(restored) == _state(game.game_engine)
+        assert restored.snapshot() == data
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_restored_game_plays_the_same(new_game, playout, seed):
+    game = new_game(seed)
+    for _ in playout(game, seed, max_commands=5):
+        pass
+
+    restored = HeadlessGame(rng=random.Random(1))
+    restored.game_engine.restore(game.game_engine.snapshot())
+    game.game_engine.rng = game.rng = random.Random(1)
+
+    for command, result in playout(game, seed + 100):
+        assert restored.perform(command) == result
+        assert _state(restored.game_engine) == _state(game.game_engine)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_snapshot_is_compact(new_game, playout, seed):
+    game = new_game(seed)
+    for _ in playout(game, seed, max_commands=20):
+        pass
+
+    data = game.game_engine.snapshot()
+    assert len(data) < 1000
+    assert len(data) < len(pickle.dumps(game.game_engine, protocol=pickle.HIGHEST_PROTOCOL)) / 5
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:-3],
+    lambda data: data + b"\0",
+    lambda data: b"XYZ" + data[3:],
+    lambda data: SNAPSHOT_MAGIC + struct.pack("<B", 99) + data[4:],
+    lambda data: b"",
+])
+def test_corrupted_snapshot(new_game, corrupt):
+    data = new_game(1).game_engine.snapshot()
+
+    with pytest.raises(GameEngineError):
+        _restore(corrupt(data))
+
+
+@pytest.mark.benchmark
+def test_benchmark_against_pickle(new_game, playout):
+    game = new_game(3)
+    for _ in playout(game, 3, max_commands=10):
+        pass
+
+    engine = game.game_engine
+    data = engine.snapshot()
+    pickled = pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL)
+    number = 500
+
+    def best(function):
+        return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+    results = {
+        "snapshot": best(engine.snapshot),
+        "restore": best(lambda: _restore(data)),
+        "pickle.dumps": best(lambda: pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL)),
+        "pickle.loads": best(lambda: pickle.loads(pickled)),
+    }
+
+    print(f"\nsnapshot: {len(data)} байт, pickle: {len(pickled)} байт")
+    for name, seconds in results.items():
+        print(f"{name}: {seconds * 1e6:.1f} мкс")
+
+    assert results["snapshot"] < 0.001
+    assert results["restore"] < 0.001
@@ -0,0 +1,42 @@
+import pytest
+
+from src import solver
+
+
+@pytest.mark.parametrize("board_backend, movement_mode", [("objects", "path"), ("array", "manhattan")])
+def test_copies_use_settings_of_the_game(monkeypatch, new_game, board_backend, movement_mode):
+    # Переменные окружения задают другие настройки, чем у исходной игры
+    monkeypatch.setenv("BOARD_BACKEND", "array" if board_backend == "objects" else "objects")
+    monkeypatch.setenv("MOVEMENT_MODE", "manhattan" if movement_mode == "path" else "path")
+
+    engine = new_game(1, board_backend, movement_mode).game_engine
+    copy = solver._restore(engine.snapshot(), solver._engine_settings(engine))
+
+    assert (copy.board_backend, copy.movement_mode) == (board_backend, movement_mode)
+    for tag in engine.friendly_tags:
+        assert copy.legal_actions(tag) == engine.legal_actions(tag)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_hint_commands_are_legal_with_path_movement(monkeypatch, new_game, seed):
+    monkeypatch.setenv("MOVEMENT_MODE", "manhattan")
+
+    game = new_game(seed, movement_mode="path")
+    result = solver.Solver(node_budget=300, all_moves=True).solve(game.game_engine)
+
+    # Найденная последовательность выполняется в исходной игре без ошибок и дает обещанный счет
+    for command in result.commands:
+        engine = game.game_engine
+        assert command in [action for tag in engine.friendly_tags for action in engine.legal_actions(tag)]
+        assert game.perform(command)["ok"]
+
+    assert solver._final_score(game.game_engine) == result.score
+
+
+def test_solve_does_not_change_the_game(new_game):
+    engine = new_game(2).game_engine
+    snapshot = engine.snapshot()
+
+    solver.get_hint(engine, time_budget=0.1, node_budget=100)
+
+    assert engine.snapshot() == snapshot
@@ -1,38 +1,192 @@
 import json
 import os
+import threading
 import requests
-import random
 
+try:
+    import fcntl
+except ImportError:
+    # На Windows блокировка файла счетчика недоступна, консольная игра запускается в одном процессе
+    fcntl = None
 
-def generate_game_id(io_stream):
-    game_id = int()
 
-    try:
-        if io_stream == "console":
-            path = os.getcwd() + "/files/meta.json"
+class GameIdAllocator:
+    """
+    Выдача id игр из заранее арендованных диапазонов.
+    Диапазон id арендуется целиком у API базы данных или у локального файла счетчика,
+    после чего id выдаются из памяти. Новый диапазон арендуется в фоновом потоке,
+    когда в текущем остается мало id
+    """
+
+    def __init__(self, io_stream, block_size, low_watermark=None):
+        """
+        :param io_stream: str, поток ввода данных: "console" или "web"
+        :param block_size: int, количество id, арендуемых за один раз
+        :param low_watermark: int, остаток id, при котором арендуется следующий диапазон
+        """
+
+        self.io_stream = io_stream
+        self.block_size = max(1, block_size)
+        self.low_watermark = low_watermark if low_watermark is not None else self.block_size // 10
+
+        # Арендованные диапазоны в виде [первый свободный id, конец диапазона)
+        self._ranges = []
+        self._condition = threading.Condition()
+
+        # Одновременно выполняется не более одной аренды: фоновая или при исчерпании всех диапазонов.
+        # Аренда выполняется без блокировки, выдача id из оставшихся диапазонов в это время продолжается
+        self._leasing = False
+
+    def next_id(self):
+        """Возвращает следующий свободный id игры"""
+
+        while True:
+            with self._condition:
+                # Если диапазон уже арендуется другим потоком, id ожидается от этой аренды
+                while not self._ranges and self._leasing:
+                    self._condition.wait()
+
+                if self._ranges:
+                    return self._take()
+
+                self._leasing = True
+
+            self._lease_and_store()
+
+    def _take(self):
+        """Выдает id из первого диапазона и при необходимости запускает аренду следующего"""
+
+        current = self._ranges[0]
+        game_id = current[0]
+        current[0] += 1
+
+        if current[0] >= current[1]:
+            self._ranges.pop(0)
+
+        remaining = sum(end - start for start, end in self._ranges)
+        if remaining <= self.low_watermark and not self._leasing and self.block_size > 1:
+            self._leasing = True
+            threading.Thread(target=self._refill, daemon=True).start()
+
+        return game_id
+
+    def _lease_and_store(self):
+        """Арендует диапазон и добавляет его к доступным. Вызывается потоком, установившим признак аренды"""
+
+        leased = None
+        try:
+            leased = self._lease()
+        finally:
+            with self._condition:
+                if leased is not None:
+                    self._ranges.append(leased)
+                self._leasing = False
+                self._condition.notify_all()
+
+    def _refill(self):
+        try:
+            self._lease_and_store()
+        except Exception as err:
+            print(f"Не удалось арендовать диапазон id игр: {err}")
+
+    def _lease(self):
+        """Арендует новый диапазон id"""
+        if self.io_stream == "web":
+            return self._lease_from_api()
+
+        return self._lease_from_file()
 
-            if not os.path.isfile(path):
-                with open(path, "w", encoding="utf-8") as file:
-                    json.dump({"last_game_id": 0}, file)
+    def _lease_from_api(self):
+        """
+        Арендует диапазон id у API базы данных.
+        Если API не сообщает размер выданного диапазона, то есть не поддерживает аренду диапазонов,
+        выдан один id. В этом случае аренда диапазонов отключается, и каждый id запрашивается у API отдельно
+        """
 
-            with open(path) as file_to_read:
-                data = json.load(file_to_read)
+        url = f"{os.getenv('DB_API_URI')}/cdg/gameid"
+        response = requests.get(url, params={"count": self.block_size}, timeout=10)
 
-                data["last_game_id"] += 1
-                game_id = data["last_game_id"]
+        if int(response.status_code) != 200:
+            raise RuntimeError(f"API базы данных вернуло статус {response.status_code}")
 
-                with open(path, "w") as file_to_write:
-                    json.dump(data, file_to_write)
+        data = response.json()
+        first_id = int(data["game_id"])
+
+        if "count" not in data:
+            if self.block_size > 1:
+                print("API базы данных не сообщает размер выданного диапазона id игр, "
+                      "id будут запрашиваться по одному")
+                self.block_size = 1
+                self.low_watermark = 0
+            return [first_id, first_id + 1]
+
+        count = int(data["count"])
+        if count < 1:
+            raise RuntimeError(f"API базы данных выдало диапазон id игр неверного размера: {count}")
+
+        return [first_id, first_id + count]
+
+    def _lease_from_file(self):
+        """Арендует диапазон id у файла счетчика, файл блокируется на время изменения"""
+
+        directory = os.getcwd() + "/files"
+        path = directory + "/meta.json"
+
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, "a+", encoding="utf-8") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+
+            try:
+                file.seek(0)
+                content = file.read()
+                data = json.loads(content) if content.strip() else {"last_game_id": 0}
+
+                first_id = data["last_game_id"] + 1
+                data["last_game_id"] += self.block_size
+
+                file.seek(0)
+                file.truncate()
+                json.dump(data, file)
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+        return [first_id, first_id + self.block_size]
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def _reset_allocators():
+    # Арендованные диапазоны не должны наследоваться дочерними процессами, иначе id будут повторяться
+    global _allocators_lock
+    _allocators.clear()
+    _allocators_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_allocators)
+
+
+def generate_game_id(io_stream):
+    """
+    Возвращает новый уникальный id игры.
+    Размер арендуемого диапазона задается переменной окружения GAME_ID_BLOCK_SIZE,
+    по умолчанию 1000 для сервера и 1 для консольной игры
+    """
 
-        elif io_stream == "web":
-            url = f"{os.getenv('DB_API_URI')}/cdg/gameid"
-            response = requests.get(url)
-            if int(response.status_code) == 200:
-                game_id = int(response.json()["game_id"])
-            else:
-                game_id = random.randint(1, 1000000)
+    with _allocators_lock:
+        allocator = _allocators.get(io_stream)
 
-    except BaseException:
-        game_id = random.randint(1, 1000000)
+        if allocator is None:
+            default_block_size = 1000 if io_stream == "web" else 1
+            allocator = GameIdAllocator(io_stream, int(os.getenv("GAME_ID_BLOCK_SIZE", default_block_size)))
+            _allocators[io_stream] = allocator
 
-    return game_id
+    return allocator.next_id()
@@ -1,25 +1,411 @@
 import os
 import csv
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import threading
+from datetime import datetime
 import requests
 
 
+class LogShipper:
+    """
+    Фоновая отправка событий журнала в API базы данных.
+    События складываются в ограниченную очередь и отправляются пачками по размеру или по времени
+    через одно постоянное соединение. События, которые не удалось поставить в очередь или которые API
+    не приняло ответом 2xx, сохраняются в файл или отбрасываются
+    """
+
+    def __init__(self, url, max_queue_size=10000, batch_size=100, flush_interval=1.0,
+                 max_retries=5, spill_path=None):
+        """
+        :param url: str, адрес API журнала
+        :param max_queue_size: int, максимальное количество событий в очереди
+        :param batch_size: int, максимальное количество событий в одной отправке
+        :param flush_interval: float, максимальное время ожидания накопления пачки в секундах
+        :param max_retries: int, количество повторных попыток отправки пачки
+        :param spill_path: str, файл для событий, которые не удалось поставить в очередь или отправить.
+        Если не задан, такие события отбрасываются
+        """
+
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.spill_path = spill_path
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._spill_lock = threading.Lock()
+
+        # Пачка событий отправляется одним запросом в виде списка. Если API журнала отклоняет список,
+        # события отправляются по одному в виде объектов
+        self.batched = True
+
+        self.sent = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.retries = 0
+        self.rejected = 0
+        self.failed_batches = 0
+
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, event):
+        """Ставит событие в очередь на отправку, не блокируя вызывающий поток"""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._spill([event])
+
+    def stats(self):
+        """Возвращает метрики отправки журнала"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+            "batched": self.batched
+        }
+
+    def _spill(self, events):
+        if self.spill_path is None:
+            self.dropped += len(events)
+            return
+
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as file:
+                for event in events:
+                    file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self.spilled += len(events)
+        except OSError:
+            self.dropped += len(events)
+
+    def _collect_batch(self):
+        """Собирает пачку событий, ожидая не дольше flush_interval"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _deliver(self, payload, retry):
+        """
+        Отправляет событие или список событий с повторами при недоступности API.
+        Ответы со статусом меньше 500 не повторяются\n
+        :return: int, статус последнего ответа или None, если API недоступно
+        """
+
+        delay = 0.5
+        attempts = self.max_retries + 1 if retry else 1
+        status = None
+
+        for attempt in range(attempts):
+            try:
+                status = int(self._session.post(self.url, json=payload, timeout=10).status_code)
+            except Exception:
+                status = None
+
+            if status is not None and status < 500:
+                return status
+
+            if attempt + 1 < attempts:
+                self.retries += 1
+                if self._stop.wait(delay):
+                    # Во время остановки повторы не ждут, оставшиеся события сохраняются
+                    break
+                delay = min(delay * 2, 30)
+
+        return status
+
+    def _account(self, events, status):
+        """Учитывает результат отправки событий. Неотправленные события сохраняются в файл или отбрасываются"""
+
+        if status is not None and 200 <= status < 300:
+            self.sent += len(events)
+            return
+
+        if status is not None and 400 <= status < 500:
+            self.rejected += len(events)
+
+        self.failed_batches += 1
+        self._spill(events)
+
+    def _send(self, batch, retry=True):
+        if self.batched:
+            status = self._deliver(batch, retry)
+            if status is None or not 400 <= status < 500:
+                self._account(batch, status)
+                return
+
+            # API журнала не принимает список событий, далее события отправляются по одному
+            print(f"API журнала отклонило пачку событий со статусом {status}, события будут отправляться по одному")
+            self.batched = False
+
+        for event in batch:
+            self._account([event], self._deliver(event, retry))
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._send(batch)
+
+    def flush(self):
+        """Останавливает фоновый поток и отправляет все события из очереди"""
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not batch:
+                break
+
+            self._send(batch, retry=False)
+
+
+_shipper = None
+_shipper_lock = threading.Lock()
+
+
+def get_log_shipper():
+    """
+    Возвращает общий для процесса отправщик журнала. Настраивается переменными окружения:
+    LOG_QUEUE_SIZE, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL, LOG_SPILL_PATH
+    """
+
+    global _shipper
+
+    with _shipper_lock:
+        if _shipper is None:
+            _shipper = LogShipper(f"{os.getenv('DB_API_URI')}/cdg/log",
+                                  max_queue_size=int(os.getenv("LOG_QUEUE_SIZE", 10000)),
+                                  batch_size=int(os.getenv("LOG_BATCH_SIZE", 100)),
+                                  flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", 1.0)),
+                                  spill_path=os.getenv("LOG_SPILL_PATH"))
+            atexit.register(_shipper.flush)
+
+    return _shipper
+
+
+def get_log_shipper_stats():
+    """Возвращает метрики отправщика журнала или None, если он еще не создан"""
+    return _shipper.stats() if _shipper is not None else None
+
+
+def _reset_shipper():
+    # Поток отправки не переживает fork, дочерний процесс создает свой отправщик
+    global _shipper, _shipper_lock
+    _shipper = None
+    _shipper_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_shipper)
+
+
+class CsvLogWriter:
+    """
+    Буферизованная запись журнала в CSV файл для консольного режима.
+    Файл остается открытым между событиями, буфер сбрасывается по количеству событий или по времени.
+    Сброс по времени выполняется фоновым потоком, поэтому события не задерживаются в буфере при отсутствии новых.
+    Поддерживается ротация по размеру файла или по дням со сжатием старых файлов gzip
+    """
+
+    header = ["Game_ID", "Game_Event", "Message"]
+
+    # Политики синхронизации с диском:
+    # "always" - после каждого события, "every_n" - после каждых fsync_every событий, "exit" - при закрытии
+    fsync_policies = ("always", "every_n", "exit")
+
+    def __init__(self, path, flush_every=100, flush_interval=1.0, max_bytes=0, rotate_daily=False,
+                 fsync_policy="exit", fsync_every=100):
+        """
+        :param path: str, путь к файлу журнала
+        :param flush_every: int, количество событий, после которого сбрасывается буфер
+        :param flush_interval: float, время в секундах, после которого сбрасывается буфер
+        :param max_bytes: int, размер файла, после которого начинается новый файл. 0 - без ограничения
+        :param rotate_daily: bool, True, если каждый день начинается новый файл
+        :param fsync_policy: str, политика синхронизации с диском
+        :param fsync_every: int, количество событий между синхронизациями для политики "every_n"
+        """
+
+        if fsync_policy not in self.fsync_policies:
+            raise ValueError(f"Неизвестная политика синхронизации журнала: {fsync_policy}")
+
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.fsync_policy = fsync_policy
+        self.fsync_every = max(1, fsync_every)
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._opened_date = None
+        self._pending = 0
+        self._events = 0
+        self._last_flush = time.monotonic()
+
+        self._open()
+
+        self._closed = threading.Event()
+        if self.flush_interval > 0:
+            threading.Thread(target=self._run_flusher, name="csv-log-flusher", daemon=True).start()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        is_new = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        self._opened_date = datetime.now().date()
+
+        if is_new:
+            self._writer.writerow(self.header)
+            self._file.flush()
+
+    def _needs_rotation(self):
+        if self.rotate_daily and datetime.now().date() != self._opened_date:
+            return True
+
+        return self.max_bytes > 0 and self._file.tell() >= self.max_bytes
+
+    def _rotate(self):
+        """Закрывает текущий файл, сжимает его и начинает новый"""
+        self._sync()
+        self._file.close()
+
+        base, extension = os.path.splitext(self.path)
+        rotated_path = f"{base}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{extension}"
+        os.replace(self.path, rotated_path)
+
+        with open(rotated_path, "rb") as source, gzip.open(rotated_path + ".gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(rotated_path)
+
+        self._open()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def _flush(self):
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def _run_flusher(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._pending and not self._file.closed and \
+                        time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush()
+
+    def write(self, row):
+        """Записывает строку журнала"""
+
+        with self._lock:
+            if self._needs_rotation():
+                self._rotate()
+
+            self._writer.writerow(row)
+            self._events += 1
+            self._pending += 1
+
+            if self.fsync_policy == "always" or \
+                    (self.fsync_policy == "every_n" and self._events % self.fsync_every == 0):
+                self._sync()
+
+            elif self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def close(self):
+        """Сбрасывает буфер на диск и закрывает файл"""
+
+        self._closed.set()
+
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+_csv_writers = {}
+_csv_writers_lock = threading.Lock()
+
+
+def get_csv_log_writer(path):
+    """
+    Возвращает общий для процесса объект записи журнала в файл. Настраивается переменными окружения:
+    LOG_FLUSH_EVERY, CSV_FLUSH_INTERVAL, LOG_MAX_BYTES, LOG_ROTATE_DAILY, LOG_FSYNC, LOG_FSYNC_EVERY
+    """
+
+    with _csv_writers_lock:
+        writer = _csv_writers.get(path)
+
+        if writer is None:
+            writer = CsvLogWriter(path,
+                                  flush_every=int(os.getenv("LOG_FLUSH_EVERY", 100)),
+                                  flush_interval=float(os.getenv("CSV_FLUSH_INTERVAL", 1.0)),
+                                  max_bytes=int(os.getenv("LOG_MAX_BYTES", 0)),
+                                  rotate_daily=os.getenv("LOG_ROTATE_DAILY", "0") == "1",
+                                  fsync_policy=os.getenv("LOG_FSYNC", "exit"),
+                                  fsync_every=int(os.getenv("LOG_FSYNC_EVERY", 100)))
+            _csv_writers[path] = writer
+            atexit.register(writer.close)
+
+    return writer
+
+
+def _close_csv_log_writer(path):
+    with _csv_writers_lock:
+        writer = _csv_writers.pop(path, None)
+
+    if writer is not None:
+        writer.close()
+
+
 class Logger:
 
     def __init__(self, io_stream):
         self.io_stream = io_stream
 
         if self.io_stream == "console":
-            cwd = os.getcwd()
-            self.logs_output_path = cwd + "/files/logs.csv"
-
-            if not os.path.exists(cwd + "/files"):
-                os.makedirs(cwd + "/files")
+            self.logs_output_path = os.getcwd() + "/files/logs.csv"
 
-            if not os.path.isfile(self.logs_output_path):
-                with open(self.logs_output_path, "w", encoding="utf-8") as file:
-                    file_writer = csv.writer(file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-
-                    file_writer.writerow(["Game_ID", "Game_Event", "Message"])
+            # Файл журнала открывается один раз на процесс и остается открытым
+            get_csv_log_writer(self.logs_output_path)
 
     def log(self, game_id, game_event, message):
         """
@@ -29,16 +415,13 @@ class Logger:
         """
 
         if self.io_stream == "console":
-            with open(self.logs_output_path, "a", encoding="utf-8") as file:
-                file_writer = csv.writer(file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-                file_writer.writerow([game_id, game_event, message])
+            get_csv_log_writer(self.logs_output_path).write([game_id, game_event, message])
 
         elif self.io_stream == "web":
-
-            url = f"{os.getenv('DB_API_URI')}/cdg/log"
-
-            requests.post(url, json={"game_id": game_id, "game_event": game_event, "message": message})
+            # События отправляются фоновым потоком, запрос игрока не ждет ответа API журнала
+            get_log_shipper().enqueue({"game_id": game_id, "game_event": game_event, "message": message})
 
     def remove_logs(self):
         if self.io_stream == "console":
+            _close_csv_log_writer(self.logs_output_path)
             os.remove(self.logs_output_path)